@@ -76,7 +76,26 @@ class Data_Measurement(BaseModel):
     BOARD_DEFAULT_INTERVAL:float = 0.001  # seconds
     stepsize_JV :float = 0.045 #Volt
     settletime_JV : float= 0.1 # seconds dont change
+    settletime_mux_JV: float = 0.01 # seconds after switching the mux in a board-wide JV sweep
+    JV_mode: Literal["uniform", "adaptive"] = "uniform" # adaptive: coarse steps, fine around the knee, stop past Voc
     interval_next_JV: int = 10000 # Perform a JV-SCan after a certain amunt of seconds
+    network_sync_period: float = 30.0 # seconds between syncs of the data files to network_folder
+    max_tracking_gap: float = 60.0 # seconds a cell may go untracked while other cells are JV swept
+
+    # Flattened list of the cells to track, built by Measurement_engine.get_plan
+    _execution_plan: Optional[list] = PrivateAttr(default=None)
+    # Deadline scheduler over the plan, built by Measurement_engine.get_scheduler
+    _scheduler: Optional[Any] = PrivateAttr(default=None)
+    # Set by invalidate_plan, the scheduler is rebuilt once its running JV sweep has ended
+    _scheduler_stale: bool = PrivateAttr(default=False)
+
+    def invalidate_plan(self):
+        """Drop the execution plan, call this whenever chucks, substrates or cells are edited.
+
+        A JV sweep in progress is finished on the old plan before the scheduler is rebuilt.
+        """
+        self._execution_plan = None
+        self._scheduler_stale = True
 
 
     
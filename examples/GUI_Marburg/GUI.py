@@ -1,17 +1,20 @@
 from PyQt5.QtWidgets import (
     QApplication, QWidget, QPushButton, QHBoxLayout, QVBoxLayout, QMessageBox,
-    QGroupBox, QTextEdit, QDialog
+    QGroupBox, QTextEdit, QDialog, QLabel
 )
 from PyQt5.QtGui import QIcon
-from PyQt5.QtCore import Qt, QSize
+from PyQt5.QtCore import Qt, QSize, QTimer
 
 from container import String_Chuck_Container
 from helpers import load_measurement_from_yaml
 from dialogs import MeasurementEditDialog
 
 from threads import MeasurementControlThread
-from Measurement_engine import track,set_all_cells_to_voltage
-from old_drivers import initialize_boards
+from Measurement_engine import track,set_all_cells_to_voltage, metrics_channels
+from old_drivers import initialize_boards, network_sync
+from software import metrics
+from software.exporter import MetricsExporter
+from software.hardware.constants import METRICS_PORT_ENV_VAR
 
 QApplication.setAttribute(Qt.AA_EnableHighDpiScaling)
 QApplication.setAttribute(Qt.AA_UseHighDpiPixmaps)
@@ -35,6 +38,15 @@ class FullscreenButtonWindow(QWidget):
         # Set all channels to 0.5V
         set_all_cells_to_voltage(Data_Measurement=self.measurement, voltage=0.5)
 
+        # Prometheus endpoint on localhost when started with OCTOBOARD_METRICS_PORT=<port>,
+        # served from the last readings, a scrape never touches the bus
+        self.exporter = None
+        if os.environ.get(METRICS_PORT_ENV_VAR):
+            metrics.enable()
+            self.exporter = MetricsExporter(channels=lambda: metrics_channels(self.measurement),
+                                            sync=network_sync)
+            self.exporter.serve(port=int(os.environ[METRICS_PORT_ENV_VAR]))
+
         #Now perform a fast J-V Scan 
 
         main_layout = QVBoxLayout()
@@ -86,10 +98,23 @@ class FullscreenButtonWindow(QWidget):
         button_row.addWidget(self.pause_button)
         button_row.addWidget(self.stop_button)
 
+        # Bus operation timings, shown when started with OCTOBOARD_METRICS=1
+        self.metrics_label = QLabel()
+        self.metrics_label.setVisible(metrics.registry.enabled)
+        self.metrics_timer = QTimer(self)
+        self.metrics_timer.timeout.connect(self.update_metrics_display)
+        self.metrics_timer.start(2000)
+
         self.info_layout.addWidget(self.info_text)
+        self.info_layout.addWidget(self.metrics_label)
         self.info_layout.addLayout(button_row)
         self.info_box.setLayout(self.info_layout)
 
+    def update_metrics_display(self):
+        self.metrics_label.setVisible(metrics.registry.enabled)
+        if metrics.registry.enabled:
+            self.metrics_label.setText(metrics.summary())
+
     def update_info_display(self):
         m = self.measurement
         text = f"ID: {m.id}\nUser: {m.user}\nAlgorithm: {m.mpp_algorithm}\nFolder: {m.local_folder}"
@@ -1,40 +1,157 @@
-from Data_Classes import Data_Measurement
-from old_drivers import select_channel
+import time
+from typing import NamedTuple, Any
+from Data_Classes import Data_Measurement, Data_Cell
+from old_drivers import select_channel, BoardJVSweep
+from software.hardware.schedule import Schedule, ScheduleStep, DeadlineScheduler
+from software.metrics import timed
 
-# chatgpt --> this shall be executed until the measurement is stopped 
+
+class PlanStep(NamedTuple):
+    """One cell of the execution plan with its resolved Octoboard channel."""
+    tca: int
+    board: int
+    channel_number: int
+    channel: Any  # old_drivers.Channel
+    cell: Data_Cell
+
+
+def compile_plan(Data_Measurement: Data_Measurement, active_only=True):
+    """Flatten the cells of a measurement into a list of PlanSteps.
+
+    Cells are ordered by a Schedule: by TCA channel, so every TCA channel is
+    selected once per cycle, then by Octoboard and channel. Cells whose
+    Octoboard channel cannot be resolved are reported and skipped.
+    """
+    steps = []
+    for string_chuck in sorted(Data_Measurement.string_chucks, key=lambda c: int(c.id)):
+        if active_only and not string_chuck.active: continue
+        for substrate in sorted(string_chuck.substrates, key=lambda c: int(c.id)):
+            if active_only and not substrate.active: continue
+            for cell in sorted(substrate.cells, key=lambda c: int(c.id)):
+                try:
+                    manager = Data_Measurement.oboard_managers[cell.TCA_Channel]
+                    channel = manager.oboards[cell.Octoboard_number].channel[cell.Channel]
+                except (AttributeError, IndexError, TypeError) as e:
+                    print(f"Skipping cell {cell.id}: no channel {cell.Channel} on board "
+                          f"{cell.Octoboard_number} of TCA channel {cell.TCA_Channel} ({e})")
+                    continue
+                step = PlanStep(cell.TCA_Channel, cell.Octoboard_number, cell.Channel, channel, cell)
+                steps.append(ScheduleStep(step.tca, step.board, step.channel_number, step))
+    return [step.item for step in Schedule(steps)]
+
+
+def describe_plan(Data_Measurement: Data_Measurement, plan):
+    """Return the estimated settle-time budget of one tracking cycle over a plan."""
+    schedule = Schedule([ScheduleStep(step.tca, step.board, step.channel_number, step)
+                         for step in plan])
+    settle_per_sample = plan[0].channel.settle_time_per_sample if plan else 0
+    # The mux settling of the GUI drivers happens inside read_voltage/read_current
+    return schedule.describe(
+        mux_settle_time=0,
+        visit_settle_time=Data_Measurement.BOARD_DEFAULT_ITERATIONS * settle_per_sample,
+    )
+
+
+def get_plan(Data_Measurement: Data_Measurement):
+    """Return the cached execution plan, compiling it after the configuration changed."""
+    if Data_Measurement._execution_plan is None:
+        Data_Measurement._execution_plan = compile_plan(Data_Measurement)
+        print(describe_plan(Data_Measurement, Data_Measurement._execution_plan))
+    return Data_Measurement._execution_plan
+
+
+def metrics_channels(Data_Measurement: Data_Measurement):
+    """Return (labels, channel) pairs of the planned cells for the metrics endpoint.
+
+    Only the cached plan is used, a scrape does not compile one.
+    """
+    return [({'tca': step.tca, 'board': step.board, 'channel': step.channel_number,
+              'cell': step.cell.id}, step.channel)
+            for step in Data_Measurement._execution_plan or []]
+
+
+class SweepJob:
+    """JV sweep of the due cells of one Octoboard, one step per scheduler call."""
+
+    def __init__(self, steps, sweep):
+        self.steps = steps
+        self.sweep = sweep
+
+    def step(self):
+        select_channel(self.steps[0].tca)
+        if self.sweep.step():
+            return True
+        results = self.sweep.results()
+        for step in self.steps:
+            step.channel.finish_JV(step.cell, *results[step.cell.id])
+        return False
+
+
+def get_scheduler(Data_Measurement: Data_Measurement):
+    """Return the cached deadline scheduler over the execution plan.
+
+    Due JV sweeps are split into set points and interleaved with tracking of
+    the other cells, so that no cell goes untracked for longer than
+    max_tracking_gap. Due cells of an Octoboard are swept together, and the
+    next sweeps of the cells are spread over interval_next_JV.
+
+    After invalidate_plan the scheduler is rebuilt, but only once its running
+    JV sweep has ended, so the swept cells go back to tracking via finish_JV.
+    """
+    scheduler = Data_Measurement._scheduler
+    if scheduler is not None and Data_Measurement._scheduler_stale and scheduler.job is None:
+        Data_Measurement._scheduler = None
+    if Data_Measurement._scheduler is None:
+        Data_Measurement._scheduler_stale = False
+        plan = get_plan(Data_Measurement)
+
+        def track_cell(index):
+            step = plan[index]
+            select_channel(step.tca)
+            try:
+                print(f"Tracking on channel {step.channel_number} of board {step.board}")
+                step.channel.mpp_track(DATA=Data_Measurement, cell=step.cell, check_JV=False)
+            except Exception as e:
+                print(f"Error during MPP tracking on channel {step.channel_number} of board {step.board}: {e}")
+
+        def start_sweep(indices):
+            steps = [plan[index] for index in indices]
+            print(f"JV sweep of {len(steps)} cells on board {steps[0].board} of TCA channel {steps[0].tca}")
+            select_channel(steps[0].tca)
+            return SweepJob(steps, BoardJVSweep(steps[0].channel.board, Data_Measurement,
+                                                [(step.channel, step.cell) for step in steps]))
+
+        Data_Measurement._scheduler = DeadlineScheduler(
+            range(len(plan)), track_cell, start_sweep,
+            interval=Data_Measurement.interval_next_JV,
+            group=lambda index: (plan[index].tca, plan[index].board),
+            max_gap=Data_Measurement.max_tracking_gap,
+            last_sweep={index: step.cell.timestamp_last_JV for index, step in enumerate(plan)},
+        )
+    return Data_Measurement._scheduler
+
+
+# chatgpt --> this shall be executed until the measurement is stopped
+@timed('engine.track')
 def track(Data_Measurement: Data_Measurement):
-    for string_chuck in sorted(Data_Measurement.string_chucks, key = lambda c: int(c.id)): 
-            if not string_chuck.active: continue
-            for substrate in sorted(string_chuck.substrates, key=lambda c: int(c.id)):
-                if  not substrate.active: continue
-                for cell in sorted(substrate.cells, key=lambda c: int(c.id)):
-
-                    select_channel(cell.TCA_Channel)
-                    corresponding_manager = Data_Measurement.oboard_managers[cell.TCA_Channel]
-                    corresponding_oboard = corresponding_manager.oboards[cell.Octoboard_number]
-                    corresponding_channel = corresponding_oboard.channel[cell.Channel]
-
-                    try:
-                        print(f"Tracking on channel {cell.Channel} of board {cell.Octoboard_number}")
-                        corresponding_channel.mpp_track(
-                           DATA = Data_Measurement, cell = cell
-                        )
-                    except Exception as e:
-                        print(f"Error during MPP tracking on channel {cell.Channel} of board {cell.Octoboard_number}: {e}")
+    # One scheduler unit per cell: a tracking visit or one step of a JV sweep
+    scheduler = get_scheduler(Data_Measurement)
+    for _ in range(len(scheduler.keys)):
+        scheduler.run_once()
 
 
 def set_all_cells_to_voltage(Data_Measurement, voltage = 0.5):
-    for string_chuck in sorted(Data_Measurement.string_chucks, key = lambda c: c.id): 
-            for substrate in sorted(string_chuck.substrates, key=lambda c: c.id):
-                for cell in sorted(substrate.cells, key=lambda c: c.id):
-
-                    select_channel(cell.TCA_Channel)
-                    corresponding_manager = Data_Measurement.oboard_managers[cell.TCA_Channel]
-                    corresponding_oboard = corresponding_manager.oboards[cell.Octoboard_number]
-                    corresponding_channel = corresponding_oboard.channel[cell.Channel]
-                           
-                    try:
-                        print(f"Setting {cell.Channel} of board {cell.Octoboard_number} to {voltage}V")
-                        corresponding_channel.set_voltage(voltage)
-                    except Exception as e:
-                        print(f"Error: Could not set {cell.Channel} of board {cell.Octoboard_number} to 0.5V: {e}")
\ No newline at end of file
+    # The plan is ordered by TCA channel and board: one TCA switch and two DAC writes per board
+    boards = {}
+    for step in compile_plan(Data_Measurement, active_only=False):
+        board = step.channel.board
+        voltages = boards.setdefault((step.tca, step.board), (board, [None] * len(board.channel)))[1]
+        voltages[step.channel_number] = voltage
+    for (tca, board_number), (board, voltages) in boards.items():
+        select_channel(tca)
+        try:
+            print(f"Setting channels {[ch for ch, v in enumerate(voltages) if v is not None]} "
+                  f"of board {board_number} to {voltage}V")
+            board.set_voltages(voltages)
+        except Exception as e:
+            print(f"Error: Could not set board {board_number} of TCA channel {tca} to {voltage}V: {e}")
@@ -102,7 +102,8 @@ class String_Chuck_Container(QWidget):
 
     def show_info(self):
         dialog = StringChuckEditDialog(self.data)
-        dialog.exec_()
+        if dialog.exec_() == QDialog.Accepted and self.measurement_data is not None:
+            self.measurement_data.invalidate_plan()  # chuck id decides the tracking order
         self.update_display()
 
     def update_display(self):
@@ -390,11 +391,16 @@ class SubstrateEditDialog(QDialog):
 
         # Nur die richtige Anzahl an Zellen speichern
         self.substrate.cells = self.substrate.cells[:self.substrate.number_of_cells]
+        if self.measurement_data is not None:
+            self.measurement_data.invalidate_plan()
 
         self.accept()
 
 
     def substrate_type_changed(self, new_type):
+        # Changes substrate.active right away, so the tracking plan is outdated
+        if self.measurement_data is not None:
+            self.measurement_data.invalidate_plan()
         if new_type == "Not Active":
             self.substrate.icon = "Empty_Substrate_Slot.png"
             self.substrate.active = False
@@ -105,6 +105,13 @@ class MeasurementEditDialog(QDialog):
         layout.addWidget(QLabel("JV Sweep Stepsize (V):"))
         layout.addWidget(self.stepsize_jv_input)
 
+        # JV Sweep Modus: uniform grid or adaptive (coarse/fine, stops past Voc)
+        self.jv_mode_combo = QComboBox()
+        self.jv_mode_combo.addItems(["uniform", "adaptive"])
+        self.jv_mode_combo.setCurrentText(self.data.JV_mode)
+        layout.addWidget(QLabel("JV Sweep Mode:"))
+        layout.addWidget(self.jv_mode_combo)
+
         # Fixe Settling Time
         self.settletime_jv_input = QDoubleSpinBox()
         self.settletime_jv_input.setDecimals(3)
@@ -146,6 +153,7 @@ class MeasurementEditDialog(QDialog):
         self.data.BOARD_DEFAULT_ITERATIONS = self.iterations_input.value()
         self.data.BOARD_DEFAULT_INTERVAL = self.interval_input.value()
         self.data.stepsize_JV = self.stepsize_jv_input.value()
+        self.data.JV_mode = self.jv_mode_combo.currentText()
         self.data.settletime_JV = self.settletime_jv_input.value()
         self.data.CHANNEL_POWER_INCREASE_FACTOR = self.power_increase_input.value()
         self.data.CHANNEL_POWER_DECREASE_FACTOR = self.power_decrease_input.value()
@@ -157,6 +165,7 @@ class MeasurementEditDialog(QDialog):
             chuck = item.data(Qt.UserRole)
             chuck.active = item.checkState() == Qt.Checked
             configure_data_by_type(chuck)
+        self.data.invalidate_plan()
 
         # Lokalen Ordner erstellen & speichern
         create_folder_if_not_exists(self.data.local_folder)
@@ -74,24 +74,42 @@ def create_folder_if_not_exists(path: str) -> None:
 
 
 def get_mpp_from_j_v_data(v_set,v, c):
-    p_jv = v * c
+    """MPP of a JV sweep, interpolated so that it also works on a non-uniform (adaptive) grid.
+
+    Readings at the same set voltage (forward and reverse scan) are averaged.
+    A parabola through the point of highest power and its neighbours gives the
+    MPP voltage, current and set voltage are interpolated linearly at it.
+
+    Returns:
+        tuple: (set voltage, voltage, current) at the MPP.
+    """
+    v_set, v, c = np.asarray(v_set, dtype=float), np.asarray(v, dtype=float), np.asarray(c, dtype=float)
     valid_mask = (v > 0) & (c > 0)
     
     if not np.any(valid_mask):
         print("No valid data points with v > 0 and c < 0.")
-        p_valid = p_jv
-        v_valid = v
-        c_valid = c
-        v_set_valid = v_set
+        v_set_valid, v_valid, c_valid = v_set, v, c
     else: 
-        p_valid = p_jv[valid_mask]
-        v_valid = v[valid_mask]
-        c_valid = c[valid_mask]
-        v_set_valid = v_set[valid_mask]
-
-    idx_max_power = np.argmax(p_valid)  # most negative value
-    voltage_max_power = v_valid[idx_max_power]
-    current_max_power = c_valid[idx_max_power]
-    voltage_set_max_power = v_set_valid[idx_max_power]
+        v_set_valid, v_valid, c_valid = v_set[valid_mask], v[valid_mask], c[valid_mask]
+
+    # One point per set voltage, sorted by voltage
+    set_points, inverse = np.unique(v_set_valid, return_inverse=True)
+    counts = np.bincount(inverse)
+    v_mean = np.bincount(inverse, weights=v_valid) / counts
+    c_mean = np.bincount(inverse, weights=c_valid) / counts
+    order = np.argsort(v_mean)
+    set_points, v_mean, c_mean = set_points[order], v_mean[order], c_mean[order]
+    p_mean = v_mean * c_mean
+
+    idx_max_power = np.argmax(p_mean)
+    voltage_max_power = v_mean[idx_max_power]
+    if 0 < idx_max_power < len(p_mean) - 1:
+        neighbours = slice(idx_max_power - 1, idx_max_power + 2)
+        a, b, _ = np.polyfit(v_mean[neighbours], p_mean[neighbours], 2)
+        if a < 0:
+            # Vertex of the parabola, it lies between the neighbours
+            voltage_max_power = min(max(-b / (2 * a), v_mean[idx_max_power - 1]), v_mean[idx_max_power + 1])
+    current_max_power = np.interp(voltage_max_power, v_mean, c_mean)
+    voltage_set_max_power = np.interp(voltage_max_power, v_mean, set_points)
 
     return voltage_set_max_power,voltage_max_power, current_max_power
@@ -2,8 +2,6 @@ import argparse
 import board
 import busio
 import os
-import adafruit_mcp4728
-import adafruit_ads1x15.ads1115 as ADS
 from adafruit_ads1x15.analog_in import AnalogIn
 from adafruit_mcp230xx.mcp23017 import MCP23017
 import numpy as np
@@ -15,37 +13,60 @@ from adafruit_blinka.microcontroller.generic_linux.i2c import I2C as _I2C
 from adafruit_blinka.microcontroller.generic_linux.spi import SPI as _SPI
 from os import path
 import threading
+from functools import cached_property
 from busio import I2C, SPI
-import smbus2
 import time
-from helpers import copy_to_network_drive_gio, create_folder_if_not_exists, get_mpp_from_j_v_data
+from helpers import create_folder_if_not_exists, get_mpp_from_j_v_data
+from software.logger import default_log_pipeline
+from software.sync import NetworkSync
+from software.metrics import timed
+from software.hardware.i2c import open_bus
+from software.hardware.topology import load_topology, save_topology, verify_topology
+from software.hardware.constants import TOPOLOGY_FILE
+from software.hardware.tca import TCA9548A
+from software.hardware.gpio import CachedMCP23017
+from software.hardware.adc import PacedADS1115
+from software.hardware.dac import FastMCP4728
+from software.hardware.channel import Sample
+from software.hardware.autorange import AutoRange
+from software.hardware.constants import ADAPTIVE_SWEEP_MAX_STEP_FACTOR, ADAPTIVE_SWEEP_MIN_STEP_FACTOR
+from software.sweep import UniformSweep, AdaptiveSweep
 from datetime import datetime
 
-class ExtendedI2C(I2C):
-    """Extended I2C is a busio extension that allows creating a compatible
-    of /dev/i2c-# and you can find which I2C devices you have by typing
-    ``ls /dev/i2c*``"""
+# Set OCTOBOARD_SIMULATOR=1 to run the GUI on a simulated rig instead of /dev/i2c-*
+SIMULATOR = None
+if os.environ.get("OCTOBOARD_SIMULATOR"):
+    from software.hardware.sim import SimulatedRig
+    SIMULATOR = SimulatedRig.with_tca(
+        bus_id=1,
+        dac_volts_per_code=1 / 1024,  # inverse of Channel.set_voltage below
+        dac_offset=-0.586,            # sdac value
+        mux_map=[6, 5, 4, 7, 3, 0, 2, 1],
+        realtime=True,
+    ).install()
 
-    # pylint: disable=super-init-not-called
-    def __init__(self, bus_id, frequency=400000):
-        self.init(bus_id, frequency)
 
-    # pylint: enable=super-init-not-called
+# Copies the data files to the network drive in the background, replaces the
+# per-sample gio copies. The period is set from the measurement settings.
+network_sync = NetworkSync(before_sync=default_log_pipeline.flush)
 
-    # pylint: disable=arguments-differ
-    def init(self, bus_id, frequency):
-        self.deinit()
 
-        # Check if the file /dev/i2c-{bus_id} exists and error if not
-        if not path.exists(f"/dev/i2c-{bus_id}"):
-            raise ValueError(f"No device found for /dev/i2c-{bus_id}")
-        # Attempt to open using _I2C
-        self._i2c = _I2C(bus_id, mode=_I2C.MASTER, baudrate=frequency)
+def open_i2c(bus_id):
+    """Return the shared I2C bus, on the simulated rig if OCTOBOARD_SIMULATOR is set."""
+    return open_bus(bus_id)
 
-        self._lock = threading.RLock()
-        
+
+# TCA9548A switch on bus 1, created on first use. It keeps one bus handle and
+# only writes the control register when the selected channel changes.
+_tca_switch = None
 
 
+def get_tca_switch():
+    """Return the TCA9548A switch of the setup."""
+    global _tca_switch
+    if _tca_switch is None:
+        _tca_switch = TCA9548A(open_i2c(1))
+    return _tca_switch
 
 
 class OBoardManager:
@@ -54,12 +75,29 @@ class OBoardManager:
     Attributes:
         oboards (list): A list of OBoard instances.
     """
-    def __init__(self, i2c_num=1, possible_offsets=range(0, 4)):
-        """Initialize the OBoardManager by scanning I2C devices and setting up boards accordingly."""
+    def __init__(self, i2c_num=1, possible_offsets=range(0, 4), topology_file=None, tca_channel=None):
+        """Initialize the OBoardManager by scanning I2C devices and setting up boards accordingly.
+
+        With a topology_file the boards stored for this TCA channel are checked
+        with a few probes instead of a full scan, see software.hardware.topology.
+        """
         self.oboards = []
         self.i2c_num = i2c_num
-        self.i2c = ExtendedI2C(i2c_num)  # Setup I2C using the imported board module
-        self.setup_boards(possible_offsets)
+        self.i2c = open_i2c(i2c_num)  # Setup I2C using the imported board module
+        offsets = None
+        if topology_file is not None:
+            offsets = load_topology(i2c_num, tca_channel, topology_file)
+            if offsets is not None and not verify_topology(self.i2c, offsets, possible_offsets):
+                print(f"Boards on TCA channel {tca_channel} do not match {topology_file}, scanning")
+                offsets = None
+        if offsets is None:
+            self.setup_boards(possible_offsets)
+            if topology_file is not None:
+                save_topology(i2c_num, [ob.i2c_address_offset for ob in self.oboards],
+                              tca_channel, topology_file)
+        else:
+            self.oboards = [OBoard(i2c_num=i2c_num, i2c_address_offset=offset) for offset in offsets]
+            print(f"Using boards with I2C offsets {offsets} from {topology_file}")
 
     def setup_boards(self, possible_offsets):
         """Scan I2C addresses and initialize boards only if all required devices are detected."""
@@ -110,36 +148,59 @@ class OBoard:
         Dac_0 (device): First DAC device on the board.
         Dac_1 (device): Second DAC device on the board.
         Mux (device): Multiplexer on the board.
+        gpio (CachedMCP23017): Shadow-register access to the Mux pins.
         Adc (device): ADC device on the board.
         softdac (Softdac): Software-based DAC for fine control.
         channel (list): List of channels controlled by this board.
     """
     def __init__(self, i2c_num=1, i2c_address_offset=2, debug=False):
         """Initialize an OBoard with specified I2C pins and address offset."""
-        i2c = ExtendedI2C(i2c_num)
+        self.i2c = open_i2c(i2c_num)
         self.i2c_num = i2c_num
+        self.i2c_address_offset = i2c_address_offset
         self.debug = debug
         self.ID = f"Bus_{i2c_num}_offset{i2c_address_offset}_"
         self.i2c_base_address = [32 + i2c_address_offset, 72 + i2c_address_offset, 96 + i2c_address_offset * 2, 97 + i2c_address_offset * 2]
         self.i2c_base_devices = ["mux", "ADC", "DAC_0", "DAC_1"]
-        self.Dac_0 = adafruit_mcp4728.MCP4728(i2c, address=96 + 0 + i2c_address_offset * 2)
-        self.Dac_1 = adafruit_mcp4728.MCP4728(i2c, address=96 + 1 + i2c_address_offset * 2)
-        self.Mux = MCP23017(i2c, address=32 + i2c_address_offset)
-        self.Adc = ADS.ADS1115(i2c, gain=1, data_rate=8, address=72 + i2c_address_offset)
-        self.softdac = Softdac(self.Mux)
-        self.channel = []
-        for ch in range(8):
-            channel_list = ['channel_a', 'channel_b', 'channel_c', 'channel_d']
-            if ch < 4:
-                Dac = self.Dac_0
-            else:
-                Dac = self.Dac_1
-            self.channel.append(
-                Channel(self,
-                        Dac=Dac.__dict__[channel_list[ch % 4]],
-                        ind=ch))
-                    
-        #self.channel = [Channel(self, Dac=self.Dac_0 if ch < 4 else self.Dac_1, ind=ch) for ch in range(8)]
+        # The devices are created on first use, see the properties below
+        self.channel = [Channel(self, Dac=None, ind=ch) for ch in range(8)]
+
+    # Fast write: all four channels of a DAC in one transaction
+    @cached_property
+    def Dac_0(self):
+        return self._open_dac(96 + 0 + self.i2c_address_offset * 2)
+
+    @cached_property
+    def Dac_1(self):
+        return self._open_dac(96 + 1 + self.i2c_address_offset * 2)
+
+    def _open_dac(self, address):
+        dac = FastMCP4728(self.i2c, address=address)
+        for dac_channel in dac.channels:
+            dac_channel.gain = 1
+        return dac
+
+    @cached_property
+    def Mux(self):
+        return MCP23017(self.i2c, address=32 + self.i2c_address_offset)
+
+    @cached_property
+    def gpio(self):
+        return CachedMCP23017(self.Mux)  # shadow registers, one write per pin pattern
+
+    # Sleeps one conversion time instead of busy-polling the bus
+    @cached_property
+    def Adc(self):
+        return PacedADS1115(self.i2c, gain=1, data_rate=8, address=72 + self.i2c_address_offset)
+
+    @cached_property
+    def softdac(self):
+        return Softdac(self.gpio)
+
+    def dac_channel(self, ind):
+        """Return the MCP4728 channel driving a board channel."""
+        dac = self.Dac_0 if ind < 4 else self.Dac_1
+        return dac.channels[ind % 4]
 
     def print(self, message):
         """Prints a message if debugging is enabled."""
@@ -148,27 +209,116 @@ class OBoard:
 
     def aMux_enable(self):
         """Enable the analog multiplexer by setting the control pin low."""
-        pin = self.Mux.get_pin(7)
-        pin.switch_to_output(value=0)
+        self.gpio.write_pin(7, 0)
 
     def aMux_disable(self):
         """Disable the analog multiplexer by setting the control pin high."""
-        pin = self.Mux.get_pin(7)
-        pin.switch_to_output(value=1)
+        self.gpio.write_pin(7, 1)
 
+    @timed('mux.select')
     def aMux_select_channel(self, channel: int):
-        """Select a specific channel on the multiplexer."""
+        """Select a specific channel on the multiplexer.
+
+        Returns:
+            bool: True if the multiplexer switched, False if the channel was already selected.
+        """
         mux_channel_map = [6, 5, 4, 7, 3, 0, 2, 1]
         if channel < 0 or channel >= len(mux_channel_map):
             raise ValueError("Invalid channel number")
         address = mux_channel_map.index(channel)
         #address = mux_channel_map[channel]
         self.print(f"Selecting logical channel {channel}, which maps to multiplexer channel {address}")
-        for x in range(3):
-            val = bool(address >> x & 1)
-            pin = self.Mux.get_pin(4 + x)
-            self.print(f"Setting pin {4 + x} to {'HIGH' if val else 'LOW'}")
-            pin.switch_to_output(value=val)
+        # Pins 4-6 in one register write, none if the channel is already selected
+        return self.gpio.write_pins({4 + x: address >> x & 1 for x in range(3)})
+
+    def JV_Sweep(self, DATA, cells):
+        """JV sweep of several cells of this board at once, see BoardJVSweep.
+
+        Args:
+            cells (list): (Channel, Data_Cell) pairs of this board.
+
+        Returns:
+            dict: (set voltages, measured voltages, measured currents) per cell id.
+        """
+        sweep = BoardJVSweep(self, DATA, cells)
+        while sweep.step():
+            pass
+        return sweep.results()
+
+    def set_voltages(self, voltages):
+        """Set the voltages of all 8 channels with one fast write per DAC.
+
+        Args:
+            voltages (list): Voltage per channel, None keeps a channel's voltage.
+        """
+        if len(voltages) != 8:
+            raise ValueError(f"Expected 8 voltages, got {len(voltages)}")
+        for first, dac in ((0, self.Dac_0), (4, self.Dac_1)):
+            dac.fast_write([None if voltage is None else channel.dac_code(voltage)
+                            for channel, voltage in zip(self.channel[first:first + 4],
+                                                        voltages[first:first + 4])])
+
+class BoardJVSweep:
+    """JV sweep of several cells of a board, taken one set point at a time.
+
+    Every step sets all DAC outputs together, waits DATA.settletime_JV once
+    and then reads the cells one after the other, each DATA.settletime_mux_JV
+    after switching the mux. Each cell follows its own plan (Channel.JV_plan),
+    with its own voltage limits and max_allowed_current stop. Other work can be
+    done between the steps, the caller selects the TCA channel before each one.
+
+    Args:
+        board (OBoard): Board of the cells.
+        cells (list): (Channel, Data_Cell) pairs of this board.
+    """
+    def __init__(self, board, DATA, cells):
+        self.board = board
+        self.DATA = DATA
+        self.sweeps = [(channel, cell, channel.JV_log_file(DATA, cell), channel.JV_plan(DATA, cell))
+                       for channel, cell in cells]
+        self.done = False
+
+    def step(self):
+        """Take one step of every unfinished cell, returns False once all cells are done."""
+        if self.done:
+            return False
+        voltages = [None] * 8
+        active = []
+        for sweep in self.sweeps:
+            voltage = sweep[3].next_voltage()
+            if voltage is not None:
+                voltages[sweep[0].ind] = voltage
+                active.append(sweep)
+        if not active:
+            for channel, cell, file_path, plan in self.sweeps:
+                print(f"JV cell {cell.id}: {plan.report()}")
+                network_sync.register(file_path, os.path.join(self.DATA.network_folder, "JV_DATA"))
+            self.done = True
+            return False
+
+        self.board.set_voltages(voltages)
+        time.sleep(self.DATA.settletime_JV)  # One DAC settling for all cells
+
+        for channel, cell, file_path, plan in active:
+            voltage = voltages[channel.ind]
+            try:
+                timestamp, measured_voltage, measured_current, gain_v, gain_c = \
+                    channel.read_sample(self.DATA.settletime_mux_JV)
+            except Exception as e:
+                print(f"Error during JV read of cell {cell.id}: {e}")
+                plan.add(voltage, None, None)
+                continue
+            plan.add(voltage, measured_voltage, measured_current)
+            default_log_pipeline.write_row(file_path, (
+                timestamp, voltage, measured_voltage, measured_current,
+                channel.dac.raw_value, gain_v, gain_c
+            ))
+        return True
+
+    def results(self):
+        """(set voltages, measured voltages, measured currents) per cell id."""
+        return {cell.id: plan.arrays() for _, cell, _, plan in self.sweeps}
+
 
 class Softdac:
     """A software-driven DAC utilizing a multiplexer for setting gain voltages.
@@ -182,7 +332,7 @@ class Softdac:
         _gain (int): Current gain level.
     """
     def __init__(self, Mux, vref=3.3):
-        """Initialize the Softdac with a multiplexer and a reference voltage."""
+        """Initialize the Softdac with the multiplexer GPIO layer (CachedMCP23017) and a reference voltage."""
         self.Mux = Mux
         self.vref = vref
         self.MUX_PINS = [8, 9, 10, 11]
@@ -212,17 +362,15 @@ class Softdac:
         return self._gain
 
     @gain.setter
+    @timed('softdac.gain')
     def gain(self, gain: int):
         """Set the gain of the soft DAC by configuring the multiplexer pins."""
         if gain < 0 or gain >= len(self.gain_voltages):
             raise ValueError("Invalid gain value.")
         val_array = self.reg[gain, :]
-        for ind, val in enumerate(val_array):
-            time.sleep(0.1)
-            pin = self.Mux.get_pin(self.MUX_PINS[ind])
-            time.sleep(0.1)
-            pin.switch_to_output(value=val)
-            #print(f"switching pin {ind}")
+        # All four gain pins in one register write
+        self.Mux.write_pins(dict(zip(self.MUX_PINS, val_array)))
+        time.sleep(0.1)
         self._gain = gain
 
     @property
@@ -244,18 +392,22 @@ class Channel:
         last_p (float): Last recorded power.
         dv (float): Step change in voltage during MPP tracking.
         max_dv (float): Maximum allowable change in voltage per step.
-        gain_v (int): Gain setting for voltage measurement.
-        gain_c (int): Gain setting for current measurement.
+        gain_v (float): Gain setting for voltage measurement, ``range_v.gain``.
+        gain_c (float): Gain setting for current measurement, ``range_c.gain``.
+        range_v (AutoRange): Gain selection of the voltage input.
+        range_c (AutoRange): Gain selection of the current (shunt) input.
+        autorange (bool): Adjust the gains from the readings, otherwise keep them fixed.
     """
     def __init__(self, board, Dac, ind, R_shunt = 20, Voltage_limits=(-1.5,2.5)):
         """Initialize a channel with specific board, DAC, and index."""
         self.board = board
-        self.dac = Dac
+        self._dac = Dac
         self.ind = ind
         self.id = f"{board.ID}channel_{ind}"
         self.R_shunt = R_shunt
         self.Voltage_limits = Voltage_limits
-        self.dac.gain=1
+        if Dac is not None:
+            Dac.gain=1
         
         # Initialize MPPT tracking variables
         self.last_v = 0.0  # Starting voltage should be at 0 to stay in jsc
@@ -269,70 +421,135 @@ class Channel:
         self.time_last_JV = 0 
 
         # Initialize gain settings
-        self.gain_v = 2
-        self.gain_c = 8
+        self.range_v = AutoRange(2)
+        self.range_c = AutoRange(8)
+        self.autorange = True
+
+        # Latest reading and counters, served by the metrics endpoint without touching the bus
+        self.last_sample = None
+        self.samples = 0
+        self.read_errors = 0
+
+    @property
+    def dac(self):
+        """The DAC channel, taken from the board on first use if none was given."""
+        if self._dac is None:
+            self._dac = self.board.dac_channel(self.ind)
+        return self._dac
+
+    @property
+    def gain_v(self):
+        return self.range_v.gain
 
+    @gain_v.setter
+    def gain_v(self, gain):
+        self.range_v.gain = gain
+
+    @property
+    def gain_c(self):
+        return self.range_c.gain
+
+    @gain_c.setter
+    def gain_c(self, gain):
+        self.range_c.gain = gain
+
+    def dac_code(self, voltage):
+        """Return the 12-bit DAC code of a voltage, limited to Voltage_limits."""
+        voltage_ = min(max(self.Voltage_limits[0], voltage), self.Voltage_limits[1]) + 0.586 # sdac value
+        return int((voltage_/4/2*2**16*2)) >> 4
+
+    @timed('channel.set_voltage')
     def set_voltage(self, voltage):
         """Set the voltage of the DAC to a specific value."""
-        voltage_ = min(max(self.Voltage_limits[0], voltage), self.Voltage_limits[1]) + 0.586 # sdac value
-        self.dac.value = int((voltage_/4/2*2**16*2))
+        self.dac.raw_value = self.dac_code(voltage)
         #self.dac.value = int(20 * 1e3 * voltage / 100 * 1.0)
 
+    @property
+    def settle_time_per_sample(self):
+        """Settle time spent reading one voltage and current sample (seconds)."""
+        return 0.1  # one settling delay in read_sample
+
+    def _read_input(self, positive, negative, autorange):
+        """Read a differential ADC input, returns (voltage, gain used).
+
+        Saturated readings are repeated at a lower gain when auto-ranging.
+        """
+        ads = self.board.Adc
+        while True:
+            gain = autorange.gain
+            ads.gain = gain
+            analog_in = AnalogIn(ads, positive, negative)
+            raw = analog_in.value
+            voltage = analog_in.convert_to_voltage(raw)
+            if not self.autorange:
+                return voltage, gain
+            saturated = AutoRange.saturated(raw)
+            if not (autorange.update(voltage, saturated) and saturated):
+                return voltage, gain
+
+    def _adc_voltage(self):
+        return self._read_input(0, 1, self.range_v)[0]
+
+    def _adc_current(self):
+        return self._read_input(2, 3, self.range_c)[0]/self.R_shunt
+
+    @timed('channel.read_sample')
+    def read_sample(self, settle_time=0.1):
+        """Read voltage and current with a single mux selection and settling delay.
+
+        Args:
+            settle_time (float): Delay between selecting the channel and reading (seconds).
+
+        Returns:
+            Sample: Timestamped voltage (V) and current (A) with the gains used.
+        """
+        try:
+            self.board.aMux_select_channel(self.ind)
+            time.sleep(settle_time)  # Short delay for stabilization
+            timestamp = datetime.now().isoformat()
+            voltage, gain_v = self._read_input(0, 1, self.range_v)
+            shunt_voltage, gain_c = self._read_input(2, 3, self.range_c)
+        except Exception:
+            self.read_errors += 1
+            raise
+        sample = self.last_sample = Sample(timestamp, voltage, shunt_voltage/self.R_shunt, gain_v, gain_c)
+        self.samples += 1
+        return sample
+
+    @timed('channel.read_voltage')
     def read_voltage(self):
         """Read the voltage from the ADC after selecting the appropriate channel."""
         self.board.aMux_select_channel(self.ind)
         time.sleep(0.1)  # Short delay for stabilization
-        ads = self.board.Adc
-        time.sleep(0.1)
-        ads.gain = self.gain_v
-        time.sleep(0.1)
-        V_cell = AnalogIn(ads, 0, 1)
-        time.sleep(0.1)
-        return V_cell.voltage
+        return self._adc_voltage()
 
+    @timed('channel.read_current')
     def read_current(self):
         """Read the current from the ADC after selecting the appropriate channel."""
         self.board.aMux_select_channel(self.ind)
         time.sleep(0.1)  # Short delay for stabilization
-        ads = self.board.Adc
-        time.sleep(0.1)
-        ads.gain = self.gain_c
-        time.sleep(0.1)
-        shnt = AnalogIn(ads, 2, 3)
-        time.sleep(0.1)
-        return shnt.voltage/self.R_shunt
+        return self._adc_current()
 
     def read_voltage_and_current(self):
         """Read both voltage and current from the ADC."""
-        voltage = self.read_voltage()
-        current = self.read_current()
-        return voltage, current
+        sample = self.read_sample()
+        return sample.voltage, sample.current
 
-    def mpp_track(self, DATA,cell = None):
+    @timed('channel.mpp_track')
+    def mpp_track(self, DATA,cell = None, check_JV=True):
         """Track measurements and write them to a CSV file with a maximum dv step.
 
         Args:
-            iterations (int): Number of iterations to run the tracking.
-            interval (float): Time between iterations (in seconds).
+            DATA (Data_Measurement): Iterations, interval and JV settings.
+            cell (Data_Cell): The cell on this channel.
+            check_JV (bool): Run a due JV sweep first. The GUI scheduler sweeps by itself.
         """
         # Only run JV if last JV was long enough ago or doesn't exist yet
-        if (
+        if check_JV and (
             (time.time()- cell.timestamp_last_JV) > DATA.interval_next_JV
         ):
             v_set,v,c = self.JV_Sweep(DATA, cell)
-            cell.timestamp_last_JV = time.time()
-            time.sleep(0.1)
-            #after a JV scan, the cell voltage must be set back to v_mpp
-            self.set_voltage(self.last_v)
-            time.sleep(0.1)
-            # only the first time this jv is run:
-            if not cell.initialized:
-                set_voltage_max_power, voltage_max_power, _ = get_mpp_from_j_v_data(v_set,v,c)
-                voltage_to_set = set_voltage_max_power #voltage vpp - 50mV
-                self.last_v = voltage_to_set
-                self.set_voltage(voltage_to_set)
-                print(f"initialized cell: {cell.id} with a voltage of {voltage_max_power}, set voltage {voltage_to_set}")
-                cell.initialized = True
+            self.finish_JV(cell, v_set, v, c)
 
 
         # Define the file name
@@ -343,16 +560,18 @@ class Channel:
         create_folder_if_not_exists(os.path.join(DATA.local_folder,"TRACKING_DATA"))   
         local_file_path_mpp_data = os.path.join(DATA.local_folder,"TRACKING_DATA",f"CELL{cell_id}_data.csv") 
 
-        # Write the header if the file doesn't exist
-        if not os.path.exists(local_file_path_mpp_data):
-            with open(local_file_path_mpp_data, 'a') as f:
-                f.write('timestamp,measured_voltage,measured_current,dac_value,adc_gain_v,adc_gain_c\n')
+        # Keep the file open across cycles, the header is written if the file doesn't exist
+        default_log_pipeline.open(
+            local_file_path_mpp_data,
+            header='timestamp,measured_voltage,measured_current,dac_value,adc_gain_v,adc_gain_c'
+        )
+        # The sync worker copies new rows to the network drive in the background
+        network_sync.register(local_file_path_mpp_data,
+                              os.path.join(DATA.network_folder, "TRACKING_DATA"))
 
         for _ in range(iterations):
-            timestamp = datetime.now().isoformat()
             try:
-                measured_voltage = self.read_voltage()
-                measured_current = self.read_current()
+                timestamp, measured_voltage, measured_current, gain_v, gain_c = self.read_sample()
             except Exception as e:
                 print(f"Error reading voltage or current: {e}")
                 continue
@@ -362,14 +581,11 @@ class Channel:
             #print(f"{measured_voltage} V,{measured_current*1e3}mA,{curr_p*1e3}mW,{self.dac.raw_value}")
 
             # Write the current data to the CSV file
-            with open(local_file_path_mpp_data, 'a') as f:
-                f.write(f'{timestamp},{measured_voltage},{measured_current},{dac_value},{self.gain_v},{self.gain_c}\n')
+            default_log_pipeline.write_row(local_file_path_mpp_data, (
+                timestamp, measured_voltage, measured_current, dac_value, gain_v, gain_c
+            ))
 
 
-            #write the data to the corresponing directory on the network drive
-            network_folder_path_mpp_data = os.path.join(DATA.network_folder, "TRACKING_DATA")
-            create_folder_if_not_exists(network_folder_path_mpp_data)
-            copy_to_network_drive_gio(local_file_path_mpp_data, network_folder_path_mpp_data)
 
             if self.last_p < curr_p:
                 self.dv = min(self.dv * 1.1, self.max_dv)
@@ -385,73 +601,81 @@ class Channel:
             self.last_p = curr_p
             time.sleep(interval)
 
-    
-    def JV_Sweep(self, DATA, cell):
-        cell_id = cell.id
-        upper_voltage_limit = cell.voltage_limits_JV[1]
-        lower_voltage_limit = cell.voltage_limits_JV[0]
-        max_allowed_current =  cell.max_allowed_current
-        stepsize = DATA.stepsize_JV
-        settle_time = DATA.settletime_JV
-        
-        create_folder_if_not_exists(os.path.join(DATA.local_folder, "JV_DATA"))
-        local_file_path = os.path.join(DATA.local_folder, "JV_DATA", f"CELL{cell_id}_JV_data.csv")
-
-        if not os.path.exists(local_file_path):
-            with open(local_file_path, 'w') as f:
-                f.write('timestamp,set_voltage,measured_voltage,measured_current,dac_value,adc_gain_v,adc_gain_c\n')
 
-        sweep_voltages = np.arange(lower_voltage_limit, upper_voltage_limit + stepsize, stepsize)
-        sweep_voltages = np.concatenate([sweep_voltages, sweep_voltages[::-1]])
-
-        threshold_voltage = 1000#high value
+    def finish_JV(self, cell, v_set, v, c):
+        """Go back to tracking after a JV sweep of this cell."""
+        cell.timestamp_last_JV = time.time()
+        time.sleep(0.1)
+        #after a JV scan, the cell voltage must be set back to v_mpp
+        self.set_voltage(self.last_v)
+        time.sleep(0.1)
+        # only the first time this jv is run:
+        if not cell.initialized:
+            set_voltage_max_power, voltage_max_power, _ = get_mpp_from_j_v_data(v_set,v,c)
+            voltage_to_set = set_voltage_max_power #voltage vpp - 50mV
+            self.last_v = voltage_to_set
+            self.set_voltage(voltage_to_set)
+            print(f"initialized cell: {cell.id} with a voltage of {voltage_max_power}, set voltage {voltage_to_set}")
+            cell.initialized = True
+
+    def JV_log_file(self, DATA, cell):
+        """Open the JV data file of a cell and return its path."""
+        create_folder_if_not_exists(os.path.join(DATA.local_folder, "JV_DATA"))
+        local_file_path = os.path.join(DATA.local_folder, "JV_DATA", f"CELL{cell.id}_JV_data.csv")
 
-        voltages_meas = []
-        curents_meas = []
-        set_voltages = []
+        default_log_pipeline.open(
+            local_file_path,
+            header='timestamp,set_voltage,measured_voltage,measured_current,dac_value,adc_gain_v,adc_gain_c'
+        )
+        return local_file_path
+
+    @staticmethod
+    def JV_plan(DATA, cell):
+        """Set point plan of a JV sweep of a cell, uniform or adaptive (DATA.JV_mode)."""
+        lower_voltage_limit, upper_voltage_limit = cell.voltage_limits_JV
+        if DATA.JV_mode == "adaptive":
+            return AdaptiveSweep(lower_voltage_limit, upper_voltage_limit,
+                                 max_step=DATA.stepsize_JV * ADAPTIVE_SWEEP_MAX_STEP_FACTOR,
+                                 min_step=DATA.stepsize_JV * ADAPTIVE_SWEEP_MIN_STEP_FACTOR,
+                                 max_current=cell.max_allowed_current)
+        return UniformSweep(lower_voltage_limit, upper_voltage_limit, DATA.stepsize_JV,
+                            max_current=cell.max_allowed_current)
 
-        for voltage in sweep_voltages:
+    def JV_Sweep(self, DATA, cell):
+        settle_time = DATA.settletime_JV
 
-            if voltage > threshold_voltage: continue
+        local_file_path = self.JV_log_file(DATA, cell)
+        plan = self.JV_plan(DATA, cell)
 
+        while (voltage := plan.next_voltage()) is not None:
             try:
                 print(voltage)
                 self.set_voltage(voltage)
                 
-                #time.sleep(settle_time)
-                measured_voltage = self.read_voltage()
-                measured_current = self.read_current()
-
-                set_voltages.append(voltage)
-                voltages_meas.append(measured_voltage)
-                curents_meas.append(measured_current)
-
+                # The settling delay after the DAC step is also the mux settling time
+                timestamp, measured_voltage, measured_current, gain_v, gain_c = self.read_sample(settle_time)
             except Exception as e:
                 print(f"Error during JV read: {e}")
+                plan.add(voltage, None, None)
                 continue
 
-            # Sicherheitsabbruch bei zu hohem Strom
-            if abs(measured_current) > max_allowed_current:
-                threshold_voltage = voltage
-                print(f"Abbruch: {measured_current:.3f} A > {max_allowed_current} A bei {voltage:.2f} V")
-                
-            with open(local_file_path, 'a') as f:
-                f.write(f'{datetime.now().isoformat()},{voltage},{measured_voltage},{measured_current},{self.dac.raw_value},{self.gain_v},{self.gain_c}\n')
+            # Stops the way up above max_allowed_current (Sicherheitsabbruch)
+            plan.add(voltage, measured_voltage, measured_current)
+
+            default_log_pipeline.write_row(local_file_path, (
+                timestamp, voltage, measured_voltage, measured_current,
+                self.dac.raw_value, gain_v, gain_c
+            ))
+        print(f"JV cell {cell.id}: {plan.report()}")
 
         # Netzwerk-Export
-        network_folder = os.path.join(DATA.network_folder, "JV_DATA")
-        create_folder_if_not_exists(network_folder)
-        copy_to_network_drive_gio(local_file_path, network_folder)
+        network_sync.register(local_file_path, os.path.join(DATA.network_folder, "JV_DATA"))
 
-        return np.array(set_voltages), np.array(voltages_meas), np.array(curents_meas)
+        return plan.arrays()
 
 def initialize_boards(Data_Measurement):
 
-    # I2C-Adresse des TCA9548A (Standard: 0x70)
-    TCA9548A_ADDR = 0x70
-
-    # I2C-Bus initialisieren (für Raspberry Pi: Bus 1 verwenden)
-    bus = smbus2.SMBus(1)
+    network_sync.period = Data_Measurement.network_sync_period
 
     involved_TCA_Channels = []
     for chuck in Data_Measurement.string_chucks:
@@ -467,24 +691,20 @@ def initialize_boards(Data_Measurement):
     for channel in involved_TCA_Channels:
         print(f"================ Channel {channel}")
         select_channel(channel)
-        Data_Measurement.oboard_managers[channel] = OBoardManager(i2c_num=1)
+        # Known boards are checked with a few probes, a full scan only if they changed
+        Data_Measurement.oboard_managers[channel] = OBoardManager(
+            i2c_num=1, topology_file=TOPOLOGY_FILE, tca_channel=channel)
 
     
     # Alle Kanäle deaktivieren (optional)
-    bus.write_byte(TCA9548A_ADDR, 0x00)
+    get_tca_switch().disable()
+    Data_Measurement.invalidate_plan()  # new channel handles
     print("Scan complete.")
 
 def select_channel(channel):
-    # I2C-Adresse des TCA9548A (Standard: 0x70)
-    TCA9548A_ADDR = 0x70
-    bus = smbus2.SMBus(1)
     """Wählt den angegebenen TCA9548A-Kanal aus (0–7)."""
-    if 0 <= channel <= 7:
-        bus.write_byte(TCA9548A_ADDR, 1 << channel)
-        time.sleep(0.1)  # Kleine Verzögerung
-    else:
-        raise ValueError("Kanal muss zwischen 0 und 7 sein")
-    
+    get_tca_switch().select(channel)
+
 def Blink(substrate,Data_Measurement):
     for cell in substrate.cells:
                 
@@ -1,5 +1,7 @@
 from PyQt5.QtCore import QThread, pyqtSignal
 import time
+from software.logger import default_log_pipeline
+from old_drivers import network_sync
 
 class MeasurementControlThread(QThread):
     status_update = pyqtSignal(str)  # optional: Textnachrichten an GUI
@@ -24,8 +26,17 @@ class MeasurementControlThread(QThread):
             except Exception as e:
                 self.status_update.emit(f"Error during tracking: {e}")
                 break
+        # Write all queued rows and close the data files before reporting the stop
+        default_log_pipeline.stop()
+        # Copy what was written since the last sync to the network drive
+        network_sync.stop()
+        stats = default_log_pipeline.stats()
+        if stats['dropped']:
+            self.status_update.emit(f"Logging dropped {stats['dropped']} rows (queue full).")
         self.status_update.emit("Measurement stopped.")
         self.finished.emit()
 
     def stop(self):
         self.running = False
+        # Drain rows queued so far, the rest is drained when run() returns
+        default_log_pipeline.flush()
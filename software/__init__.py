@@ -1,3 +1,20 @@
-from .hardware import OBoardManager, OBoard, Channel, Softdac
+import importlib
+
+# Imported from .hardware on first access (PEP 562), so that offline tools
+# such as the log converter do not load the hardware drivers
+_LAZY_NAMES = ('OBoardManager', 'OBoard', 'Channel', 'Softdac')
 
 __version__ = "0.1.0"
+__all__ = list(_LAZY_NAMES)
+
+
+def __getattr__(name):
+    if name not in _LAZY_NAMES:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module('.hardware', __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
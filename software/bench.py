@@ -0,0 +1,478 @@
+"""Benchmark suite for the tracking hot path.
+
+Runs the tracking code unchanged on the simulated hardware backend with the
+realtime bus and ADC model enabled, so that settle sleeps, ADC conversion time
+and I2C transfer time all count as they do on the lab rig. Results are written
+as JSON and compared against a stored baseline.
+
+Usage:
+    python -m software.bench                       # run and compare to baseline
+    python -m software.bench --output results.json
+    python -m software.bench --update-baseline     # store current numbers
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+from .hardware.sim import SimulatedRig
+from .hardware import OBoardManager, TCA9548A
+from .logger import DataLogger, LogPipeline, WriterPool
+from .mppt import ArrayTracker, MPPTEngine
+from .workers import Coordinator
+from .metrics import MetricsRegistry
+from .hardware.constants import (
+    BINLOG_EXTENSION,
+    CHANNEL_DEFAULT_HEADER,
+    CHANNELS_PER_BOARD,
+    TCA9548A_CHANNELS,
+)
+
+BENCH_DEFAULT_BASELINE = os.path.join(os.path.dirname(__file__), "bench_baseline.json")
+BENCH_DEFAULT_TOLERANCE = 0.2      # Allowed relative regression before failing
+BENCH_MPP_ITERATIONS = 20          # Samples taken by the per-channel tracking benchmark
+BENCH_CYCLE_ITERATIONS = 2         # Iterations per channel in the cycle benchmark
+BENCH_IV_POINTS = 10               # Points per IV sweep
+BENCH_LOG_ROWS = 5000              # Rows written by the logger benchmark
+BENCH_LOG_CHANNELS = 100           # Channels the logger rows are spread over
+BENCH_MUX_CYCLES = 10             # Passes over all 8 channels in the mux benchmark
+BENCH_TCA_CELLS = 100              # Cells per tracking cycle in the TCA switch benchmark
+BENCH_ARRAY_CYCLES = 3             # Tracking cycles over one board in the array tracker benchmark
+BENCH_ENGINE_CHANNELS = 1000       # Channels stepped by the MPPT engine benchmark
+BENCH_ENGINE_STEPS = 200           # Engine steps timed
+BENCH_WORKER_BUSES = 4             # Buses run in parallel by the bus worker benchmark
+BENCH_WORKER_DURATION = 2.0        # Run time of each bus worker configuration (seconds)
+BENCH_STARTUP_BOARDS = 4           # Boards on the bus in the start-up benchmark
+BENCH_IMPORT_RUNS = 3              # Fresh interpreters per import, the fastest one counts
+BENCH_METRICS_CALLS = 100000       # Calls of an instrumented no-op in the metrics overhead benchmark
+BENCH_GUI_FOLDER = os.path.join(os.path.dirname(__file__), "..", "examples", "GUI_Marburg")
+
+
+def _metric(value, unit, higher_is_better):
+    return {"value": value, "unit": unit, "higher_is_better": higher_is_better}
+
+
+def bench_mpp_track(iterations=BENCH_MPP_ITERATIONS):
+    """Measure tracking samples per second and I2C transactions per sample on one channel."""
+    rig = SimulatedRig.with_boards(i2c_nums=[1], offsets=[0], realtime=True).install()
+    try:
+        manager = OBoardManager(i2c_num=1)
+        channel = manager.oboards[0].channel[0]
+        bus = rig.get_bus(1)
+        transactions = bus.transactions
+        start = time.perf_counter()
+        channel.mpp_track(iterations=iterations, interval=0)
+        elapsed = time.perf_counter() - start
+        transactions = bus.transactions - transactions
+    finally:
+        rig.uninstall()
+    return {
+        "mpp_track.samples_per_s": _metric(iterations / elapsed, "1/s", True),
+        "mpp_track.i2c_transactions_per_sample": _metric(transactions / iterations, "1", False),
+    }
+
+
+def bench_cycle_all_channels(iterations=BENCH_CYCLE_ITERATIONS):
+    """Measure the time of one full OBoardManager.cycle_all_channels pass over one board."""
+    rig = SimulatedRig.with_boards(i2c_nums=[1], offsets=[0], realtime=True).install()
+    try:
+        manager = OBoardManager(i2c_num=1)
+        start = time.perf_counter()
+        manager.cycle_all_channels(iterations_per_channel=iterations, interval=0)
+        elapsed = time.perf_counter() - start
+    finally:
+        rig.uninstall()
+    return {"cycle_all_channels.cycle_time": _metric(elapsed, "s", False)}
+
+
+def bench_array_tracker(cycles=BENCH_ARRAY_CYCLES, channels=BENCH_ENGINE_CHANNELS,
+                        steps=BENCH_ENGINE_STEPS):
+    """Measure ArrayTracker samples per second on one board and the MPPT engine step time."""
+    rig = SimulatedRig.with_boards(i2c_nums=[1], offsets=[0], realtime=True).install()
+    try:
+        manager = OBoardManager(i2c_num=1)
+        tracker = ArrayTracker(manager.channels())
+        start = time.perf_counter()
+        for _ in range(cycles):
+            tracker.cycle()
+        elapsed = time.perf_counter() - start
+        manager.oboards[0].channel[0].writers.flush()
+    finally:
+        rig.uninstall()
+
+    engine = MPPTEngine(channels)
+    voltage = [0.5] * channels
+    current = [1e-3] * channels
+    start = time.perf_counter()
+    for _ in range(steps):
+        engine.step(voltage, current)
+    step_time = (time.perf_counter() - start) / steps
+    return {
+        "array_tracker.samples_per_s": _metric(cycles * len(tracker.channels) / elapsed, "1/s", True),
+        "mppt_engine.step_time_per_channel": _metric(step_time / channels, "s", False),
+    }
+
+
+def bench_bus_workers(buses=BENCH_WORKER_BUSES, duration=BENCH_WORKER_DURATION):
+    """Measure per-bus samples per second of the bus workers with one and with several buses."""
+    rates = {}
+    for i2c_nums in ([1], list(range(1, buses + 1))):
+        rig = SimulatedRig.with_boards(i2c_nums=i2c_nums, offsets=[0], realtime=True).install()
+        try:
+            with contextlib.redirect_stdout(io.StringIO()):
+                managers = [OBoardManager(i2c_num=i2c_num) for i2c_num in i2c_nums]
+                coordinator = Coordinator(managers, status_interval=None, writers=LogPipeline(),
+                                          iv_sweep=False, array_tracker=True)
+                coordinator.run(duration=duration)
+        finally:
+            rig.uninstall()
+        stats = coordinator.stats().values()
+        rates[len(i2c_nums)] = sum(stat['samples_per_s'] for stat in stats) / len(stats)
+    return {
+        "bus_workers.samples_per_s_per_bus": _metric(rates[buses], "1/s", True),
+        "bus_workers.per_bus_scaling": _metric(rates[buses] / rates[1], "1", True),
+    }
+
+
+def bench_startup(boards=BENCH_STARTUP_BOARDS):
+    """Measure OBoardManager start-up with a full bus scan and with a cached topology."""
+    rig = SimulatedRig.with_boards(i2c_nums=[1], offsets=range(boards), realtime=True).install()
+    topology_file = os.path.abspath("bench_topology.json")
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            OBoardManager(i2c_num=1, topology_file=topology_file).set_all_voltages(0)
+            scan_elapsed = time.perf_counter() - start
+            start = time.perf_counter()
+            OBoardManager(i2c_num=1, topology_file=topology_file).set_all_voltages(0)
+            cached_elapsed = time.perf_counter() - start
+    finally:
+        rig.uninstall()
+        os.remove(topology_file)
+    return {
+        "startup.scan_time": _metric(scan_elapsed, "s", False),
+        "startup.cached_time": _metric(cached_elapsed, "s", False),
+    }
+
+
+def bench_import_time(runs=BENCH_IMPORT_RUNS):
+    """Measure the import time of the CLI, the log tools and the hardware drivers in a fresh interpreter."""
+    imports = {
+        "import.cli_time": "import software.cli",
+        "import.binlog_time": "import software.binlog",
+        "import.hardware_time": "from software.hardware import OBoardManager",
+    }
+    code = ("import sys, time; start = time.perf_counter(); exec(sys.argv[1]); "
+            "print(time.perf_counter() - start)")
+    env = dict(os.environ, PYTHONPATH=os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+    metrics = {}
+    for name, statement in imports.items():
+        elapsed = min(
+            float(subprocess.run([sys.executable, "-c", code, statement], env=env, check=True,
+                                 capture_output=True, text=True).stdout)
+            for _ in range(runs)
+        )
+        metrics[name] = _metric(elapsed, "s", False)
+    return metrics
+
+
+def bench_metrics_overhead(calls=BENCH_METRICS_CALLS):
+    """Measure the time a metrics wrapper adds per call, with recording disabled and enabled."""
+    registry = MetricsRegistry()
+
+    def noop():
+        pass
+
+    def per_call(func):
+        start = time.perf_counter()
+        for _ in range(calls):
+            func()
+        return (time.perf_counter() - start) / calls
+
+    instrumented = registry.timed("noop")(noop)
+    plain = per_call(noop)
+    disabled = per_call(instrumented) - plain
+    registry.enabled = True
+    enabled = per_call(instrumented) - plain
+    return {
+        "metrics.disabled_overhead": _metric(max(disabled, 0.0), "s", False),
+        "metrics.enabled_overhead": _metric(max(enabled, 0.0), "s", False),
+    }
+
+
+def bench_iv_sweep(points=BENCH_IV_POINTS):
+    """Measure the time of Channel.perform_iv_sweep and of the board-wide OBoard.perform_iv_sweep."""
+    rig = SimulatedRig.with_boards(i2c_nums=[1], offsets=[0], realtime=True).install()
+    try:
+        manager = OBoardManager(i2c_num=1)
+        board = manager.oboards[0]
+        start = time.perf_counter()
+        board.channel[0].perform_iv_sweep(start_value=0, end_value=points - 1, step_size=1)
+        elapsed = time.perf_counter() - start
+        start = time.perf_counter()
+        board.perform_iv_sweep(start_value=0, end_value=points - 1, step_size=1)
+        board_elapsed = time.perf_counter() - start
+    finally:
+        rig.uninstall()
+    return {
+        "perform_iv_sweep.time": _metric(elapsed, "s", False),
+        "perform_iv_sweep.time_per_point": _metric(elapsed / points, "s", False),
+        "board_iv_sweep.time_per_channel_point": _metric(
+            board_elapsed / (points * len(board.channel)), "s", False),
+    }
+
+
+def bench_gui_jv_sweep(gui_folder=BENCH_GUI_FOLDER):
+    """Measure the time of the GUI driver old_drivers.Channel.JV_Sweep.
+
+    Skipped (returns no metrics) if the GUI dependencies are not installed.
+    """
+    # old_drivers installs its simulated rig on import when OCTOBOARD_SIMULATOR is set
+    simulator = os.environ.get("OCTOBOARD_SIMULATOR")
+    os.environ["OCTOBOARD_SIMULATOR"] = "1"
+    sys.path.insert(0, os.path.abspath(gui_folder))
+    try:
+        import old_drivers
+    except ImportError as e:
+        print(f"Skipping GUI JV sweep benchmark: {e}")
+        return {}
+    finally:
+        sys.path.pop(0)
+        if simulator is None:
+            del os.environ["OCTOBOARD_SIMULATOR"]
+        else:
+            os.environ["OCTOBOARD_SIMULATOR"] = simulator
+
+    local_folder = tempfile.mkdtemp()
+    data = argparse.Namespace(
+        local_folder=local_folder,
+        network_folder=os.path.join(local_folder, "network"),
+        stepsize_JV=0.1,
+        settletime_JV=0.1,
+        JV_mode="uniform",
+    )
+    cell = argparse.Namespace(id="bench", voltage_limits_JV=[0.0, 0.2], max_allowed_current=0.05)
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            old_drivers.select_channel(0)
+            board = old_drivers.OBoard(i2c_num=1, i2c_address_offset=0)
+            start = time.perf_counter()
+            v_set, _, _ = board.channel[0].JV_Sweep(data, cell)
+            elapsed = time.perf_counter() - start
+    finally:
+        old_drivers.network_sync.stop(final_sync=False)
+        old_drivers.default_log_pipeline.stop()
+        old_drivers.SIMULATOR.uninstall()
+        # Drop the module so the next run imports it again with a new rig
+        sys.modules.pop("old_drivers", None)
+        shutil.rmtree(local_folder)
+    return {
+        "gui_jv_sweep.time": _metric(elapsed, "s", False),
+        "gui_jv_sweep.time_per_point": _metric(elapsed / len(v_set), "s", False),
+    }
+
+
+def bench_log_mpp_data(rows=BENCH_LOG_ROWS, channels=BENCH_LOG_CHANNELS):
+    """Measure DataLogger.log_mpp_data throughput and the call latency seen by acquisition."""
+    base_path = tempfile.mkdtemp()
+    pipeline = LogPipeline(WriterPool())
+    try:
+        logger = DataLogger(base_path=base_path, writers=pipeline)
+        timestamp = datetime.now().isoformat()
+        call_times = []
+        start = time.perf_counter()
+        for row in range(rows):
+            call_start = time.perf_counter()
+            logger.log_mpp_data(f"channel_{row % channels}", timestamp, 0.612345, 0.004321,
+                                1234, 2, 16)
+            call_times.append(time.perf_counter() - call_start)
+        logger.flush()
+        elapsed = time.perf_counter() - start
+    finally:
+        pipeline.stop()
+        shutil.rmtree(base_path)
+    return {
+        "log_mpp_data.rows_per_s": _metric(rows / elapsed, "1/s", True),
+        "log_mpp_data.p99_call_time": _metric(sorted(call_times)[int(0.99 * rows)], "s", False),
+    }
+
+
+def bench_log_binary(rows=BENCH_LOG_ROWS, channels=BENCH_LOG_CHANNELS):
+    """Measure binary log write throughput and size per row, compared to CSV."""
+    base_path = tempfile.mkdtemp()
+    try:
+        timestamp = datetime.now()
+        metrics = {}
+        for name, extension, header in (("binary", BINLOG_EXTENSION, "channel"),
+                                        ("csv", ".csv", CHANNEL_DEFAULT_HEADER)):
+            pool = WriterPool()
+            start = time.perf_counter()
+            for row in range(rows):
+                file_name = os.path.join(base_path, f"channel_{row % channels}{extension}")
+                pool.write_row(file_name, (timestamp if name == "binary" else timestamp.isoformat(),
+                                           0.612345, 0.004321, 1234, 2, 16), header=header)
+            pool.close()
+            elapsed = time.perf_counter() - start
+            size = sum(os.path.getsize(os.path.join(base_path, f)) for f in os.listdir(base_path)
+                       if f.endswith(extension))
+            metrics[name] = (rows / elapsed, size / rows)
+    finally:
+        shutil.rmtree(base_path)
+    return {
+        "log_binary.rows_per_s": _metric(metrics["binary"][0], "1/s", True),
+        "log_binary.bytes_per_row": _metric(metrics["binary"][1], "B", False),
+        "log_csv.bytes_per_row": _metric(metrics["csv"][1], "B", False),
+    }
+
+
+def bench_mux_select(cycles=BENCH_MUX_CYCLES):
+    """Measure I2C transactions per analog mux selection, changed or repeated."""
+    rig = SimulatedRig.with_boards(i2c_nums=[1], offsets=[0], realtime=False).install()
+    try:
+        manager = OBoardManager(i2c_num=1)
+        board = manager.oboards[0]
+        bus = rig.get_bus(1)
+        with contextlib.ExitStack() as stack:
+            stack.callback(setattr, time, "sleep", time.sleep)
+            time.sleep = lambda seconds: None
+            transactions = bus.transactions
+            for _ in range(cycles):
+                for channel in range(CHANNELS_PER_BOARD):
+                    board.aMux_select_channel(channel)
+            changed = (bus.transactions - transactions) / (cycles * CHANNELS_PER_BOARD)
+            transactions = bus.transactions
+            for _ in range(cycles):
+                board.aMux_select_channel(0)
+            repeated = (bus.transactions - transactions) / cycles
+    finally:
+        rig.uninstall()
+    return {
+        "mux_select.i2c_transactions": _metric(changed, "1", False),
+        "mux_select.repeated_i2c_transactions": _metric(repeated, "1", False),
+    }
+
+
+def bench_tca_select(cells=BENCH_TCA_CELLS):
+    """Measure the TCA9548A selection time for one tracking cycle over a GUI chuck."""
+    rig = SimulatedRig(realtime=True)
+    rig.add_bus(1).add_tca9548a()
+    tca = TCA9548A(rig.get_bus(1))
+    cell_channels = [cell * TCA9548A_CHANNELS // cells for cell in range(cells)]
+    start = time.perf_counter()
+    for channel in cell_channels:
+        tca.select(channel)
+    elapsed = time.perf_counter() - start
+    return {"tca_select.cycle_time": _metric(elapsed, "s", False)}
+
+
+BENCHMARKS = [
+    bench_mpp_track,
+    bench_cycle_all_channels,
+    bench_array_tracker,
+    bench_bus_workers,
+    bench_startup,
+    bench_import_time,
+    bench_metrics_overhead,
+    bench_iv_sweep,
+    bench_gui_jv_sweep,
+    bench_log_mpp_data,
+    bench_log_binary,
+    bench_mux_select,
+    bench_tca_select,
+]
+
+
+def run_benchmarks(benchmarks=BENCHMARKS):
+    """Run the benchmarks in an empty working directory and collect their metrics."""
+    metrics = {}
+    cwd = os.getcwd()
+    work_dir = tempfile.mkdtemp()
+    os.chdir(work_dir)
+    try:
+        for benchmark in benchmarks:
+            print(f"Running {benchmark.__name__} ...")
+            with contextlib.redirect_stdout(io.StringIO()):
+                metrics.update(benchmark())
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(work_dir)
+    return metrics
+
+
+def compare_to_baseline(metrics, baseline, tolerance=BENCH_DEFAULT_TOLERANCE):
+    """Return a list of regression messages for metrics worse than the baseline.
+
+    Args:
+        metrics (dict): Metrics of the current run.
+        baseline (dict): Stored metrics to compare against.
+        tolerance (float): Allowed relative deterioration.
+    """
+    regressions = []
+    for name, reference in baseline.items():
+        if name not in metrics:
+            continue
+        value = metrics[name]["value"]
+        ref = reference["value"]
+        if reference["higher_is_better"]:
+            regressed = value < ref * (1 - tolerance)
+        else:
+            regressed = value > ref * (1 + tolerance)
+        if regressed:
+            regressions.append(f"{name}: {value:.6g} {reference['unit']} "
+                               f"(baseline {ref:.6g}, tolerance {tolerance:.0%})")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the MPP tracking hot path")
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    parser.add_argument("--baseline", default=BENCH_DEFAULT_BASELINE,
+                        help="Baseline JSON file to compare against")
+    parser.add_argument("--tolerance", type=float, default=BENCH_DEFAULT_TOLERANCE,
+                        help="Allowed relative regression (default 0.2)")
+    parser.add_argument("--update-baseline", action="store_true",
+                        help="Store the results as the new baseline")
+    args = parser.parse_args(argv)
+
+    metrics = run_benchmarks()
+    results = {
+        "timestamp": datetime.now().isoformat(),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "metrics": metrics,
+    }
+    for name, metric in metrics.items():
+        print(f"{name:45s} {metric['value']:12.6g} {metric['unit']}")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+
+    if args.update_baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump(metrics, f, indent=2)
+        print(f"Baseline written to {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f"No baseline found at {args.baseline}")
+        return 0
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    regressions = compare_to_baseline(metrics, baseline, args.tolerance)
+    for message in regressions:
+        print(f"REGRESSION {message}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
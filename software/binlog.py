@@ -0,0 +1,275 @@
+"""Compact binary log format for tracking data.
+
+A binary log is a 16 byte file header followed by fixed-width little-endian
+records, so it can be appended to without rewriting and read zero-copy with
+:func:`numpy.memmap`. Each record holds:
+
+    timestamp         int64    nanoseconds since 1970-01-01, wall-clock time
+    channel           uint8    channel index on the board ('board' layout only)
+    measured_voltage  float32  V
+    measured_current  float32  A
+    dac_value         uint16   raw DAC code
+    adc_gain_v        uint8    index into BINLOG_GAINS
+    adc_gain_c        uint8    index into BINLOG_GAINS
+
+Timestamps are stored as naive wall-clock time, the same as the ISO strings in
+the CSV files. A record is 20 bytes (21 with the channel column) instead of
+the 50-90 bytes of a CSV row.
+
+Example:
+    >>> data = read_binary_log("data/0channel_0_data.obl")
+    >>> data["measured_voltage"].mean()
+    >>> convert_binary_log("data/0channel_0_data.obl", "channel_0.parquet")
+
+Usage:
+    python -m software.binlog data/0channel_0_data.obl channel_0.csv
+"""
+
+import argparse
+import os
+import struct
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from .hardware.constants import (
+    BINLOG_GAINS,
+    LOG_FLUSH_ROWS,
+    LOG_FLUSH_INTERVAL,
+)
+from .metrics import timed
+
+BINLOG_MAGIC = b'OBLOG\x00'
+BINLOG_VERSION = 1
+BINLOG_HEADER = struct.Struct('<6sBBH6x')  # magic, version, layout, record size
+BINLOG_LAYOUTS = ('channel', 'board')
+
+CHANNEL_RECORD = np.dtype([
+    ('timestamp', '<i8'),
+    ('measured_voltage', '<f4'),
+    ('measured_current', '<f4'),
+    ('dac_value', '<u2'),
+    ('adc_gain_v', 'u1'),
+    ('adc_gain_c', 'u1'),
+])
+
+BOARD_RECORD = np.dtype([
+    ('timestamp', '<i8'),
+    ('channel', 'u1'),
+    ('measured_voltage', '<f4'),
+    ('measured_current', '<f4'),
+    ('dac_value', '<u2'),
+    ('adc_gain_v', 'u1'),
+    ('adc_gain_c', 'u1'),
+])
+
+RECORD_DTYPES = {'channel': CHANNEL_RECORD, 'board': BOARD_RECORD}
+
+_EPOCH = datetime(1970, 1, 1)
+_GAIN_CODES = {gain: code for code, gain in enumerate(BINLOG_GAINS)}
+
+
+def timestamp_to_ns(timestamp):
+    """Convert a timestamp to integer nanoseconds of wall-clock time.
+
+    Args:
+        timestamp: ISO string, datetime or integer nanoseconds.
+    """
+    if isinstance(timestamp, (int, np.integer)):
+        return int(timestamp)
+    if isinstance(timestamp, str):
+        timestamp = datetime.fromisoformat(timestamp)
+    if timestamp.tzinfo is not None:
+        timestamp = timestamp.astimezone().replace(tzinfo=None)
+    return (timestamp - _EPOCH) // timedelta(microseconds=1) * 1000
+
+
+def gain_to_code(gain):
+    """Return the uint8 code of an ADS1115 gain."""
+    try:
+        return _GAIN_CODES[gain]
+    except KeyError:
+        raise ValueError(f"Gain {gain} is not one of {BINLOG_GAINS}") from None
+
+
+def read_header(file_name):
+    """Return the record layout of a binary log, checking its header."""
+    with open(file_name, 'rb') as f:
+        raw = f.read(BINLOG_HEADER.size)
+    if len(raw) < BINLOG_HEADER.size:
+        raise ValueError(f"{file_name} is too short for a binary log header")
+    magic, version, layout, record_size = BINLOG_HEADER.unpack(raw)
+    if magic != BINLOG_MAGIC or version != BINLOG_VERSION or layout >= len(BINLOG_LAYOUTS):
+        raise ValueError(f"{file_name} is not a version {BINLOG_VERSION} binary log")
+    layout = BINLOG_LAYOUTS[layout]
+    if record_size != RECORD_DTYPES[layout].itemsize:
+        raise ValueError(f"{file_name} has an unexpected record size {record_size}")
+    return layout
+
+
+class BinaryLogWriter:
+    """Appends fixed-width records to a binary log and buffers them in memory.
+
+    Has the same interface as :class:`software.logger.BufferedWriter`, so a
+    :class:`software.logger.WriterPool` opens one for file names ending in
+    ``BINLOG_EXTENSION``. Rows are the CSV row fields
+    ``(timestamp, voltage, current, dac_value, gain_v, gain_c)``, with the
+    channel index in front for the 'board' layout.
+
+    If the file ends in a partial record (e.g. after a power loss) the partial
+    record is cut off before appending, so records stay aligned.
+
+    Args:
+        file_name (str): Path of the binary log.
+        header (str, optional): Record layout, 'channel' (default) or 'board'.
+        mode (str): 'a' to append to an existing file, 'w' to truncate it.
+        max_rows (int): Number of buffered rows that triggers a flush.
+        max_age (float): Age in seconds of the oldest buffered row that triggers a flush.
+    """
+
+    def __init__(self, file_name, header=None, mode='a', max_rows=LOG_FLUSH_ROWS,
+                 max_age=LOG_FLUSH_INTERVAL):
+        self.file_name = file_name
+        self.max_rows = max_rows
+        self.max_age = max_age
+        layout = header or BINLOG_LAYOUTS[0]
+        if layout not in BINLOG_LAYOUTS:
+            raise ValueError(f"Unknown binary log layout {layout}")
+
+        existing = mode == 'a' and os.path.exists(file_name) and os.path.getsize(file_name) > 0
+        if existing:
+            existing_layout = read_header(file_name)
+            if existing_layout != layout:
+                raise ValueError(f"{file_name} uses the '{existing_layout}' layout, not '{layout}'")
+        self.layout = layout
+        self.dtype = RECORD_DTYPES[layout]
+
+        if existing:
+            self._file = open(file_name, 'r+b')
+            size = os.path.getsize(file_name)
+            records = (size - BINLOG_HEADER.size) // self.dtype.itemsize
+            self._file.truncate(BINLOG_HEADER.size + records * self.dtype.itemsize)
+            self._file.seek(0, os.SEEK_END)
+        else:
+            self._file = open(file_name, 'wb')
+            self._file.write(BINLOG_HEADER.pack(BINLOG_MAGIC, BINLOG_VERSION,
+                                                BINLOG_LAYOUTS.index(layout),
+                                                self.dtype.itemsize))
+            self._file.flush()
+
+        self._rows = []
+        self._first_row_time = None
+
+    @property
+    def pending(self):
+        """Number of rows not yet written to disk."""
+        return len(self._rows)
+
+    @property
+    def closed(self):
+        """True once the writer has been closed."""
+        return self._file.closed
+
+    def write_row(self, fields):
+        """Buffer one row and flush if the size or age limit is reached."""
+        if self.layout == 'board':
+            channel, *fields = fields
+        timestamp, voltage, current, dac_value, gain_v, gain_c = fields
+        record = (timestamp_to_ns(timestamp), voltage, current, dac_value,
+                  gain_to_code(gain_v), gain_to_code(gain_c))
+        if self.layout == 'board':
+            record = record[:1] + (channel,) + record[1:]
+        if not self._rows:
+            self._first_row_time = time.monotonic()
+        self._rows.append(record)
+        if len(self._rows) >= self.max_rows or self.is_stale():
+            self.flush()
+
+    def is_stale(self):
+        """True if buffered rows are older than ``max_age``."""
+        return bool(self._rows) and time.monotonic() - self._first_row_time >= self.max_age
+
+    @timed('log.flush')
+    def flush(self):
+        """Write buffered rows to the file."""
+        if self._rows:
+            self._file.write(np.array(self._rows, dtype=self.dtype).tobytes())
+            self._rows.clear()
+        self._file.flush()
+
+    def close(self):
+        """Flush and close the file."""
+        if not self._file.closed:
+            self.flush()
+            self._file.close()
+
+
+def read_binary_log(file_name):
+    """Map a binary log into memory without copying it.
+
+    A partial record at the end of the file is ignored.
+
+    Returns:
+        numpy.ndarray: Read-only structured array with one element per record.
+    """
+    dtype = RECORD_DTYPES[read_header(file_name)]
+    records = (os.path.getsize(file_name) - BINLOG_HEADER.size) // dtype.itemsize
+    if records == 0:
+        return np.zeros(0, dtype=dtype)
+    return np.memmap(file_name, dtype=dtype, mode='r', offset=BINLOG_HEADER.size,
+                     shape=(records,))
+
+
+def load_binary_log(file_name):
+    """Load a binary log into a pandas DataFrame with the CSV column names.
+
+    Timestamps become ``datetime64[ns]`` and gain codes are mapped back to gains.
+    """
+    import pandas as pd
+
+    data = read_binary_log(file_name)
+    gains = np.array(BINLOG_GAINS)
+    frame = pd.DataFrame({'timestamp': pd.to_datetime(data['timestamp'], unit='ns')})
+    if 'channel' in data.dtype.names:
+        frame['channel'] = data['channel']
+    frame['measured_voltage'] = data['measured_voltage']
+    frame['measured_current'] = data['measured_current']
+    frame['dac_value'] = data['dac_value']
+    frame['adc_gain_v'] = gains[data['adc_gain_v']]
+    frame['adc_gain_c'] = gains[data['adc_gain_c']]
+    return frame
+
+
+def convert_binary_log(file_name, output, fmt=None):
+    """Convert a binary log to CSV or Parquet.
+
+    Args:
+        file_name (str): Binary log to convert.
+        output (str): Output file.
+        fmt (str, optional): 'csv' or 'parquet'. Taken from the output extension if not given.
+    """
+    if fmt is None:
+        fmt = os.path.splitext(output)[1].lstrip('.').lower()
+    frame = load_binary_log(file_name)
+    if fmt == 'csv':
+        frame['timestamp'] = frame['timestamp'].dt.strftime('%Y-%m-%dT%H:%M:%S.%f')
+        frame.to_csv(output, index=False)
+    elif fmt == 'parquet':
+        frame.to_parquet(output, index=False)
+    else:
+        raise ValueError(f"Unknown output format {fmt}, use 'csv' or 'parquet'")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Convert binary Octoboard logs to CSV or Parquet")
+    parser.add_argument("input", help="Binary log file")
+    parser.add_argument("output", help="Output file (.csv or .parquet)")
+    parser.add_argument("--format", choices=["csv", "parquet"],
+                        help="Output format (default: from the output extension)")
+    args = parser.parse_args(argv)
+    convert_binary_log(args.input, args.output, args.format)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,38 +1,145 @@
 import argparse
-from . import OBoardManager
+from .hardware.constants import (
+    LOG_FORMAT, BINLOG_LAYOUT, ADC_DATA_RATE, SETTLE_CALIBRATION_FILE, CHANNEL_INITIAL_VOLTAGE,
+    TOPOLOGY_FILE, METRICS_REPORT_INTERVAL, METRICS_HOST, METRICS_PORT,
+)
+from . import metrics
+import os
 import time
 
 def main():
     parser = argparse.ArgumentParser(description="Run MPP Tracking on Octoboards")
     parser.add_argument("i2c_nums", type=int, nargs='+', help="List of I2C bus numbers")
+    parser.add_argument("--simulate", action="store_true",
+                        help="Run on simulated Octoboards instead of /dev/i2c-*")
+    parser.add_argument("--log-format", choices=["csv", "binary"], default=LOG_FORMAT,
+                        help="Format of the tracking data files")
+    parser.add_argument("--log-layout", choices=["channel", "board"], default=BINLOG_LAYOUT,
+                        help="Write binary logs per channel or per board")
+    parser.add_argument("--adc-data-rate", type=int, default=ADC_DATA_RATE,
+                        choices=[8, 16, 32, 64, 128, 250, 475, 860],
+                        help="ADS1115 samples per second, lower rates are less noisy")
+    parser.add_argument("--array-tracker", action="store_true",
+                        help="Step all channels once per cycle with the vectorised MPPT engine")
+    parser.add_argument("--parallel", action="store_true",
+                        help="Run every I2C bus in its own worker thread")
+    parser.add_argument("--fixed-gain", action="store_true",
+                        help="Keep the ADC gains fixed instead of auto-ranging per channel")
+    parser.add_argument("--settle-calibration", default=SETTLE_CALIBRATION_FILE,
+                        help="File with per-channel settle times, used if it exists")
+    parser.add_argument("--calibrate-settle", action="store_true",
+                        help="Measure the settle time of every channel and store it before tracking")
+    parser.add_argument("--topology", default=TOPOLOGY_FILE,
+                        help="File with the boards found per bus, checked with a few probes "
+                             "instead of a full scan at start-up")
+    parser.add_argument("--metrics", action="store_true",
+                        help="Record bus operation and cycle timings and print a summary "
+                             f"every {METRICS_REPORT_INTERVAL:g} s")
+    parser.add_argument("--metrics-port", type=int, nargs='?', const=METRICS_PORT,
+                        help=f"Serve Prometheus metrics on {METRICS_HOST} at this port "
+                             f"(default {METRICS_PORT}), implies recording the timings")
     args = parser.parse_args()
+
+    if args.metrics or args.metrics_port is not None:
+        metrics.enable()
+
+    # The drivers and numpy are only loaded once there is something to run
+    from . import OBoardManager
+    from .hardware.schedule import Schedule
+    from .mppt import ArrayTracker
+    from .workers import Coordinator
+    from .exporter import MetricsExporter
+
+    if args.simulate:
+        from .hardware.sim import SimulatedRig
+        SimulatedRig.with_boards(i2c_nums=args.i2c_nums, realtime=True).install()
     
     board_managers = []
     
     # Initialize all board managers
     for i2c_num in args.i2c_nums:
         print(f"Initializing MPP tracking on I2C bus {i2c_num}")
-        board_managers.append(OBoardManager(i2c_num=i2c_num))
+        board_managers.append(OBoardManager(i2c_num=i2c_num, topology_file=args.topology))
         time.sleep(.1)
 
-    # Run operations on each board manager
     for board_manager in board_managers:
-        time.sleep(.1)
         for oboard in board_manager.oboards:
-            for ch in range(8):
-                oboard.channel[ch].perform_iv_sweep()
-                    
+            oboard.Adc.data_rate = args.adc_data_rate
+            for channel in oboard.channel:
+                channel.log_format = args.log_format
+                channel.log_layout = args.log_layout
+                channel.autorange = not args.fixed_gain
+
+        if args.calibrate_settle:
+            print(f"Calibrating settle times on I2C bus {board_manager.i2c_num}")
+            board_manager.calibrate_settle_times(args.settle_calibration)
+        elif os.path.exists(args.settle_calibration):
+            calibrated = board_manager.load_settle_calibration(args.settle_calibration)
+            print(f"Using calibrated settle times for {calibrated} channels "
+                  f"on I2C bus {board_manager.i2c_num}")
+
+    # Channels grouped by bus and board, the analog mux only moves forward within a board
+    schedule = Schedule.from_managers(board_managers)
     iterations = 2
-    while True:
+    if schedule.steps:
+        # Budget of a steady-state cycle with 4 iterations per channel
+        settle_per_sample = sum(step.item.settle_time_per_sample
+                                for step in schedule) / len(schedule)
+        print(schedule.describe(mux_settle_time=settle_per_sample,
+                                visit_settle_time=4 * settle_per_sample))
+
+    # Start every channel from the tracker's initial voltage, two DAC writes per board
+    for board_manager in board_managers:
+        board_manager.set_all_voltages(CHANNEL_INITIAL_VOLTAGE)
+
+    # Served from the values the tracking loop stores, a scrape never touches the bus
+    exporter = None
+    if args.metrics_port is not None:
+        exporter = MetricsExporter(board_managers).serve(port=args.metrics_port)
+        print(f"Serving metrics at http://{METRICS_HOST}:{exporter.address[1]}/metrics")
+
+    try:
+        if args.parallel:
+            # IV sweep and tracking per bus in worker threads, status and logging in the coordinator
+            Coordinator(board_managers, array_tracker=args.array_tracker).run()
+            return
+
+        # IV sweep of all channels of a board at once, one settle time per step
         for board_manager in board_managers:
-            time.sleep(.1)
             for oboard in board_manager.oboards:
-                for ch in range(8):
+                oboard.perform_iv_sweep()
+
+        if args.array_tracker:
+            # One sample per channel and cycle, all set points computed at once
+            tracker = ArrayTracker([step.item for step in schedule])
+            while True:
+                tracker.cycle()
+
+        last_report = time.monotonic()
+        while True:
+            with metrics.timer('tracking.cycle'):
+                for step in schedule:
                     try:
-                        oboard.channel[ch].mpp_track(iterations=iterations, interval=1e-4)
+                        step.item.mpp_track(iterations=iterations, interval=1e-4)
                     except Exception as e:
-                        print(f"Error during MPP tracking on channel {ch} of board {oboard.ID}: {e}")
-        iterations = 4
+                        print(f"Error during MPP tracking on channel {step.item.ind} "
+                              f"of board {step.item.board.ID}: {e}")
+            iterations = 4
+            if metrics.registry.enabled and time.monotonic() - last_report >= METRICS_REPORT_INTERVAL:
+                last_report = time.monotonic()
+                print(metrics.describe())
+    finally:
+        # Leave the cells at 0 V when tracking stops
+        for board_manager in board_managers:
+            try:
+                board_manager.set_all_voltages(0)
+            except Exception as e:
+                print(f"Could not set the channels on I2C bus {board_manager.i2c_num} to 0 V: {e}")
+            board_manager.deinit()
+        if exporter is not None:
+            exporter.stop()
+        if metrics.registry.enabled:
+            print(metrics.describe())
 
 if __name__ == "__main__":
     main()
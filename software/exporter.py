@@ -0,0 +1,285 @@
+"""Prometheus metrics endpoint for a running rig.
+
+:class:`MetricsExporter` serves ``/metrics`` in the Prometheus text exposition
+format from a background thread bound to localhost, so rigs can be scraped
+centrally instead of tailing their console output. It exports:
+
+- per channel: latest voltage, current, power and set point, samples taken,
+  samples per second since the previous scrape and failed readings,
+- per bus: failed readings,
+- the log pipeline queue depth and row counters,
+- the network sync lag (time since the last complete pass) and its counters,
+- the last and the histogram of the loop cycle times and every operation timed
+  by :mod:`software.metrics`.
+
+A scrape only reads values the acquisition code has already stored in memory;
+it never touches the I2C bus.
+
+Example:
+    >>> exporter = MetricsExporter(managers).serve(port=9464)
+    >>> ...  # curl http://127.0.0.1:9464/metrics
+    >>> exporter.stop()
+"""
+
+import math
+import numbers
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from . import metrics
+from .logger import default_log_pipeline
+from .hardware.constants import METRICS_HOST, METRICS_PORT, METRICS_CYCLE_NAMES
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def format_value(value):
+    """Format a sample value, with Prometheus' spelling of NaN and infinities."""
+    if value is None:
+        return 'NaN'
+    if isinstance(value, numbers.Integral):
+        return str(int(value))
+    value = float(value)
+    if math.isnan(value):
+        return 'NaN'
+    if math.isinf(value):
+        return '+Inf' if value > 0 else '-Inf'
+    return repr(value)
+
+
+def format_labels(labels):
+    """Format a label dict as ``{name="value",...}``, empty without labels."""
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{name}="{escape_label_value(value)}"'
+                          for name, value in labels.items()) + '}'
+
+
+def escape_label_value(value):
+    """Escape backslashes, quotes and newlines of a label value."""
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+class MetricFamily:
+    """One metric with its help text, type and samples.
+
+    Args:
+        name (str): Metric name.
+        kind (str): 'gauge', 'counter' or 'histogram'.
+        help (str): One-line description.
+
+    Attributes:
+        samples (list): (suffix, labels, value) per sample.
+    """
+
+    def __init__(self, name, kind, help):
+        self.name = name
+        self.kind = kind
+        self.help = help
+        self.samples = []
+
+    def add(self, value, labels=None, suffix=''):
+        """Add one sample, ``suffix`` is appended to the name (e.g. '_bucket')."""
+        self.samples.append((suffix, labels or {}, value))
+        return self
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} {self.kind}']
+        for suffix, labels, value in self.samples:
+            lines.append(f'{self.name}{suffix}{format_labels(labels)} {format_value(value)}')
+        return '\n'.join(lines)
+
+
+def channel_labels(channel):
+    """Default labels of a channel: bus number, board offset and channel index."""
+    board = channel.board
+    return {
+        'bus': board.i2c_num,
+        'board': board.i2c_address_offset,
+        'channel': channel.ind,
+    }
+
+
+class MetricsExporter:
+    """Collects the rig state from memory and serves it to Prometheus.
+
+    Args:
+        managers (list[OBoardManager]): Boards whose channels are exported.
+        channels (callable, optional): Returns (labels, channel) pairs to export
+            instead of the channels of ``managers``, e.g. with the cell ids of the GUI.
+        pipeline (LogPipeline): Log pipeline whose queue is exported.
+        sync (NetworkSync, optional): Network sync whose lag is exported.
+        registry (MetricsRegistry): Operation timings to export.
+
+    Attributes:
+        server (ThreadingHTTPServer): The running server, None when not serving.
+    """
+
+    def __init__(self, managers=(), channels=None, pipeline=default_log_pipeline, sync=None,
+                 registry=metrics.registry):
+        self.managers = list(managers)
+        self.channels = channels if channels is not None else self._manager_channels
+        self.pipeline = pipeline
+        self.sync = sync
+        self.registry = registry
+        self.server = None
+        self._thread = None
+        self._lock = threading.Lock()
+        self._previous = {}  # Channel labels to (time, samples) of the previous scrape
+
+    def _manager_channels(self):
+        return [(channel_labels(channel), channel)
+                for manager in self.managers for channel in manager.channels()]
+
+    @property
+    def address(self):
+        """(host, port) the server listens on, None when not serving."""
+        return self.server.server_address[:2] if self.server is not None else None
+
+    def collect(self):
+        """Return the current metrics as a list of :class:`MetricFamily`."""
+        families = self._collect_channels()
+        families += self._collect_pipeline()
+        if self.sync is not None:
+            families += self._collect_sync()
+        families += self._collect_timings()
+        return families
+
+    def render(self):
+        """Return the current metrics in the Prometheus text format."""
+        return '\n'.join(family.render() for family in self.collect()) + '\n'
+
+    def _collect_channels(self):
+        voltage = MetricFamily('octoboard_channel_voltage_volts', 'gauge', 'Latest measured cell voltage.')
+        current = MetricFamily('octoboard_channel_current_amperes', 'gauge', 'Latest measured cell current.')
+        power = MetricFamily('octoboard_channel_power_watts', 'gauge', 'Latest measured cell power.')
+        set_point = MetricFamily('octoboard_channel_set_voltage_volts', 'gauge',
+                                 'Voltage set point of the MPP tracker.')
+        samples = MetricFamily('octoboard_channel_samples_total', 'counter', 'Readings taken.')
+        rate = MetricFamily('octoboard_channel_samples_per_second', 'gauge',
+                            'Readings per second since the previous scrape.')
+        errors = MetricFamily('octoboard_channel_read_errors_total', 'counter', 'Readings that failed.')
+        bus_errors = MetricFamily('octoboard_bus_read_errors_total', 'counter',
+                                  'Readings that failed, per I2C bus.')
+
+        now = time.monotonic()
+        errors_per_bus = {}
+        with self._lock:
+            previous, self._previous = self._previous, {}
+            for labels, channel in self.channels():
+                sample = channel.last_sample
+                if sample is not None:
+                    voltage.add(sample.voltage, labels)
+                    current.add(sample.current, labels)
+                    power.add(sample.voltage * sample.current, labels)
+                count, read_errors = channel.samples, channel.read_errors
+                set_point.add(channel.last_v, labels)
+                samples.add(count, labels)
+                errors.add(read_errors, labels)
+                bus = channel.board.i2c_num
+                errors_per_bus[bus] = errors_per_bus.get(bus, 0) + read_errors
+
+                key = tuple(labels.items())
+                self._previous[key] = (now, count)
+                if key in previous and now > previous[key][0]:
+                    rate.add((count - previous[key][1]) / (now - previous[key][0]), labels)
+        for bus, count in sorted(errors_per_bus.items()):
+            bus_errors.add(count, {'bus': bus})
+        return [voltage, current, power, set_point, samples, rate, errors, bus_errors]
+
+    def _collect_pipeline(self):
+        stats = self.pipeline.stats()
+        return [
+            MetricFamily('octoboard_log_queue_depth', 'gauge',
+                         'Records waiting for the logging thread.').add(stats['depth']),
+            MetricFamily('octoboard_log_queue_max_depth', 'gauge',
+                         'Highest queue depth seen by the logging thread.').add(stats['max_depth']),
+            MetricFamily('octoboard_log_rows_written_total', 'counter',
+                         'Rows handed to the log files.').add(stats['written']),
+            MetricFamily('octoboard_log_rows_dropped_total', 'counter',
+                         'Rows dropped because the queue stayed full.').add(stats['dropped']),
+            MetricFamily('octoboard_log_errors_total', 'counter',
+                         'Records that failed in the logging thread.').add(stats['errors']),
+        ]
+
+    def _collect_sync(self):
+        stats = self.sync.stats()
+        last_success = stats['last_success']
+        lag = time.time() - last_success if last_success is not None else None
+        return [
+            MetricFamily('octoboard_sync_lag_seconds', 'gauge',
+                         'Time since the last complete sync pass, NaN before the first.').add(lag),
+            MetricFamily('octoboard_sync_files', 'gauge', 'Files registered for sync.').add(stats['files']),
+            MetricFamily('octoboard_sync_bytes_total', 'counter',
+                         'Bytes written to the share.').add(stats['bytes_synced']),
+            MetricFamily('octoboard_sync_errors_total', 'counter',
+                         'Failed file syncs.').add(stats['errors']),
+        ]
+
+    def _collect_timings(self):
+        snapshot = self.registry.snapshot()
+        cycle = MetricFamily('octoboard_cycle_seconds', 'gauge', 'Duration of the last loop cycle.')
+        duration = MetricFamily('octoboard_operation_duration_seconds', 'histogram',
+                                'Duration of timed operations.')
+        errors = MetricFamily('octoboard_operation_errors_total', 'counter',
+                              'Timed operations that raised an error.')
+        events = MetricFamily('octoboard_events_total', 'counter', 'Counted events.')
+        for name, stat in sorted(snapshot['histograms'].items()):
+            labels = {'operation': name}
+            if name in METRICS_CYCLE_NAMES:
+                cycle.add(stat['last'], {'loop': name})
+            cumulative = 0
+            for bound, calls in stat['buckets']:
+                cumulative += calls
+                duration.add(cumulative, dict(labels, le=format_value(float(bound))), '_bucket')
+            duration.add(stat['total'], labels, '_sum')
+            duration.add(stat['count'], labels, '_count')
+            errors.add(stat['errors'], labels)
+        for name, value in sorted(snapshot['counters'].items()):
+            events.add(value, {'event': name})
+        recording = MetricFamily('octoboard_metrics_enabled', 'gauge',
+                                 'Whether operation timings are recorded.').add(int(snapshot['enabled']))
+        return [recording, cycle, duration, errors, events]
+
+    def serve(self, port=METRICS_PORT, host=METRICS_HOST):
+        """Serve ``/metrics`` from a background thread, port 0 picks a free port.
+
+        Returns:
+            MetricsExporter: self, for chaining.
+        """
+        exporter = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split('?')[0] not in ('/metrics', '/'):
+                    self.send_error(404)
+                    return
+                try:
+                    body = exporter.render().encode()
+                except Exception as e:
+                    self.send_error(500, str(e))
+                    return
+                self.send_response(200)
+                self.send_header('Content-Type', CONTENT_TYPE)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass  # One line per scrape would drown the tracking output
+
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        self.server.daemon_threads = True
+        self._thread = threading.Thread(target=self.server.serve_forever, name='MetricsExporter',
+                                        daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Stop serving."""
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+            self._thread.join()
+            self.server = None
@@ -1,5 +1,28 @@
-from .i2c import ExtendedI2C
-from .oboard import OBoard
-from .channel import Channel
-from .sdac import Softdac
-from .manager import OBoardManager
\ No newline at end of file
+import importlib
+
+# Public names and their submodules. They are imported on first access
+# (PEP 562), so importing the package does not load Blinka and the drivers.
+_LAZY_NAMES = {
+    'ExtendedI2C': '.i2c',
+    'OBoard': '.oboard',
+    'Channel': '.channel',
+    'Sample': '.channel',
+    'Softdac': '.sdac',
+    'OBoardManager': '.manager',
+    'TCA9548A': '.tca',
+}
+
+__all__ = list(_LAZY_NAMES)
+
+
+def __getattr__(name):
+    module = _LAZY_NAMES.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
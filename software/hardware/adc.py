@@ -0,0 +1,100 @@
+import time
+
+from adafruit_ads1x15.ads1115 import ADS1115
+from adafruit_ads1x15.ads1x15 import Mode
+
+from .constants import (
+    ADC_DATA_RATE,
+    ADC_POLL_INTERVAL,
+    ADC_READ_TIMEOUT,
+)
+
+
+class PacedADS1115(ADS1115):
+    """ADS1115 that waits one conversion time instead of busy-polling.
+
+    The Adafruit driver starts a single-shot conversion and then reads the
+    config register in a tight loop until the OS bit reports completion.
+    That costs hundreds of I2C transactions per read and keeps the bus busy
+    for other devices. This class sleeps for the nominal conversion time
+    (``1 / data_rate``) first, then checks the ready bit every
+    ``poll_interval`` until the conversion is done. The ADS1115 settles
+    within a single conversion, so a read takes one conversion time.
+
+    If the ALERT/RDY pin is wired to a GPIO, pass it as ``ready_pin``. The
+    comparator is then configured as conversion-ready signal and polling reads
+    the pin instead of the config register.
+
+    Changing ``gain`` does not write the config register in single-shot
+    mode, since it is written together with each conversion anyway.
+
+    The data rate trades speed for noise: the ADS1115 averages over the whole
+    conversion time, so lower rates give quieter readings. Valid rates are
+    8, 16, 32, 64, 128, 250, 475 and 860 samples per second.
+
+    Args:
+        i2c (ExtendedI2C): The bus the ADC is connected to.
+        gain (float): Initial PGA gain.
+        data_rate (int): Samples per second.
+        address (int): I2C address of the ADC.
+        poll_interval (float): Time between ready checks after the nominal conversion time (seconds).
+        timeout (float): Time past the nominal conversion time after which a conversion counts as failed (seconds).
+        ready_pin (DigitalInOut, optional): Input connected to ALERT/RDY, low when a conversion is done.
+
+    Attributes:
+        conversions (int): Conversions read so far.
+        polls (int): Ready checks that found the conversion still running.
+    """
+
+    def __init__(self, i2c, gain=1, data_rate=ADC_DATA_RATE, address=0x48,
+                 poll_interval=ADC_POLL_INTERVAL, timeout=ADC_READ_TIMEOUT, ready_pin=None):
+        self.poll_interval = poll_interval
+        self.timeout = timeout
+        self.ready_pin = ready_pin
+        self.conversions = 0
+        self.polls = 0
+        super().__init__(i2c, gain=gain, data_rate=data_rate, address=address)
+        if ready_pin is not None:
+            # Hi_thresh MSB = 1 and Lo_thresh MSB = 0 turn ALERT/RDY into a ready signal
+            self.comparator_high_threshold = -32768
+            self.comparator_low_threshold = 0
+            self.comparator_queue_length = 1
+
+    @property
+    def gain(self):
+        """The ADC gain."""
+        return self._gain
+
+    @gain.setter
+    def gain(self, gain):
+        if gain not in self.gains:
+            raise ValueError(f"Gain must be one of: {self.gains}")
+        self._gain = gain
+        if self.initialized and self.mode != Mode.SINGLE:
+            self._write_config()
+
+    @property
+    def conversion_time(self):
+        """Nominal duration of one conversion at the current data rate (seconds)."""
+        return 1.0 / self.data_rate
+
+    def _conversion_complete(self):
+        if self.ready_pin is not None:
+            return not self.ready_pin.value
+        return super()._conversion_complete()
+
+    def _read(self, pin):
+        if self.mode != Mode.SINGLE:
+            return super()._read(pin)
+        self._last_pin_read = pin
+        self._write_config(pin)
+        deadline = time.monotonic() + self.conversion_time + self.timeout
+        time.sleep(self.conversion_time)
+        while not self._conversion_complete():
+            if time.monotonic() > deadline:
+                raise OSError(f"ADS1115 at 0x{self.i2c_device.device_address:02x} "
+                              f"did not finish a conversion within {self.conversion_time + self.timeout:.3f} s")
+            self.polls += 1
+            time.sleep(self.poll_interval)
+        self.conversions += 1
+        return self._conversion_value(self.get_last_result(False))
@@ -0,0 +1,85 @@
+from .constants import (
+    ADC_GAINS,
+    ADC_REFERENCE_RANGE,
+    AUTORANGE_HIGH_FRACTION,
+    AUTORANGE_LOW_FRACTION,
+    AUTORANGE_HOLD,
+)
+
+
+class AutoRange:
+    """Picks the ADS1115 PGA gain of one input from its recent readings.
+
+    The gain goes down (wider range) as soon as a reading is saturated or
+    above ``high_fraction`` of the full scale. It goes up (finer resolution)
+    once ``hold`` readings in a row would fit within ``low_fraction`` of the
+    next higher gain's full scale. The gap between the two thresholds keeps a
+    reading near a range boundary from switching the gain back and forth.
+
+    Args:
+        gain (float): Initial gain.
+        gains (tuple): Allowed gains.
+        high_fraction (float): Fraction of the full scale above which the gain goes down.
+        low_fraction (float): Fraction of the next higher gain's full scale below
+            which the gain goes up.
+        hold (int): Readings in a row that must fit the higher gain before it is used.
+
+    Attributes:
+        gain (float): Gain to use for the next reading.
+        changes (int): Gain changes so far.
+    """
+
+    def __init__(self, gain, gains=ADC_GAINS, high_fraction=AUTORANGE_HIGH_FRACTION,
+                 low_fraction=AUTORANGE_LOW_FRACTION, hold=AUTORANGE_HOLD):
+        self.gains = tuple(sorted(gains))
+        if gain not in self.gains:
+            raise ValueError(f"Gain {gain} is not one of {self.gains}")
+        self.gain = gain
+        self.high_fraction = high_fraction
+        self.low_fraction = low_fraction
+        self.hold = hold
+        self.changes = 0
+        self._fits_higher = 0
+
+    @staticmethod
+    def saturated(raw):
+        """True if a raw ADS1115 code is at either end of the range."""
+        return raw >= 32767 or raw <= -32768
+
+    @staticmethod
+    def full_scale(gain):
+        """Full scale range of the ADS1115 at a gain (V)."""
+        return ADC_REFERENCE_RANGE / gain
+
+    def update(self, value, saturated=False):
+        """Take a reading (V at the ADC input) into account.
+
+        Args:
+            value (float): The reading.
+            saturated (bool): True if the ADC returned its largest or smallest code.
+
+        Returns:
+            bool: True if the gain changed.
+        """
+        index = self.gains.index(self.gain)
+        if saturated or abs(value) > self.high_fraction * self.full_scale(self.gain):
+            self._fits_higher = 0
+            if index == 0:
+                return False
+            self._set(self.gains[index - 1])
+            return True
+
+        if index + 1 < len(self.gains) and \
+                abs(value) < self.low_fraction * self.full_scale(self.gains[index + 1]):
+            self._fits_higher += 1
+            if self._fits_higher >= self.hold:
+                self._fits_higher = 0
+                self._set(self.gains[index + 1])
+                return True
+        else:
+            self._fits_higher = 0
+        return False
+
+    def _set(self, gain):
+        self.gain = gain
+        self.changes += 1
@@ -0,0 +1,108 @@
+import json
+import os
+import time
+from datetime import datetime
+
+from .constants import SETTLE_CALIBRATION_FILE
+
+SETTLE_CALIBRATION_VERSION = 1
+
+
+def record_step_response(read, duration, start=None):
+    """Call ``read`` back to back for ``duration`` seconds.
+
+    Args:
+        read (callable): Returns one reading, e.g. ``Channel._adc_voltage``.
+        duration (float): Recording time in seconds.
+        start (float, optional): ``time.monotonic()`` of the step. Defaults to now.
+
+    Returns:
+        tuple: (times, values). Each time is taken when its read returned,
+        relative to ``start``, so it is never earlier than the conversion.
+    """
+    if start is None:
+        start = time.monotonic()
+    times = []
+    values = []
+    while True:
+        values.append(read())
+        elapsed = time.monotonic() - start
+        times.append(elapsed)
+        if elapsed >= duration:
+            return times, values
+
+
+def settle_time_from_trace(times, values, tolerance):
+    """Return the time from which a step response stays within ``tolerance`` of its final value.
+
+    The final value is the mean of the last quarter of the readings.
+
+    Returns:
+        float: Settle time in seconds, or None if the readings still leave the
+        tolerance band in the last quarter (the recording was too short).
+    """
+    tail = max(1, len(values) // 4)
+    final = sum(values[-tail:]) / tail
+    last_outside = None
+    for index, value in enumerate(values):
+        if abs(value - final) > tolerance:
+            last_outside = index
+    if last_outside is None:
+        return times[0]
+    if last_outside >= len(values) - tail:
+        return None
+    return times[last_outside + 1]
+
+
+def load_settle_calibration(channels, file_name=SETTLE_CALIBRATION_FILE):
+    """Apply stored settle times to the channels found in a calibration file.
+
+    Args:
+        channels (list[Channel]): Channels to update, matched by their ``id``.
+        file_name (str): Calibration file written by :func:`save_settle_calibration`.
+
+    Returns:
+        int: Number of channels that got a calibrated settle time.
+    """
+    with open(file_name) as f:
+        data = json.load(f)
+    if data.get('version') != SETTLE_CALIBRATION_VERSION:
+        raise ValueError(f"{file_name} is not a version {SETTLE_CALIBRATION_VERSION} "
+                         f"settle calibration")
+    entries = data['channels']
+    applied = 0
+    for channel in channels:
+        entry = entries.get(channel.id)
+        if entry is not None:
+            channel.settle_time = entry['settle_time']
+            # Files written before mux_settle_time was stored keep the default
+            channel.mux_settle_time = entry.get('mux_settle_time', channel.mux_settle_time)
+            channel.settle_calibration = entry
+            applied += 1
+    return applied
+
+
+def save_settle_calibration(channels, file_name=SETTLE_CALIBRATION_FILE):
+    """Store the settle times of calibrated channels.
+
+    Entries of other channels already in the file are kept, so boards on
+    several buses can share one file.
+
+    Args:
+        channels (list[Channel]): Channels, those without ``settle_calibration`` are skipped.
+        file_name (str): Calibration file.
+    """
+    entries = {}
+    if os.path.exists(file_name):
+        with open(file_name) as f:
+            entries = json.load(f).get('channels', {})
+    for channel in channels:
+        if channel.settle_calibration is not None:
+            entries[channel.id] = channel.settle_calibration
+    os.makedirs(os.path.dirname(file_name) or '.', exist_ok=True)
+    temp_name = f"{file_name}.tmp"
+    with open(temp_name, 'w') as f:
+        json.dump({'version': SETTLE_CALIBRATION_VERSION,
+                   'saved_at': datetime.now().isoformat(),
+                   'channels': entries}, f, indent=2, sort_keys=True)
+    os.replace(temp_name, file_name)
@@ -2,14 +2,37 @@ from .constants import *
 import os
 import time
 from datetime import datetime
+from typing import NamedTuple
 from adafruit_ads1x15.analog_in import AnalogIn
+from ..logger import default_log_pipeline
+from ..metrics import timed
+from .calibration import record_step_response, settle_time_from_trace
+from .autorange import AutoRange
+
+
+class Sample(NamedTuple):
+    """One voltage and current reading of a channel.
+
+    Attributes:
+        timestamp (str): ISO time taken after settling, right before the ADC reads.
+        voltage (float): Cell voltage (V).
+        current (float): Cell current (A).
+        gain_v (float): ADC gain the voltage was read with.
+        gain_c (float): ADC gain the current was read with.
+    """
+    timestamp: str
+    voltage: float
+    current: float
+    gain_v: float
+    gain_c: float
+
 
 class Channel:
     """Represents a single control channel on a board, capable of performing MPP tracking.
 
     Attributes:
         board (OBoard): The parent board that this channel belongs to.
-        dac (device): The DAC device associated with this channel.
+        dac (device): The DAC channel of this channel, by default the board's on first use.
         ind (int): The index of the channel on the board.
         id (str): Unique identifier for the channel.
         last_v (float): Last recorded voltage.
@@ -17,20 +40,45 @@ class Channel:
         last_p (float): Last recorded power.
         dv (float): Step change in voltage during MPP tracking.
         max_dv (float): Maximum allowable change in voltage per step.
-        gain_v (int): Gain setting for voltage measurement.
-        gain_c (int): Gain setting for current measurement.
+        gain_v (float): Gain setting for voltage measurement, ``range_v.gain``.
+        gain_c (float): Gain setting for current measurement, ``range_c.gain``.
+        range_v (AutoRange): Gain selection of the voltage input.
+        range_c (AutoRange): Gain selection of the current (shunt) input.
+        autorange (bool): Adjust the gains from the readings, otherwise keep them fixed.
+        writers (LogPipeline): Background logging pipeline used for the CSV output.
+        log_format (str): Tracking data format, 'csv' or 'binary'.
+        log_layout (str): Binary log layout, one file per 'channel' or per 'board'.
+        settle_time (float): Delay between selecting the channel or stepping its DAC
+            and reading it (seconds).
+        mux_settle_time (float): Delay between selecting the channel and reading it when
+            its DAC has already settled, as in a board-wide sweep (seconds).
+        settle_calibration (dict): Result of the last settle calibration, None if not calibrated.
+        last_sample (Sample): Most recent reading, None before the first one.
+        samples (int): Readings taken.
+        read_errors (int): Readings that failed on the bus.
     """
 
     def __init__(self, board, Dac, ind, R_shunt=CHANNEL_DEFAULT_SHUNT_RESISTANCE, 
-                 Voltage_limits=CHANNEL_VOLTAGE_LIMITS):
+                 Voltage_limits=CHANNEL_VOLTAGE_LIMITS, writers=default_log_pipeline,
+                 log_format=LOG_FORMAT, log_layout=BINLOG_LAYOUT):
         """Initialize a channel with specific board, DAC, and index."""
         self.board = board
-        self.dac = Dac
+        self._dac = Dac
         self.ind = ind
         self.id = f"{board.ID}channel_{ind}"
         self.R_shunt = R_shunt
         self.Voltage_limits = Voltage_limits
-        self.dac.gain = CHANNEL_DAC_GAIN
+        self.writers = writers
+        self.log_format = log_format
+        self.log_layout = log_layout
+        self.settle_time = CHANNEL_ADC_SETTLE_TIME
+        self.mux_settle_time = CHANNEL_MUX_SETTLE_TIME
+        self.settle_calibration = None
+        self.last_sample = None
+        self.samples = 0
+        self.read_errors = 0
+        if Dac is not None:
+            Dac.gain = CHANNEL_DAC_GAIN
         
         # Initialize MPPT tracking variables
         self.last_v = CHANNEL_INITIAL_VOLTAGE
@@ -40,32 +88,214 @@ class Channel:
         self.max_dv = CHANNEL_MAX_VOLTAGE_STEP
 
         # Initialize gain settings
-        self.gain_v = CHANNEL_VOLTAGE_GAIN
-        self.gain_c = CHANNEL_CURRENT_GAIN
+        self.range_v = AutoRange(CHANNEL_VOLTAGE_GAIN)
+        self.range_c = AutoRange(CHANNEL_CURRENT_GAIN)
+        self.autorange = ADC_AUTORANGE
+
+    @property
+    def dac(self):
+        """The DAC channel, taken from the board on first use if none was given."""
+        if self._dac is None:
+            self._dac = self.board.dac_channel(self.ind)
+        return self._dac
+
+    @property
+    def gain_v(self):
+        return self.range_v.gain
+
+    @gain_v.setter
+    def gain_v(self, gain):
+        self.range_v.gain = gain
+
+    @property
+    def gain_c(self):
+        return self.range_c.gain
+
+    @gain_c.setter
+    def gain_c(self, gain):
+        self.range_c.gain = gain
+
+    def dac_code(self, voltage):
+        """Return the 12-bit DAC code of a voltage, limited to ``Voltage_limits``."""
+        voltage_ = min(max(self.Voltage_limits[0], voltage), self.Voltage_limits[1])
+        return int(voltage_ * CHANNEL_DAC_VOLTAGE_SCALE) >> 4
 
+    @timed('channel.set_voltage')
     def set_voltage(self, voltage):
         """Set the voltage of the DAC to a specific value."""
-        voltage_ = min(max(self.Voltage_limits[0], voltage), self.Voltage_limits[1])
-        self.dac.value = int(voltage_ * CHANNEL_DAC_VOLTAGE_SCALE)
+        self.dac.raw_value = self.dac_code(voltage)
+
+    @property
+    def settle_time_per_sample(self):
+        """Settle time spent reading one voltage and current sample (seconds)."""
+        # read_sample settles once, in aMux_select_channel or in _select
+        return self.settle_time
+
+    def _select(self):
+        """Select this channel on the analog mux and wait for the input to settle once."""
+        if not self.board.aMux_select_channel(self.ind, settle_time=self.settle_time):
+            time.sleep(self.settle_time)
+
+    def _read_input(self, positive, negative, autorange):
+        """Read a differential ADC input.
+
+        With auto-ranging, a saturated reading is repeated at the next lower
+        gain until it fits or the lowest gain is reached.
+
+        Returns:
+            tuple: (voltage, gain the voltage was read with)
+        """
+        ads = self.board.Adc
+        while True:
+            gain = autorange.gain
+            ads.gain = gain
+            analog_in = AnalogIn(ads, positive, negative)
+            raw = analog_in.value
+            voltage = analog_in.convert_to_voltage(raw)
+            if not self.autorange:
+                return voltage, gain
+            saturated = AutoRange.saturated(raw)
+            if not (autorange.update(voltage, saturated) and saturated):
+                return voltage, gain
+
+    def _adc_voltage(self):
+        return self._read_input(0, 1, self.range_v)[0]
+
+    def _adc_current(self):
+        return self._read_input(2, 3, self.range_c)[0] / self.R_shunt
+
+    @timed('channel.read_sample')
+    def read_sample(self):
+        """Read voltage and current with a single mux selection and settling time.
+
+        Both differential pairs are converted back to back, so the two values
+        belong to the same operating point. Use this instead of calling
+        :meth:`read_voltage` and :meth:`read_current` one after the other.
 
+        Returns:
+            Sample: Timestamped voltage (V) and current (A) with the gains used.
+        """
+        try:
+            self._select()
+        except Exception:
+            self.read_errors += 1
+            raise
+        return self.read_selected_sample()
+
+    def read_selected_sample(self):
+        """Read voltage and current without selecting the channel or waiting.
+
+        The caller must have selected this channel on the analog mux and let
+        the input settle, see :meth:`OBoard.perform_iv_sweep`.
+
+        Returns:
+            Sample: Timestamped voltage (V) and current (A) with the gains used.
+        """
+        timestamp = datetime.now().isoformat()
+        try:
+            voltage, gain_v = self._read_input(0, 1, self.range_v)
+            shunt_voltage, gain_c = self._read_input(2, 3, self.range_c)
+        except Exception:
+            self.read_errors += 1
+            raise
+        sample = self.last_sample = Sample(timestamp, voltage, shunt_voltage / self.R_shunt,
+                                           gain_v, gain_c)
+        self.samples += 1
+        return sample
+
+    @timed('channel.read_voltage')
     def read_voltage(self):
         """Read the voltage from the ADC after selecting the appropriate channel."""
-        self.board.aMux_select_channel(self.ind)
-        time.sleep(CHANNEL_ADC_SETTLE_TIME)
-        ads = self.board.Adc
-        ads.gain = self.gain_v
-        V_cell = AnalogIn(ads, 0, 1)
-        return V_cell.voltage
+        self._select()
+        return self._adc_voltage()
 
+    @timed('channel.read_current')
     def read_current(self):
         """Read the current from the ADC after selecting the appropriate channel."""
-        self.board.aMux_select_channel(self.ind)
-        time.sleep(CHANNEL_ADC_SETTLE_TIME)
+        self._select()
+        return self._adc_current()
+
+    def calibrate_settle_time(self, voltages=SETTLE_CAL_VOLTAGES, tolerance=SETTLE_CAL_TOLERANCE,
+                              window=SETTLE_CAL_WINDOW, data_rate=SETTLE_CAL_DATA_RATE,
+                              margin=SETTLE_CAL_MARGIN):
+        """Measure how long this channel needs to settle and use that as ``settle_time``.
+
+        Two step responses of the cell voltage are recorded at a high ADC data
+        rate: after a DAC step from the low to the high voltage, and after the
+        analog mux switches over from the next channel on the board, which is
+        held at the low voltage meanwhile. The longer settle time times
+        ``margin`` becomes the channel's ``settle_time``, the mux settle time times
+        ``margin`` its ``mux_settle_time``. Both DAC values and the
+        ADC data rate are restored afterwards.
+
+        Args:
+            voltages (tuple): Low and high voltage of the step (V).
+            tolerance (float): Band around the final reading that counts as settled (V).
+            window (float): Recording time per step response, also the upper limit (seconds).
+            data_rate (int): ADC samples per second while recording.
+            margin (float): Factor applied to the measured settle time.
+
+        Returns:
+            dict: Measured 'dac' and 'mux' settle times and the resulting 'settle_time'
+            and 'mux_settle_time' (seconds).
+        """
+        low, high = voltages
         ads = self.board.Adc
-        ads.gain = self.gain_c
-        shnt = AnalogIn(ads, 2, 3)
-        return shnt.voltage / self.R_shunt
+        other = self.board.channel[(self.ind + 1) % len(self.board.channel)]
+        data_rate_before = ads.data_rate
+        own_value = self.dac.raw_value
+        other_value = other.dac.raw_value
+        ads.data_rate = data_rate
+        try:
+            self.board.aMux_select_channel(self.ind, settle_time=0)
+            self.set_voltage(low)
+            time.sleep(window)
+            start = time.monotonic()
+            self.set_voltage(high)
+            dac = settle_time_from_trace(*record_step_response(self._adc_voltage, window, start),
+                                         tolerance)
+
+            other.set_voltage(low)
+            self.board.aMux_select_channel(other.ind, settle_time=window)
+            start = time.monotonic()
+            self.board.aMux_select_channel(self.ind, settle_time=0)
+            mux = settle_time_from_trace(*record_step_response(self._adc_voltage, window, start),
+                                         tolerance)
+        finally:
+            ads.data_rate = data_rate_before
+            self.dac.raw_value = own_value
+            other.dac.raw_value = other_value
+
+        if dac is None or mux is None:
+            print(f"Channel {self.id} did not settle within {window} s, using {window} s")
+            dac = window if dac is None else dac
+            mux = window if mux is None else mux
+        self.settle_time = max(dac, mux) * margin
+        self.mux_settle_time = mux * margin
+        self.settle_calibration = {
+            'dac': dac,
+            'mux': mux,
+            'settle_time': self.settle_time,
+            'mux_settle_time': self.mux_settle_time,
+            'calibrated_at': datetime.now().isoformat(),
+        }
+        return self.settle_calibration
+
+    def tracking_log_file(self):
+        """Return the tracking data file, its header and the fields written before each row.
+
+        CSV files get ``CHANNEL_DEFAULT_HEADER``. Binary logs get their layout as
+        header, and in the 'board' layout every row starts with the channel index.
+        """
+        if self.log_format == 'binary':
+            if self.log_layout == 'board':
+                file_name = f'{self.board.ID}data{BINLOG_EXTENSION}'
+                return os.path.join(CHANNEL_DATA_DIRECTORY, file_name), 'board', (self.ind,)
+            file_name = f'{self.id}_data{BINLOG_EXTENSION}'
+            return os.path.join(CHANNEL_DATA_DIRECTORY, file_name), 'channel', ()
+        return os.path.join(CHANNEL_DATA_DIRECTORY, f'{self.id}_data.csv'), CHANNEL_DEFAULT_HEADER, ()
 
+    @timed('channel.mpp_track')
     def mpp_track(self, iterations=10, interval=0.01):
         """Track measurements and write them to a CSV file with a maximum dv step.
 
@@ -73,41 +303,40 @@ class Channel:
             iterations (int): Number of iterations to run the tracking.
             interval (float): Time between iterations (in seconds).
         """
-        file_name = os.path.join(CHANNEL_DATA_DIRECTORY, f'{self.id}_data.csv')
+        file_name, header, prefix = self.tracking_log_file()
         os.makedirs(CHANNEL_DATA_DIRECTORY, exist_ok=True)
+        self.writers.open(file_name, header=header)
 
-        if not os.path.exists(file_name):
-            with open(file_name, 'a') as f:
-                f.write(f'{CHANNEL_DEFAULT_HEADER}\n')
-
-        for _ in range(iterations):
-            timestamp = datetime.now().isoformat()
-            try:
-                measured_voltage = self.read_voltage()
-                measured_current = self.read_current()
-            except Exception as e:
-                print(f"Error reading voltage or current: {e}")
-                continue
-
-            dac_value = self.dac.raw_value
-            curr_p = measured_voltage * measured_current
-
-            with open(file_name, 'a') as f:
-                f.write(f'{timestamp},{measured_voltage},{measured_current},'
-                       f'{dac_value},{self.gain_v},{self.gain_c}\n')
-
-            # Update step size based on power change
-            if self.last_p < curr_p:
-                self.dv = min(self.dv * CHANNEL_POWER_INCREASE_FACTOR, self.max_dv)
-            else:
-                self.dv = min(self.dv * CHANNEL_POWER_DECREASE_FACTOR, self.max_dv)
-                self.last_dir *= -1
-            self.dv = max(CHANNEL_MIN_VOLTAGE_STEP, self.dv)
-
-            self.last_v += self.dv * self.last_dir
-            self.set_voltage(self.last_v)
-            self.last_p = curr_p
-            time.sleep(interval)
+        try:
+            for _ in range(iterations):
+                try:
+                    sample = self.read_sample()
+                except Exception as e:
+                    print(f"Error reading voltage or current: {e}")
+                    continue
+
+                dac_value = self.dac.raw_value
+                curr_p = sample.voltage * sample.current
+
+                self.writers.write_row(file_name, prefix + (sample.timestamp, sample.voltage,
+                                                            sample.current, dac_value,
+                                                            sample.gain_v, sample.gain_c))
+
+                # Update step size based on power change
+                if self.last_p < curr_p:
+                    self.dv = min(self.dv * CHANNEL_POWER_INCREASE_FACTOR, self.max_dv)
+                else:
+                    self.dv = min(self.dv * CHANNEL_POWER_DECREASE_FACTOR, self.max_dv)
+                    self.last_dir *= -1
+                self.dv = max(CHANNEL_MIN_VOLTAGE_STEP, self.dv)
+
+                self.last_v += self.dv * self.last_dir
+                self.set_voltage(self.last_v)
+                self.last_p = curr_p
+                time.sleep(interval)
+        except BaseException:
+            self.writers.close(file_name)
+            raise
 
     def perform_iv_sweep(self, start_value=CHANNEL_IV_START_VALUE, 
                         end_value=CHANNEL_IV_END_VALUE,
@@ -115,20 +344,18 @@ class Channel:
         """Performs an IV sweep from a start value to an end value on the DAC."""
         file_name = os.path.join(CHANNEL_IV_DIRECTORY, f'{self.id}_data.csv')
         os.makedirs(CHANNEL_IV_DIRECTORY, exist_ok=True)
+        self.writers.open(file_name, header=CHANNEL_DEFAULT_HEADER, mode='w')
+
+        try:
+            for dac_value in range(start_value, end_value + 1, step_size):
+                self.set_voltage(dac_value)
+                sample = self.read_sample()
+                dac_value = self.dac.raw_value
+
+                self.writers.write_row(file_name, (sample.timestamp, sample.voltage, sample.current,
+                                                   dac_value, sample.gain_v, sample.gain_c))
+        finally:
+            # A sweep is complete once written, keep only tracking files open
+            self.writers.close(file_name)
 
-        with open(file_name, 'w') as f:
-            f.write(f'{CHANNEL_DEFAULT_HEADER}\n')
-
-        for dac_value in range(start_value, end_value + 1, step_size):
-            self.set_voltage(dac_value)
-            time.sleep(CHANNEL_ADC_SETTLE_TIME)
-            voltage = self.read_voltage()
-            current = self.read_current()
-            dac_value = self.dac.raw_value
-            timestamp = datetime.now().isoformat()
-            
-            with open(file_name, 'a') as f:
-                f.write(f'{timestamp},{voltage},{current},'
-                       f'{dac_value},{self.gain_v},{self.gain_c}\n')
-                
-        self.set_voltage(0)
\ No newline at end of file
+        self.set_voltage(0)
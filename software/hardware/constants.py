@@ -1,12 +1,11 @@
 """Global constants used across the MPP tracker system."""
 
-import numpy as np
-
 # Board Manager Configuration
 BOARD_DEFAULT_I2C_NUM = 1
 BOARD_DEFAULT_OFFSET_RANGE = range(0, 4)
 BOARD_DEFAULT_ITERATIONS = 10
 BOARD_DEFAULT_INTERVAL = 0.001  # seconds
+TOPOLOGY_FILE = "topology.json"  # Boards found per bus and TCA9548A channel, checked at start-up
 
 # I2C Device Base Addresses
 I2C_BASE_MUX = 32    # Base address for MCP23017 multiplexer
@@ -26,12 +25,21 @@ I2C_OFFSET_MULTIPLIER = {
 }
 
 
+# Analog Multiplexer Configuration
+MUX_CONTROL_PIN = 7                 # MCP23017 pin driving the 74HC4051 enable (active low)
+MUX_SELECT_PINS = [4, 5, 6]         # MCP23017 pins driving the 74HC4051 address bits
+
+# TCA9548A I2C Switch Configuration
+TCA9548A_ADDRESS = 0x70             # Default address of the TCA9548A I2C switch
+TCA9548A_CHANNELS = 8               # Number of downstream channels on the switch
+TCA9548A_SETTLE_TIME = 0.1          # Delay after switching to a different channel (seconds)
+
 # Softdac Configuration
 SOFTDAC_MUX_PINS = [8, 9, 10, 11]  # Multiplexer pins used for gain control
 SOFTDAC_DEFAULT_VREF = 5.0          # Default reference voltage (V)
 
 # Gain Configurations
-SOFTDAC_GAIN_VOLTAGES = np.array([
+SOFTDAC_GAIN_VOLTAGES = [
     0.04242424,  # Gain level 0
     0.09060606,  # Gain level 1
     0.13303030,  # Gain level 2
@@ -40,11 +48,11 @@ SOFTDAC_GAIN_VOLTAGES = np.array([
     0.28878788,  # Gain level 5
     0.33030303,  # Gain level 6
     0.42030303   # Gain level 7
-])
+]
 
 # Pin state configurations for each gain level
 # Format: [PIN_8, PIN_9, PIN_10, PIN_11]
-SOFTDAC_GAIN_REGISTERS = np.array([
+SOFTDAC_GAIN_REGISTERS = [
     [0, 0, 0, 0],  # Gain level 0
     [1, 0, 0, 0],  # Gain level 1
     [0, 1, 0, 0],  # Gain level 2
@@ -54,7 +62,7 @@ SOFTDAC_GAIN_REGISTERS = np.array([
     [0, 1, 1, 0],  # Gain level 6
     [1, 1, 1, 0],  # Gain level 7
     [0, 0, 0, 1]   # Gain level 8
-])
+]
 
 # General Board Configuration
 CHANNELS_PER_BOARD = 8
@@ -75,6 +83,28 @@ CHANNEL_MIN_VOLTAGE_STEP = 2e-3           # Minimum voltage step size (V)
 CHANNEL_VOLTAGE_GAIN = 2                  # Default gain for voltage measurements
 CHANNEL_CURRENT_GAIN = 16                 # Default gain for current measurements
 CHANNEL_ADC_SETTLE_TIME = 0.01           # ADC settling time (seconds)
+CHANNEL_MUX_SETTLE_TIME = 0.002          # Settling after the mux switches to a channel whose DAC has settled (seconds)
+
+# ADS1115 Acquisition Configuration
+ADC_DATA_RATE = 128                       # Samples per second: 8-860, lower rates average longer and are less noisy
+ADC_POLL_INTERVAL = 0.0005                # Time between ready checks once the nominal conversion time has passed (seconds)
+ADC_READ_TIMEOUT = 0.1                    # Extra time after which a conversion counts as failed (seconds)
+ADC_GAINS = (2/3, 1, 2, 4, 8, 16)         # ADS1115 PGA gains
+ADC_REFERENCE_RANGE = 4.096               # Full scale range at gain 1, the range at gain g is this / g (V)
+
+# ADC Auto-Ranging
+ADC_AUTORANGE = True                      # Pick the PGA gain per channel from recent readings
+AUTORANGE_HIGH_FRACTION = 0.9             # Above this fraction of the full scale the gain goes down
+AUTORANGE_LOW_FRACTION = 0.8              # Below this fraction of the next higher gain's range the gain may go up
+AUTORANGE_HOLD = 3                        # Readings in a row that must fit the higher gain before it is used
+
+# Settle Time Calibration
+SETTLE_CALIBRATION_FILE = "settle_calibration.json"  # Per-channel settle times measured by calibrate_settle_time
+SETTLE_CAL_VOLTAGES = (0.1, 0.6)          # Low and high voltage of the calibration step (V)
+SETTLE_CAL_TOLERANCE = 0.002              # Band around the final reading that counts as settled (V)
+SETTLE_CAL_WINDOW = 0.1                   # Time a step response is recorded, also the upper settle limit (seconds)
+SETTLE_CAL_DATA_RATE = 860                # ADC samples per second while recording a step response
+SETTLE_CAL_MARGIN = 1.5                   # Factor applied to the measured settle time
 
 # MPP Tracking Parameters
 CHANNEL_POWER_INCREASE_FACTOR = 1.1       # Factor to increase step size when power increases
@@ -88,8 +118,52 @@ CHANNEL_DAC_VOLTAGE_SCALE = 2**16 / 8    # DAC voltage scaling factor (16-bit, 0
 CHANNEL_DATA_DIRECTORY = "data"           # Directory for MPP tracking data
 CHANNEL_IV_DIRECTORY = "IV"               # Directory for IV sweep data
 CHANNEL_DEFAULT_HEADER = 'timestamp,measured_voltage,measured_current,dac_value,adc_gain_v,adc_gain_c'
+LOG_FLUSH_ROWS = 256                      # Buffered rows per file before writing to disk
+LOG_FLUSH_INTERVAL = 5.0                  # Maximum age of buffered rows (seconds)
+LOG_QUEUE_SIZE = 10000                    # Records queued for the logging thread before backpressure
+LOG_QUEUE_TIMEOUT = 0.1                   # Time acquisition waits on a full queue before dropping (seconds)
+LOG_BATCH_SIZE = 512                      # Records the logging thread handles per batch
+LOG_FORMAT = 'csv'                        # Tracking data format: 'csv' or 'binary'
+
+# Network Sync Configuration
+SYNC_PERIOD = 30.0                        # Time between syncs of the data files to the share (seconds)
+SYNC_SLOW_THRESHOLD = 5.0                 # A sync pass slower than this counts as a slow share (seconds)
+SYNC_MAX_BACKOFF = 600.0                  # Longest time between syncs when the share is slow (seconds)
+SYNC_CHUNK_SIZE = 1 << 20                 # Bytes copied per read/write
+
+# Binary Log Configuration
+BINLOG_EXTENSION = '.obl'                 # File extension of binary tracking logs
+BINLOG_LAYOUT = 'channel'                 # One file per 'channel' or per 'board'
+BINLOG_GAINS = (2/3, 1, 2, 4, 8, 16)      # ADS1115 gains, stored as their index (uint8)
 
 # IV Sweep Configuration
 CHANNEL_IV_START_VALUE = 0                # Default start value for IV sweep
 CHANNEL_IV_END_VALUE = 1000              # Default end value for IV sweep
-CHANNEL_IV_STEP_SIZE = 1                 # Default step size for IV sweep
\ No newline at end of file
+CHANNEL_IV_STEP_SIZE = 1                 # Default step size for IV sweep
+# Adaptive JV Sweep Configuration
+ADAPTIVE_SWEEP_CURRENT_FRACTION = 0.05    # Aimed-for current change per step, relative to the largest current
+ADAPTIVE_SWEEP_MAX_STEP_FACTOR = 4        # Coarsest step relative to the uniform step
+ADAPTIVE_SWEEP_MIN_STEP_FACTOR = 0.25     # Finest step relative to the uniform step
+
+# Deadline Scheduler Configuration
+SCHEDULER_MAX_TRACKING_GAP = 60.0         # Longest time a cell may go untracked while others are swept (seconds)
+SCHEDULER_COST_SMOOTHING = 0.2            # Weight of the newest duration in the running work-unit cost estimates
+
+# Parallel Bus Workers
+WORKER_ITERATIONS = 4                     # Tracking iterations per channel visit of a bus worker
+WORKER_INTERVAL = 1e-4                    # Time between tracking iterations of a bus worker (seconds)
+WORKER_STATUS_INTERVAL = 10.0             # Time between status lines of the coordinator (seconds)
+WORKER_REPORT_TIMEOUT = 0.1               # Longest wait of the coordinator for a worker report (seconds)
+
+# Metrics Configuration
+METRICS_ENV_VAR = 'OCTOBOARD_METRICS'     # Set to 1 to record metrics from the start
+METRICS_LATENCY_BUCKETS = (               # Upper bounds of the latency histogram buckets (seconds)
+    1e-5, 3e-5, 1e-4, 3e-4, 1e-3, 3e-3, 1e-2, 3e-2, 0.1, 0.3, 1.0, 3.0, 10.0, 30.0, 100.0,
+)
+METRICS_REPORT_INTERVAL = 60.0            # Time between metrics summaries of the CLI (seconds)
+METRICS_HOST = '127.0.0.1'                # Interface of the Prometheus metrics endpoint, local only
+METRICS_PORT = 9464                       # Default port of the Prometheus metrics endpoint
+METRICS_PORT_ENV_VAR = 'OCTOBOARD_METRICS_PORT'  # Set to a port to serve the GUI's metrics
+METRICS_CYCLE_NAMES = (                   # Timed loops exported as cycle times
+    'manager.cycle', 'tracking.cycle', 'array_tracker.cycle', 'engine.track',
+)
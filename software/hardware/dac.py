@@ -0,0 +1,39 @@
+import adafruit_mcp4728
+
+from .constants import MAX_CHANNELS_PER_DAC
+
+
+class FastMCP4728(adafruit_mcp4728.MCP4728):
+    """MCP4728 that can update all four outputs in one I2C transaction.
+
+    The Adafruit driver writes one channel per transaction with the
+    multi-write command. The fast write command takes the 12-bit codes of
+    channels A to D in a single write, and each output follows as soon as its
+    two bytes are received. VREF and gain are not part of a fast write, so the
+    settings made through the channels are kept.
+    """
+
+    @property
+    def channels(self):
+        """The four driver channels, A to D."""
+        return (self.channel_a, self.channel_b, self.channel_c, self.channel_d)
+
+    def fast_write(self, raw_values):
+        """Write the 12-bit codes of all four channels at once.
+
+        Args:
+            raw_values (sequence): Code per channel A to D, None keeps a channel's code.
+        """
+        if len(raw_values) != MAX_CHANNELS_PER_DAC:
+            raise ValueError(f"Expected {MAX_CHANNELS_PER_DAC} values, got {len(raw_values)}")
+        if any(value is not None and not 0 <= value <= 0xFFF for value in raw_values):
+            raise AttributeError("`raw_value` must be a 12-bit integer between 0 and 4095")
+        buffer = bytearray()
+        for channel, raw_value in zip(self.channels, raw_values):
+            if raw_value is not None:
+                # Keep the driver's cached value in sync without a write of its own
+                channel._raw_value = raw_value
+            # Fast write: 0 0 PD1 PD0 D11-D8, D7-D0 (power-down bits 0 = normal operation)
+            buffer += channel.raw_value.to_bytes(2, "big")
+        with self.i2c_device as i2c:
+            i2c.write(buffer)
@@ -0,0 +1,86 @@
+from adafruit_mcp230xx.mcp23017 import MCP23017
+
+# MCP23017 register addresses (IOCON.BANK = 0, A/B pairs are sequential)
+MCP23017_IODIR = 0x00
+MCP23017_OLAT = 0x14
+
+
+class CachedMCP23017:
+    """Shadow-register layer on top of an Adafruit ``MCP23017``.
+
+    The driver's ``get_pin(n).switch_to_output(value)`` reads and rewrites
+    IODIR and GPIO for every single pin. This class instead keeps copies of the
+    IODIR and OLAT registers. It applies a whole pin pattern (analog mux
+    address, Softdac gain) with at most one write per register, and writes
+    nothing if the pins already have the requested state. Only the port
+    (A or B) whose bits change is written.
+
+    The shadow copies are read from the chip once at construction. Call
+    :meth:`refresh` if the chip may have been changed by someone else, e.g.
+    after a reset.
+
+    Attributes:
+        mcp (MCP23017): The wrapped driver, used for its register access.
+        iodir (int): Shadow copy of IODIRA/B (1 = input).
+        olat (int): Shadow copy of OLATA/B (output levels).
+        writes (int): Register writes done so far.
+    """
+
+    def __init__(self, mcp: MCP23017):
+        self.mcp = mcp
+        self.writes = 0
+        self.refresh()
+
+    def refresh(self):
+        """Re-read IODIR and OLAT from the chip."""
+        self.iodir = self.mcp.iodir
+        self.olat = self.mcp._read_u16le(MCP23017_OLAT)
+
+    def write_pins(self, pins):
+        """Make pins outputs with the given levels in one go.
+
+        The output latch is written before the direction register, so a pin
+        that turns into an output starts at the requested level.
+
+        Args:
+            pins (dict): Maps pin numbers (0-15) to their level.
+
+        Returns:
+            bool: True if a register had to be written.
+        """
+        mask = 0
+        values = 0
+        for pin, value in pins.items():
+            if not 0 <= pin < 16:
+                raise ValueError(f"Invalid MCP23017 pin {pin}")
+            mask |= 1 << pin
+            if value:
+                values |= 1 << pin
+        olat = (self.olat & ~mask) | values
+        iodir = self.iodir & ~mask
+        written = self._write_register(MCP23017_OLAT, self.olat, olat)
+        self.olat = olat
+        written |= self._write_register(MCP23017_IODIR, self.iodir, iodir)
+        self.iodir = iodir
+        return written
+
+    def write_pin(self, pin, value):
+        """Make a single pin an output with the given level."""
+        return self.write_pins({pin: value})
+
+    def output_level(self, pin):
+        """Return the cached output level of a pin."""
+        return bool(self.olat >> pin & 1)
+
+    def _write_register(self, register, old, new):
+        changed = old ^ new
+        if not changed:
+            return False
+        if changed & 0x00FF and changed & 0xFF00:
+            self.mcp._write_u16le(register, new)
+        elif changed & 0x00FF:
+            self.mcp._write_u8(register, new & 0xFF)
+        else:
+            self.mcp._write_u8(register + 1, new >> 8)
+        self.writes += 1
+        return True
@@ -8,12 +8,19 @@ class ExtendedI2C(I2C):
     """Extended I2C is a busio extension that allows creating a compatible
     I2C object using the Bus ID number. The bus ID is the number at the end
     of /dev/i2c-# and you can find which I2C devices you have by typing
-    ``ls /dev/i2c*``"""
+    ``ls /dev/i2c*``
+
+    :meth:`try_lock` takes the bus' ``RLock``, so drivers in different threads
+    exclude each other, and a thread already holding the lock (like the
+    TCA9548A switch) can still lock the bus for a driver transaction. A bus
+    handed out by :func:`open_bus` is shared, :meth:`deinit` only closes it
+    once its last user released it."""
 
     def __init__(self, bus_id, frequency=400000):
         self.init(bus_id, frequency)
     def init(self, bus_id, frequency):
-        self.deinit()
+        # Close a previous device of this object only, it is not yet a shared bus user
+        I2C.deinit(self)
 
         # Check if the file /dev/i2c-{bus_id} exists and error if not
         if not path.exists(f"/dev/i2c-{bus_id}"):
@@ -21,4 +28,91 @@ class ExtendedI2C(I2C):
         # Attempt to open using _I2C
         self._i2c = _I2C(bus_id, mode=_I2C.MASTER, baudrate=frequency)
         self._lock = threading.RLock()
-        
\ No newline at end of file
+
+    def try_lock(self):
+        """Attempt to grab the bus lock without waiting."""
+        return self._lock.acquire(blocking=False)
+
+    def unlock(self):
+        """Release the bus lock taken with :meth:`try_lock`."""
+        self._lock.release()
+
+    def deinit(self):
+        """Release one user of the bus, the device is closed with the last one."""
+        if _release(self):
+            super().deinit()
+
+
+# Factory used by open_bus(); replaced by the simulator to run without /dev/i2c-*
+_bus_factory = None
+
+# Shared bus objects by bus number: [bus, number of users]
+_open_buses = {}
+_open_buses_lock = threading.Lock()
+
+
+def set_bus_factory(factory):
+    """Route bus creation through a custom factory.
+
+    The shared buses of the previous factory are forgotten.
+
+    Args:
+        factory (callable): Called with the bus number, returns an I2C-compatible
+            bus object. Pass None to restore the hardware ExtendedI2C.
+    """
+    global _bus_factory
+    with _open_buses_lock:
+        _bus_factory = factory
+        _open_buses.clear()
+
+
+def open_bus(bus_id, frequency=400000):
+    """Return the shared bus object of a bus number, opening it on first use.
+
+    All boards, switches and threads on a bus get the same object and with it
+    the same lock. Every call counts as one user, release it with
+    :func:`close_bus`.
+    """
+    with _open_buses_lock:
+        entry = _open_buses.get(bus_id)
+        if entry is not None:
+            entry[1] += 1
+            return entry[0]
+
+    # Opened without holding the registry lock, the constructor may take it
+    bus = _bus_factory(bus_id) if _bus_factory is not None else ExtendedI2C(bus_id, frequency)
+    with _open_buses_lock:
+        entry = _open_buses.get(bus_id)
+        if entry is None:
+            entry = _open_buses[bus_id] = [bus, 0]
+        entry[1] += 1
+    if entry[0] is not bus:
+        # Another thread opened the bus in the meantime, use that one
+        bus.deinit()
+    return entry[0]
+
+
+def bus_users(bus_id):
+    """Number of users of the shared bus with the given number, 0 if it is not open."""
+    with _open_buses_lock:
+        entry = _open_buses.get(bus_id)
+        return entry[1] if entry is not None else 0
+
+
+def _release(bus):
+    """Drop one user of a shared bus. Returns True if the bus is no longer in use."""
+    with _open_buses_lock:
+        for bus_id, entry in _open_buses.items():
+            if entry[0] is bus:
+                entry[1] -= 1
+                if entry[1] > 0:
+                    return False
+                del _open_buses[bus_id]
+                break
+    return True
+
+
+def close_bus(bus):
+    """Release one user of a bus from :func:`open_bus`, deinitialising it after the last one."""
+    if _release(bus):
+        bus.deinit()
@@ -1,7 +1,11 @@
 
 from .constants import *
 from .oboard import OBoard
-from .i2c import ExtendedI2C
+from .i2c import open_bus, close_bus
+from .schedule import Schedule
+from ..metrics import timed
+from .calibration import load_settle_calibration, save_settle_calibration
+from .topology import board_addresses, load_topology, save_topology, verify_topology
 
 class OBoardManager:
     """
@@ -14,7 +18,8 @@ class OBoardManager:
     Attributes:
         oboards (list[OBoard]): List of initialized and configured OBoard instances.
         i2c_num (int): The I2C bus number being used.
-        i2c (ExtendedI2C): The I2C interface instance for communication.
+        i2c (ExtendedI2C): The shared I2C bus, also used by the boards.
+        tca_channel (int): TCA9548A channel the boards are behind, None without a switch.
 
     Example:
         >>> manager = OBoardManager(i2c_num=1)
@@ -32,12 +37,33 @@ class OBoardManager:
         on the same I2C bus.
     """
     def __init__(self, i2c_num=BOARD_DEFAULT_I2C_NUM, 
-                 possible_offsets=BOARD_DEFAULT_OFFSET_RANGE):
-        """Initialize the OBoardManager by scanning I2C devices and setting up boards accordingly."""
+                 possible_offsets=BOARD_DEFAULT_OFFSET_RANGE, topology_file=None, tca_channel=None):
+        """Initialize the OBoardManager by scanning I2C devices and setting up boards accordingly.
+
+        With a ``topology_file``, the boards stored for this bus (and TCA9548A
+        channel) are checked with a few address probes and used without a full
+        scan. The bus is scanned, and the file updated, if there is no entry
+        or the probes do not match.
+        """
         self.oboards = []
         self.i2c_num = i2c_num
-        self.i2c = ExtendedI2C(i2c_num)
-        self.setup_boards(possible_offsets)
+        self.tca_channel = tca_channel
+        self.i2c = open_bus(i2c_num)
+        offsets = None
+        if topology_file is not None:
+            offsets = load_topology(i2c_num, tca_channel, topology_file)
+            if offsets is not None and not verify_topology(self.i2c, offsets, possible_offsets):
+                print(f"Boards on I2C bus {i2c_num} do not match {topology_file}, scanning")
+                offsets = None
+        if offsets is None:
+            self.setup_boards(possible_offsets)
+            if topology_file is not None:
+                save_topology(i2c_num, [oboard.i2c_address_offset for oboard in self.oboards],
+                              tca_channel, topology_file)
+        else:
+            for offset in offsets:
+                self.oboards.append(OBoard(i2c_num=self.i2c_num, i2c_address_offset=offset))
+            print(f"Using {len(offsets)} boards with I2C offsets {offsets} from {topology_file}")
 
     def setup_boards(self, possible_offsets):
         """Scan I2C addresses and initialize boards only if all required devices are detected."""
@@ -49,10 +75,7 @@ class OBoardManager:
         print(f"Found I2C devices at addresses: {found_devices}")
 
         for offset in possible_offsets:
-            expected_device_addresses = set([
-                base + (offset * I2C_OFFSET_MULTIPLIER[base])
-                for base in I2C_BASE_ADDRESSES
-            ])
+            expected_device_addresses = set(board_addresses(offset))
             if expected_device_addresses.issubset(found_devices):
                 try:
                     ob = OBoard(i2c_num=self.i2c_num, i2c_address_offset=offset)
@@ -65,6 +88,7 @@ class OBoardManager:
                 print(f"Not all devices found for board with offset {offset}. "
                       f"Expected {expected_device_addresses}, found {found_devices}")
 
+    @timed('manager.cycle')
     def cycle_all_channels(self, iterations_per_channel=BOARD_DEFAULT_ITERATIONS, 
                           interval=BOARD_DEFAULT_INTERVAL):
         """
@@ -79,9 +103,48 @@ class OBoardManager:
             interval (float, optional): Time interval between iterations in seconds.
                                       Defaults to 0.001.
         """
+        for step in self.schedule():
+            step.item.mpp_track(iterations=iterations_per_channel, interval=interval)
+
+    def schedule(self):
+        """Return the Schedule of all channels of the detected boards."""
+        return Schedule.from_managers([self])
+
+    def channels(self):
+        """Return all channels of the detected boards."""
+        return [channel for oboard in self.oboards for channel in oboard.channel]
+
+    def set_all_voltages(self, voltage):
+        """Set every channel of the detected boards to the same voltage, two writes per board."""
         for oboard in self.oboards:
-            for channel in oboard.channel:
-                channel.mpp_track(iterations=iterations_per_channel, interval=interval)
+            oboard.set_all_voltages(voltage)
+
+    def calibrate_settle_times(self, file_name=SETTLE_CALIBRATION_FILE, **kwargs):
+        """Calibrate the settle time of every channel and store the results in a file.
+
+        Args:
+            file_name (str): Calibration file, entries of other buses are kept.
+            **kwargs: Passed to :meth:`Channel.calibrate_settle_time`.
+        """
+        for oboard in self.oboards:
+            oboard.calibrate_settle_times(**kwargs)
+        save_settle_calibration(self.channels(), file_name)
+
+    def load_settle_calibration(self, file_name=SETTLE_CALIBRATION_FILE):
+        """Use the stored settle times of a calibration file for the detected channels.
+
+        Returns:
+            int: Number of channels with a calibrated settle time.
+        """
+        return load_settle_calibration(self.channels(), file_name)
+
+    def deinit(self):
+        """Release the bus of the manager and its boards, closing it after the last user."""
+        for oboard in self.oboards:
+            oboard.deinit()
+        if self.i2c is not None:
+            close_bus(self.i2c)
+            self.i2c = None
 
     def print_all_boards_status(self):
         """Print the status of all boards for debugging purposes."""
@@ -1,16 +1,14 @@
-from . import ExtendedI2C
+from .i2c import open_bus, close_bus
 from .channel import Channel
-from . import Softdac
-import adafruit_mcp4728
-import adafruit_ads1x15.ads1115 as ADS
+from .sdac import Softdac
+from .gpio import CachedMCP23017
+from .adc import PacedADS1115
+from .dac import FastMCP4728
+from .. import metrics
 from adafruit_mcp230xx.mcp23017 import MCP23017
-import numpy as np
 import time
-from datetime import datetime
-from adafruit_blinka.microcontroller.generic_linux.i2c import I2C as _I2C
-from adafruit_blinka.microcontroller.generic_linux.spi import SPI as _SPI
-from os import path
-import threading
+import os
+from functools import cached_property
 
 from .constants import (
     BOARD_DEFAULT_I2C_NUM,
@@ -23,8 +21,16 @@ from .constants import (
     MAX_CHANNELS_PER_DAC,
     I2C_OFFSET_MULTIPLIER,
     CHANNEL_VOLTAGE_GAIN,
-    CHANNEL_CURRENT_GAIN,
+    CHANNEL_DAC_GAIN,
     CHANNEL_ADC_SETTLE_TIME,
+    CHANNEL_DEFAULT_HEADER,
+    CHANNEL_IV_DIRECTORY,
+    CHANNEL_IV_START_VALUE,
+    CHANNEL_IV_END_VALUE,
+    CHANNEL_IV_STEP_SIZE,
+    ADC_DATA_RATE,
+    MUX_CONTROL_PIN,
+    MUX_SELECT_PINS,
 )
 
 class OBoard:
@@ -32,20 +38,28 @@ class OBoard:
 
     Attributes:
         ID (str): Identifier for the board based on configuration.
+        i2c_address_offset (int): Address offset of the board's devices.
+        i2c (ExtendedI2C): The shared bus of the board, see :func:`open_bus`.
         i2c_base_address (list): Base addresses for devices connected via I2C.
         ic2_base_devices (list): List of devices on the I2C bus.
-        Dac_0 (device): First DAC device on the board.
-        Dac_1 (device): Second DAC device on the board.
+        Dac_0 (FastMCP4728): First DAC device on the board (channels 0-3).
+        Dac_1 (FastMCP4728): Second DAC device on the board (channels 4-7).
         Mux (device): Multiplexer on the board.
-        Adc (device): ADC device on the board.
+        gpio (CachedMCP23017): Shadow-register access to the Mux pins.
+        Adc (PacedADS1115): ADC device on the board.
         softdac (Softdac): Software-based DAC for fine control.
         channel (list): List of channels controlled by this board.
+
+    The devices are created when they are first used.
     """
     
-    def __init__(self, i2c_num=BOARD_DEFAULT_I2C_NUM, i2c_address_offset=2, debug=False):
+    def __init__(self, i2c_num=BOARD_DEFAULT_I2C_NUM, i2c_address_offset=2, debug=False,
+                 adc_data_rate=ADC_DATA_RATE):
         """Initialize an OBoard with specified I2C pins and address offset."""
-        i2c = ExtendedI2C(i2c_num)
+        i2c = open_bus(i2c_num)
+        self.i2c = i2c
         self.i2c_num = i2c_num
+        self.i2c_address_offset = i2c_address_offset
         self.debug = debug
         self.ID = f"Bus_{i2c_num}_offset{i2c_address_offset}_"
         
@@ -59,38 +73,61 @@ class OBoard:
         
         self.i2c_base_devices = ["mux", "ADC", "DAC_0", "DAC_1"]
         
-        # Initialize devices with calculated addresses
-        self.Dac_0 = adafruit_mcp4728.MCP4728(
-            i2c, 
-            address=I2C_BASE_DAC_0 + i2c_address_offset * I2C_OFFSET_MULTIPLIER[I2C_BASE_DAC_0]
-        )
-        self.Dac_1 = adafruit_mcp4728.MCP4728(
-            i2c, 
-            address=I2C_BASE_DAC_1 + i2c_address_offset * I2C_OFFSET_MULTIPLIER[I2C_BASE_DAC_1]
-        )
-        self.Mux = MCP23017(
-            i2c, 
-            address=I2C_BASE_MUX + i2c_address_offset * I2C_OFFSET_MULTIPLIER[I2C_BASE_MUX]
+        # The devices are created on first use, a board from a cached topology
+        # costs no bus transaction until it is used
+        self.adc_data_rate = adc_data_rate
+
+        # Initialize channels
+        self.channel = [Channel(self, Dac=None, ind=ch) for ch in range(CHANNELS_PER_BOARD)]
+
+    @cached_property
+    def Dac_0(self):
+        return self._open_dac(I2C_BASE_DAC_0)
+
+    @cached_property
+    def Dac_1(self):
+        return self._open_dac(I2C_BASE_DAC_1)
+
+    def _open_dac(self, base):
+        dac = FastMCP4728(self.i2c, address=base + self.i2c_address_offset * I2C_OFFSET_MULTIPLIER[base])
+        for dac_channel in dac.channels:
+            dac_channel.gain = CHANNEL_DAC_GAIN
+        return dac
+
+    @cached_property
+    def Mux(self):
+        return MCP23017(
+            self.i2c, 
+            address=I2C_BASE_MUX + self.i2c_address_offset * I2C_OFFSET_MULTIPLIER[I2C_BASE_MUX]
         )
-        self.Adc = ADS.ADS1115(
-            i2c, 
+
+    @cached_property
+    def Adc(self):
+        return PacedADS1115(
+            self.i2c, 
             gain=CHANNEL_VOLTAGE_GAIN,
-            data_rate=CHANNEL_CURRENT_GAIN,
-            address=I2C_BASE_ADC + i2c_address_offset * I2C_OFFSET_MULTIPLIER[I2C_BASE_ADC]
+            data_rate=self.adc_data_rate,
+            address=I2C_BASE_ADC + self.i2c_address_offset * I2C_OFFSET_MULTIPLIER[I2C_BASE_ADC]
         )
-        self.softdac = Softdac(self.Mux)
-        
-        # Initialize channels
-        self.channel = []
-        for ch in range(CHANNELS_PER_BOARD):
-            dac = self.Dac_0 if ch < MAX_CHANNELS_PER_DAC else self.Dac_1
-            self.channel.append(
-                Channel(
-                    self,
-                    Dac=dac.__dict__[I2C_DAC_CHANNELS[ch % MAX_CHANNELS_PER_DAC]],
-                    ind=ch
-                )
-            )
+
+    @cached_property
+    def gpio(self):
+        return CachedMCP23017(self.Mux)
+
+    @cached_property
+    def softdac(self):
+        return Softdac(self.gpio)
+
+    def dac_channel(self, ind):
+        """Return the MCP4728 channel driving a board channel."""
+        dac = self.Dac_0 if ind < MAX_CHANNELS_PER_DAC else self.Dac_1
+        return getattr(dac, I2C_DAC_CHANNELS[ind % MAX_CHANNELS_PER_DAC])
+
+    def deinit(self):
+        """Release the board's use of the shared bus."""
+        if self.i2c is not None:
+            close_bus(self.i2c)
+            self.i2c = None
 
     def print(self, message):
         """Prints a message if debugging is enabled."""
@@ -99,24 +136,116 @@ class OBoard:
 
     def aMux_enable(self):
         """Enable the analog multiplexer by setting the control pin low."""
-        pin = self.Mux.get_pin(MUX_CONTROL_PIN)
-        pin.switch_to_output(value=0)
+        self.gpio.write_pin(MUX_CONTROL_PIN, 0)
 
     def aMux_disable(self):
         """Disable the analog multiplexer by setting the control pin high."""
-        pin = self.Mux.get_pin(MUX_CONTROL_PIN)
-        pin.switch_to_output(value=1)
+        self.gpio.write_pin(MUX_CONTROL_PIN, 1)
 
-    def aMux_select_channel(self, channel: int):
-        """Select a specific channel on the multiplexer."""
+    @metrics.timed('mux.select')
+    def aMux_select_channel(self, channel: int, settle_time=CHANNEL_ADC_SETTLE_TIME):
+        """Select a specific channel on the multiplexer.
+
+        Waits ``settle_time`` seconds after switching. Nothing is written and
+        no time is spent if the channel is already selected.
+
+        Returns:
+            bool: True if the multiplexer switched (and has settled).
+        """
         if channel < 0 or channel >= CHANNELS_PER_BOARD:
             raise ValueError("Invalid channel number")
         
-        time.sleep(CHANNEL_ADC_SETTLE_TIME)  # Allow settling time for channel switch
-        
-        # Set address bits
-        for bit in range(3):  # 3 bits for 8 channels
-            val = bool(channel >> bit & 1)
-            pin = self.Mux.get_pin(4 + bit)  # Pins 4, 5, 6 used for channel selection
-            self.print(f"Setting pin {4 + bit} to {'HIGH' if val else 'LOW'}")
-            pin.switch_to_output(value=val)
\ No newline at end of file
+        # Set all address bits with one register write, none if already selected
+        bits = {pin: channel >> bit & 1 for bit, pin in enumerate(MUX_SELECT_PINS)}
+        self.print(f"Setting pins {MUX_SELECT_PINS} to {list(bits.values())}")
+        switched = self.gpio.write_pins(bits)
+        if switched:
+            metrics.count('mux.switches')
+        if switched and settle_time:
+            time.sleep(settle_time)  # Allow settling time for channel switch
+        return switched
+
+    def set_voltages(self, voltages):
+        """Set the voltages of all channels with one fast write per DAC.
+
+        Applies the same limits and scaling as :meth:`Channel.set_voltage`,
+        but takes two I2C transactions for the whole board instead of eight.
+
+        Args:
+            voltages (sequence): Voltage per channel index (V), None keeps a channel's voltage.
+        """
+        if len(voltages) != CHANNELS_PER_BOARD:
+            raise ValueError(f"Expected {CHANNELS_PER_BOARD} voltages, got {len(voltages)}")
+        for first, dac in enumerate((self.Dac_0, self.Dac_1)):
+            first *= MAX_CHANNELS_PER_DAC
+            dac.fast_write([
+                None if voltage is None else channel.dac_code(voltage)
+                for channel, voltage in zip(self.channel[first:first + MAX_CHANNELS_PER_DAC],
+                                            voltages[first:first + MAX_CHANNELS_PER_DAC])
+            ])
+
+    def set_all_voltages(self, voltage):
+        """Set all channels to the same voltage, see :meth:`set_voltages`."""
+        self.set_voltages([voltage] * CHANNELS_PER_BOARD)
+
+    def perform_iv_sweep(self, start_value=CHANNEL_IV_START_VALUE,
+                         end_value=CHANNEL_IV_END_VALUE,
+                         step_size=CHANNEL_IV_STEP_SIZE, channels=None, stop_event=None):
+        """Sweep all channels of the board together.
+
+        Each step sets every DAC output with :meth:`set_voltages`, waits once for
+        the longest ``settle_time`` of the swept channels and then reads the
+        channels one after the other, each after its ``mux_settle_time``. The
+        files, rows and per-channel voltage limits are those of
+        :meth:`Channel.perform_iv_sweep`, which waits through every step's
+        settle time for each channel on its own.
+
+        Args:
+            start_value (int): First sweep value.
+            end_value (int): Last sweep value.
+            step_size (int): Sweep step.
+            channels (list[Channel], optional): Channels to sweep, by default all of the board.
+                The others keep their voltage.
+            stop_event (threading.Event, optional): Ends the sweep before the next step once set.
+        """
+        channels = self.channel if channels is None else channels
+        settle_time = max(channel.settle_time for channel in channels)
+        file_names = [os.path.join(CHANNEL_IV_DIRECTORY, f'{channel.id}_data.csv')
+                      for channel in channels]
+        os.makedirs(CHANNEL_IV_DIRECTORY, exist_ok=True)
+        for channel, file_name in zip(channels, file_names):
+            channel.writers.open(file_name, header=CHANNEL_DEFAULT_HEADER, mode='w')
+
+        voltages = [None] * CHANNELS_PER_BOARD
+        try:
+            for dac_value in range(start_value, end_value + 1, step_size):
+                if stop_event is not None and stop_event.is_set():
+                    break
+                for channel in channels:
+                    voltages[channel.ind] = dac_value
+                self.set_voltages(voltages)
+                time.sleep(settle_time)
+
+                for channel, file_name in zip(channels, file_names):
+                    # The first channel may already be selected, its DAC has settled anyway
+                    self.aMux_select_channel(channel.ind, settle_time=channel.mux_settle_time)
+                    sample = channel.read_selected_sample()
+                    channel.writers.write_row(file_name, (
+                        sample.timestamp, sample.voltage, sample.current,
+                        channel.dac.raw_value, sample.gain_v, sample.gain_c))
+        finally:
+            # A sweep is complete once written, keep only tracking files open
+            for channel, file_name in zip(channels, file_names):
+                channel.writers.close(file_name)
+
+        for channel in channels:
+            voltages[channel.ind] = 0
+        self.set_voltages(voltages)
+
+    def calibrate_settle_times(self, **kwargs):
+        """Calibrate the settle time of every channel, see :meth:`Channel.calibrate_settle_time`.
+
+        Returns:
+            dict: Calibration result per channel index.
+        """
+        return {channel.ind: channel.calibrate_settle_time(**kwargs) for channel in self.channel}
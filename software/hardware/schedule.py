@@ -0,0 +1,277 @@
+import time
+from typing import NamedTuple, Any
+
+from .constants import (
+    TCA9548A_SETTLE_TIME,
+    CHANNEL_ADC_SETTLE_TIME,
+    SCHEDULER_MAX_TRACKING_GAP,
+    SCHEDULER_COST_SMOOTHING,
+)
+
+
+class ScheduleStep(NamedTuple):
+    """One unit of work on a channel.
+
+    Attributes:
+        tca (int): TCA9548A channel the board is behind, None without a switch.
+        board: Sortable key of the board, e.g. its address offset.
+        channel (int): Channel index on the board (analog mux position).
+        item: The work item, e.g. a Channel.
+    """
+    tca: Any
+    board: Any
+    channel: int
+    item: Any
+
+
+class Schedule:
+    """Orders channel work to keep TCA9548A and analog mux switches to a minimum.
+
+    Steps are grouped by TCA branch, then by board, then by channel. Each TCA
+    branch is therefore selected once per cycle, and the analog mux of a board
+    only moves forward through its channels. The sort is stable, so steps for
+    the same channel keep their order.
+
+    Example:
+        >>> schedule = Schedule.from_managers(board_managers)
+        >>> print(schedule.describe(visit_settle_time=2 * channel.settle_time_per_sample))
+        >>> for step in schedule:
+        ...     step.item.mpp_track(iterations=2)
+
+    Attributes:
+        steps (list[ScheduleStep]): The ordered steps of one cycle.
+    """
+
+    def __init__(self, steps):
+        self.steps = sorted(steps, key=lambda step: (step.tca, step.board, step.channel))
+
+    @classmethod
+    def from_managers(cls, managers, tca_channels=None):
+        """Build a schedule over all channels of the boards of some OBoardManagers.
+
+        Args:
+            managers (list[OBoardManager]): Managers whose channels are scheduled.
+            tca_channels (list[int], optional): TCA9548A channel of each manager.
+                Boards are on separate buses or directly on the bus if not given.
+        """
+        steps = []
+        for index, manager in enumerate(managers):
+            tca = tca_channels[index] if tca_channels is not None else None
+            for board_index, oboard in enumerate(manager.oboards):
+                for channel in oboard.channel:
+                    steps.append(ScheduleStep(tca, (index, board_index), channel.ind, channel))
+        return cls(steps)
+
+    def __iter__(self):
+        return iter(self.steps)
+
+    def __len__(self):
+        return len(self.steps)
+
+    def transitions(self):
+        """Count the TCA and analog mux switches of one cycle.
+
+        The cycle is treated as repeating, so the switch from the last step back
+        to the first one is counted as well.
+
+        Returns:
+            tuple: (tca_switches, mux_switches)
+        """
+        tca_switches = 0
+        mux_switches = 0
+        previous = self.steps[-1] if self.steps else None
+        for step in self.steps:
+            if step.tca is not None and step.tca != previous.tca:
+                tca_switches += 1
+            if (step.tca, step.board, step.channel) != (previous.tca, previous.board,
+                                                        previous.channel):
+                mux_switches += 1
+            previous = step
+        return tca_switches, mux_switches
+
+    def budget(self, tca_settle_time=TCA9548A_SETTLE_TIME, mux_settle_time=CHANNEL_ADC_SETTLE_TIME,
+               visit_settle_time=0.0):
+        """Estimate the settle time spent per cycle.
+
+        Args:
+            tca_settle_time (float): Delay after each TCA9548A switch (seconds).
+            mux_settle_time (float): Delay after each analog mux switch (seconds).
+            visit_settle_time (float): Settle time the work of one step spends by itself,
+                e.g. ``iterations * Channel.settle_time_per_sample`` for tracking.
+
+        Returns:
+            dict: Switch counts and settle times in seconds per cycle.
+        """
+        tca_switches, mux_switches = self.transitions()
+        budget = {
+            'steps': len(self.steps),
+            'tca_switches': tca_switches,
+            'mux_switches': mux_switches,
+            'tca_settle': tca_switches * tca_settle_time,
+            'mux_settle': mux_switches * mux_settle_time,
+            'visit_settle': len(self.steps) * visit_settle_time,
+        }
+        budget['total_settle'] = budget['tca_settle'] + budget['mux_settle'] + budget['visit_settle']
+        return budget
+
+    def describe(self, **budget_kwargs):
+        """Return a one-line summary of :meth:`budget`."""
+        b = self.budget(**budget_kwargs)
+        return (f"{b['steps']} channels per cycle: {b['tca_switches']} TCA switches "
+                f"({b['tca_settle']:.2f} s), {b['mux_switches']} mux switches "
+                f"({b['mux_settle']:.2f} s), in-channel settling {b['visit_settle']:.2f} s, "
+                f"total settle budget {b['total_settle']:.2f} s")
+
+
+class DeadlineScheduler:
+    """Interleaves stepwise sweeps with tracking visits by earliest deadline.
+
+    Every cell must be tracked at least every ``max_gap`` seconds, except
+    while it is being swept. Sweeps are split into steps (one set point each),
+    and each call of :meth:`run_once` does a single unit of work: a tracking
+    visit of the cell with the earliest tracking deadline, or one step of the
+    running sweep. A sweep step is only taken if every tracking deadline can
+    still be met afterwards, estimated from the running average durations of
+    both kinds of work. If tracking alone already misses deadlines, sweep steps
+    and tracking visits alternate so that the sweep still ends. Without a sweep
+    the cells are tracked round robin in the order of ``keys``.
+
+    A cell's sweep is due ``interval`` seconds after its last one, and cells
+    that were never swept are due at once. All due cells of a group (a board)
+    are swept together in one job. When a sweep ends, the next due time of its
+    cells is pushed later until it is at least ``interval / len(keys)`` away
+    from the due times of the other cells, so that cells started together do
+    not stay due together.
+
+    Args:
+        keys (list): The cells, in tracking order (e.g. a compiled plan).
+        track (callable): ``track(key)`` does one tracking visit of a cell.
+        start_sweep (callable): ``start_sweep(keys)`` starts a sweep of some cells of a
+            group and returns a job whose ``step()`` takes one step and returns False
+            once the sweep has ended.
+        interval (float): Time between the sweeps of a cell (seconds).
+        group (callable, optional): Key of a cell's group, by default every cell is its own.
+        max_gap (float): Longest time a cell may go untracked (seconds).
+        last_sweep (dict, optional): Time of the last sweep per cell, missing or 0 if never swept.
+        clock (callable): Time source, in the time base of ``last_sweep``.
+
+    Attributes:
+        due (dict): Next sweep due time per cell.
+        last_tracked (dict): Time of the last tracking visit per cell.
+        max_seen_gap (float): Longest time a cell went untracked outside its own sweep (seconds).
+    """
+
+    def __init__(self, keys, track, start_sweep, interval, group=None,
+                 max_gap=SCHEDULER_MAX_TRACKING_GAP, last_sweep=None, clock=time.time):
+        self.keys = list(keys)
+        self.track = track
+        self.start_sweep = start_sweep
+        self.interval = interval
+        self.group = group or (lambda key: id(key))
+        self.max_gap = max_gap
+        self.clock = clock
+        self.spacing = interval / max(1, len(self.keys))
+        self.track_cost = 0.0
+        self.step_cost = 0.0
+        self.max_seen_gap = 0.0
+        self.job = None
+        self.job_keys = []
+        self.last_work = None
+
+        now = self.clock()
+        last_sweep = last_sweep or {}
+        self.due = {}
+        for key in self.keys:
+            last = last_sweep.get(key, 0)
+            self.due[key] = now if not last else self._stagger(key, last + interval)
+        self.last_tracked = {key: now for key in self.keys}
+
+    def _stagger(self, key, due):
+        """Push ``due`` later until no other cell is due within ``spacing`` of it."""
+        others = sorted(other_due for other, other_due in self.due.items() if other is not key)
+        for other_due in others:
+            if abs(due - other_due) < self.spacing:
+                due = other_due + self.spacing
+        return due
+
+    def _average(self, estimate, duration):
+        if not estimate:
+            return duration
+        return (1 - SCHEDULER_COST_SMOOTHING) * estimate + SCHEDULER_COST_SMOOTHING * duration
+
+    def _tracking_deadlines(self):
+        """Tracking deadlines of the cells that are not being swept, earliest first."""
+        swept = set(map(id, self.job_keys))
+        # Ties keep the tracking order, which makes plain tracking round robin
+        return sorted(((self.last_tracked[key] + self.max_gap, index, key)
+                       for index, key in enumerate(self.keys) if id(key) not in swept),
+                      key=lambda entry: entry[:2])
+
+    def _fits(self, start, deadlines):
+        """True if tracking the cells from ``start`` on meets every tracking deadline."""
+        finish = start
+        for deadline, _, _ in deadlines:
+            finish += self.track_cost
+            if finish > deadline:
+                return False
+        return True
+
+    def _sweep_next(self, now, deadlines):
+        """Decide whether the running sweep gets the next unit of work."""
+        if not deadlines:
+            return True
+        if not self.track_cost:
+            return False  # Measure a tracking visit first
+        if self._fits(now + self.step_cost, deadlines):
+            return True
+        if not self._fits(now, deadlines):
+            # Tracking alone cannot keep up, alternate so that the sweep still ends
+            return self.last_work == 'track'
+        return False
+
+    def run_once(self):
+        """Do one unit of work.
+
+        Returns:
+            str: 'track' or 'sweep', None if there is nothing to do.
+        """
+        now = self.clock()
+        if self.job is None:
+            due = [key for key in self.keys if self.due[key] <= now]
+            if due:
+                group = self.group(min(due, key=lambda key: self.due[key]))
+                self.job_keys = [key for key in due if self.group(key) == group]
+                self.job = self.start_sweep(self.job_keys)
+
+        deadlines = self._tracking_deadlines()
+        if self.job is not None and self._sweep_next(now, deadlines):
+            try:
+                running = self.job.step()
+            except Exception as e:
+                print(f"Error during sweep step, ending the sweep: {e}")
+                running = False
+            end = self.clock()
+            self.step_cost = self._average(self.step_cost, end - now)
+            if not running:
+                for key in self.job_keys:
+                    # Tracking resumes after the sweep, the gap counts from its end
+                    self.last_tracked[key] = end
+                    self.due[key] = end + self.interval
+                    self.due[key] = self._stagger(key, self.due[key])
+                self.job = None
+                self.job_keys = []
+            self.last_work = 'sweep'
+            return 'sweep'
+
+        if not deadlines:
+            return None
+        _, _, key = deadlines[0]
+        self.max_seen_gap = max(self.max_seen_gap, now - self.last_tracked[key])
+        try:
+            self.track(key)
+        finally:
+            end = self.clock()
+            self.track_cost = self._average(self.track_cost, end - now)
+            self.last_tracked[key] = end
+        self.last_work = 'track'
+        return 'track'
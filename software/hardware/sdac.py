@@ -4,6 +4,7 @@ from .constants import (
     SOFTDAC_GAIN_VOLTAGES,
     SOFTDAC_GAIN_REGISTERS
 )
+from ..metrics import timed
 
 class Softdac:
     """Software-driven DAC implementation using multiplexer for gain control.
@@ -13,7 +14,7 @@ class Softdac:
     corresponding voltage outputs.
     
     Attributes:
-        mux: Multiplexer device instance for pin control
+        mux (CachedMCP23017): GPIO layer of the multiplexer used for pin control
         vref (float): Reference voltage in volts
         _gain (int): Current gain setting
         
@@ -27,7 +28,7 @@ class Softdac:
         """Initialize the Softdac.
         
         Args:
-            mux_device: Multiplexer device instance for pin control
+            mux_device (CachedMCP23017): GPIO layer of the multiplexer used for pin control
             vref (float, optional): Reference voltage in volts. Defaults to DEFAULT_VREF.
         """
         self.mux = mux_device
@@ -44,6 +45,7 @@ class Softdac:
         return self._gain
 
     @gain.setter
+    @timed('softdac.gain')
     def gain(self, gain: int):
         """Set the gain level.
         
@@ -67,8 +69,7 @@ class Softdac:
             gain (int): Desired gain level
         """
         pin_values = SOFTDAC_GAIN_REGISTERS[gain]
-        for pin, value in zip(SOFTDAC_MUX_PINS, pin_values):
-            self.mux.set_pin(pin, bool(value))
+        self.mux.write_pins(dict(zip(SOFTDAC_MUX_PINS, pin_values)))
 
     @property
     def voltage(self):
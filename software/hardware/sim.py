@@ -0,0 +1,748 @@
+"""Simulated Octoboard hardware for running the tracker without a Raspberry Pi.
+
+The simulator works at the I2C register level: :class:`SimulatedI2C` is a drop-in
+replacement for :class:`ExtendedI2C` and the Adafruit drivers used by
+:class:`OBoard` (MCP23017, ADS1115, MCP4728) talk to register models of those
+chips. A TCA9548A switch can be placed on a bus to reproduce the GUI setup.
+Every board channel is wired to a :class:`DiodeCell` solar cell model.
+
+Example:
+    >>> rig = SimulatedRig.with_boards(i2c_nums=[1], offsets=range(2))
+    >>> rig.install()
+    >>> manager = OBoardManager(i2c_num=1)
+    >>> manager.cycle_all_channels(iterations_per_channel=2)
+"""
+
+import math
+import random
+import threading
+import time
+
+from . import i2c as _i2c_module
+from .constants import (
+    I2C_BASE_MUX,
+    I2C_BASE_ADC,
+    I2C_BASE_DAC_0,
+    I2C_BASE_DAC_1,
+    I2C_OFFSET_MULTIPLIER,
+    CHANNELS_PER_BOARD,
+    MAX_CHANNELS_PER_DAC,
+    CHANNEL_DEFAULT_SHUNT_RESISTANCE,
+    CHANNEL_DAC_VOLTAGE_SCALE,
+    MUX_CONTROL_PIN,
+    MUX_SELECT_PINS,
+    TCA9548A_ADDRESS,
+    TCA9548A_CHANNELS,
+)
+
+# Errno returned by the Linux I2C driver when a device does not acknowledge
+EREMOTEIO = 121
+
+# Bits on the wire per transferred byte (8 data bits + ACK)
+I2C_BITS_PER_BYTE = 9
+
+# Addresses tried by a Linux bus scan, each with a one byte read
+I2C_SCAN_ADDRESSES = range(0x03, 0x78)
+
+# Default diode model parameters of a simulated cell
+SIM_DEFAULT_PHOTOCURRENT = 5e-3       # Photocurrent (A)
+SIM_DEFAULT_SATURATION_CURRENT = 1e-12  # Diode saturation current (A)
+SIM_DEFAULT_IDEALITY = 1.5            # Diode ideality factor
+SIM_DEFAULT_SHUNT_RESISTANCE = 1e4    # Parallel resistance of the cell (Ohms)
+SIM_DEFAULT_TEMPERATURE = 298.15      # Cell temperature (K)
+
+# DAC code to cell bias voltage of the tracker package (inverse of Channel.set_voltage)
+SIM_DEFAULT_DAC_VOLTS_PER_CODE = 16 / CHANNEL_DAC_VOLTAGE_SCALE
+SIM_DEFAULT_DAC_OFFSET = 0.0
+
+# ADS1115 full scale range (V) and data rate (SPS) per config register field
+ADS1115_PGA_RANGES = [6.144, 4.096, 2.048, 1.024, 0.512, 0.256, 0.256, 0.256]
+ADS1115_DATA_RATES = [8, 16, 32, 64, 128, 250, 475, 860]
+
+BOLTZMANN_OVER_CHARGE = 8.617333262e-5  # k/q (V/K)
+
+
+def _nack(address):
+    return OSError(EREMOTEIO, f"Remote I/O error (no ACK from 0x{address:02x})")
+
+
+class DiodeCell:
+    """Single-diode solar cell model.
+
+    The current is positive in the power generating quadrant, matching the sign
+    convention of the tracker (P = V * I is maximised).
+
+    Attributes:
+        photocurrent (float): Light generated current in amperes.
+        saturation_current (float): Diode dark saturation current in amperes.
+        ideality (float): Diode ideality factor.
+        shunt_resistance (float): Parallel resistance in ohms.
+        temperature (float): Cell temperature in kelvin.
+    """
+
+    def __init__(self, photocurrent=SIM_DEFAULT_PHOTOCURRENT,
+                 saturation_current=SIM_DEFAULT_SATURATION_CURRENT,
+                 ideality=SIM_DEFAULT_IDEALITY,
+                 shunt_resistance=SIM_DEFAULT_SHUNT_RESISTANCE,
+                 temperature=SIM_DEFAULT_TEMPERATURE):
+        self.photocurrent = photocurrent
+        self.saturation_current = saturation_current
+        self.ideality = ideality
+        self.shunt_resistance = shunt_resistance
+        self.temperature = temperature
+
+    @property
+    def thermal_voltage(self):
+        """Thermal voltage n*k*T/q in volts."""
+        return self.ideality * BOLTZMANN_OVER_CHARGE * self.temperature
+
+    def current(self, voltage):
+        """Return the cell current (A) at the given terminal voltage (V)."""
+        exponent = min(voltage / self.thermal_voltage, 700.0)
+        diode = self.saturation_current * (math.exp(exponent) - 1)
+        return self.photocurrent - diode - voltage / self.shunt_resistance
+
+    @property
+    def open_circuit_voltage(self):
+        """Approximate open circuit voltage in volts."""
+        return self.thermal_voltage * math.log(self.photocurrent / self.saturation_current + 1)
+
+
+class SimulatedDevice:
+    """Base class for simulated I2C devices.
+
+    Subclasses implement :meth:`write` and :meth:`read`, which receive and return
+    the raw bytes of a single I2C transaction.
+    """
+
+    def __init__(self, address):
+        self.address = address
+
+    def write(self, data):
+        """Handle a write transaction with the given payload."""
+        raise NotImplementedError
+
+    def read(self, length):
+        """Handle a read transaction and return ``length`` bytes."""
+        raise NotImplementedError
+
+
+class SimMCP23017(SimulatedDevice):
+    """Register model of the MCP23017 16-bit I/O expander (IOCON.BANK = 0)."""
+
+    REG_IODIRA = 0x00
+    REG_IPOLA = 0x02
+    REG_IOCON = 0x0A
+    REG_IOCONB = 0x0B
+    REG_GPPUA = 0x0C
+    REG_GPIOA = 0x12
+    REG_GPIOB = 0x13
+    REG_OLATA = 0x14
+    NUM_REGISTERS = 0x16
+
+    def __init__(self, address):
+        super().__init__(address)
+        self.registers = bytearray(self.NUM_REGISTERS)
+        self.registers[0x00] = 0xFF
+        self.registers[0x01] = 0xFF
+        self.pointer = 0
+        self.register_writes = 0
+        self.changed_at = [0.0] * self.NUM_REGISTERS  # time.monotonic() of the last change
+
+    def _advance(self):
+        if not self.registers[self.REG_IOCON] & 0x20:  # SEQOP disabled -> sequential
+            self.pointer = (self.pointer + 1) % self.NUM_REGISTERS
+
+    def _write_register(self, register, value):
+        if register in (self.REG_GPIOA, self.REG_GPIOB):
+            register += 2  # Writes to GPIO land in OLAT
+        if register in (self.REG_IOCON, self.REG_IOCONB):
+            self.registers[self.REG_IOCON] = self.registers[self.REG_IOCONB] = value
+        else:
+            if self.registers[register] != value:
+                self.changed_at[register] = time.monotonic()
+            self.registers[register] = value
+        self.register_writes += 1
+
+    def _read_register(self, register):
+        if register in (self.REG_GPIOA, self.REG_GPIOB):
+            port = register - self.REG_GPIOA
+            iodir = self.registers[self.REG_IODIRA + port]
+            olat = self.registers[self.REG_OLATA + port]
+            pullup = self.registers[self.REG_GPPUA + port]
+            ipol = self.registers[self.REG_IPOLA + port]
+            return ((olat & ~iodir) | ((pullup ^ ipol) & iodir)) & 0xFF
+        return self.registers[register]
+
+    def write(self, data):
+        if not data:
+            return
+        self.pointer = data[0] % self.NUM_REGISTERS
+        for value in data[1:]:
+            self._write_register(self.pointer, value)
+            self._advance()
+
+    def read(self, length):
+        out = bytearray()
+        for _ in range(length):
+            out.append(self._read_register(self.pointer))
+            self._advance()
+        return out
+
+    @property
+    def iodir(self):
+        """16-bit IODIR register (1 = input)."""
+        return self.registers[0x00] | self.registers[0x01] << 8
+
+    @property
+    def olat(self):
+        """16-bit output latch register."""
+        return self.registers[0x14] | self.registers[0x15] << 8
+
+    def output_level(self, pin):
+        """Return the driven level of a pin, or None if the pin is an input."""
+        if self.iodir >> pin & 1:
+            return None
+        return bool(self.olat >> pin & 1)
+
+
+class SimADS1115(SimulatedDevice):
+    """Register model of the ADS1115 16-bit ADC.
+
+    Args:
+        address (int): I2C address.
+        source (callable): Called with the input multiplexer field of the config
+            register (0-7), returns the differential input voltage.
+        realtime (bool): If True, a conversion takes 1/data_rate seconds of wall
+            time and the OS bit reads 0 until it is done.
+    """
+
+    REG_CONVERSION = 0x00
+    REG_CONFIG = 0x01
+    REG_LO_THRESH = 0x02
+    REG_HI_THRESH = 0x03
+    CONFIG_DEFAULT = 0x8583
+
+    def __init__(self, address, source, realtime=False):
+        super().__init__(address)
+        self.source = source
+        self.realtime = realtime
+        self.registers = [0x0000, self.CONFIG_DEFAULT, 0x8000, 0x7FFF]
+        self.pointer = 0
+        self.conversions = 0
+        self._conversion_done_at = 0.0
+
+    @property
+    def config(self):
+        """Current config register value."""
+        return self.registers[self.REG_CONFIG]
+
+    @property
+    def full_scale(self):
+        """Full scale range in volts selected by the PGA field."""
+        return ADS1115_PGA_RANGES[(self.config >> 9) & 0x07]
+
+    @property
+    def data_rate(self):
+        """Data rate in samples per second selected by the DR field."""
+        return ADS1115_DATA_RATES[(self.config >> 5) & 0x07]
+
+    @property
+    def continuous(self):
+        """True if the ADC is in continuous conversion mode."""
+        return not self.config & 0x0100
+
+    def _busy(self):
+        return self.realtime and time.monotonic() < self._conversion_done_at
+
+    def _convert(self):
+        voltage = self.source((self.config >> 12) & 0x07)
+        code = int(round(voltage / self.full_scale * 32768))
+        code = max(-32768, min(32767, code))
+        self.registers[self.REG_CONVERSION] = code & 0xFFFF
+        self.conversions += 1
+        self._conversion_done_at = time.monotonic() + 1.0 / self.data_rate
+
+    def write(self, data):
+        if not data:
+            return
+        self.pointer = data[0] & 0x03
+        if len(data) >= 3:
+            value = data[1] << 8 | data[2]
+            if self.pointer == self.REG_CONFIG:
+                self.registers[self.REG_CONFIG] = value & 0x7FFF
+                if value & 0x8000 or self.continuous:
+                    self._convert()
+            else:
+                self.registers[self.pointer] = value
+
+    def read(self, length):
+        if self.pointer == self.REG_CONFIG:
+            value = self.config | (0 if self._busy() else 0x8000)
+        else:
+            if self.pointer == self.REG_CONVERSION and self.continuous and not self._busy():
+                self._convert()
+            value = self.registers[self.pointer]
+        out = bytearray([value >> 8 & 0xFF, value & 0xFF])
+        return (out * ((length + 1) // 2))[:length]
+
+
+class SimMCP4728(SimulatedDevice):
+    """Register model of the MCP4728 quad 12-bit DAC.
+
+    Supports fast write, multi-write, sequential write, single write, the
+    VREF/gain/power-down select commands and the 24 byte register read-back.
+    """
+
+    def __init__(self, address):
+        super().__init__(address)
+        # Per channel: value, vref, gain, power-down (input register == output)
+        self.values = [0] * MAX_CHANNELS_PER_DAC
+        self.vref = [0] * MAX_CHANNELS_PER_DAC
+        self.gain = [0] * MAX_CHANNELS_PER_DAC
+        self.power_down = [0] * MAX_CHANNELS_PER_DAC
+        self.eeprom = [(0, 0, 0, 0)] * MAX_CHANNELS_PER_DAC
+        self.updates = 0
+        # Value before the last change and time.monotonic() of that change
+        self.previous = [0] * MAX_CHANNELS_PER_DAC
+        self.changed_at = [0.0] * MAX_CHANNELS_PER_DAC
+
+    def _store(self, channel, high, low, flags=True):
+        if flags:
+            self.vref[channel] = high >> 7 & 1
+            self.gain[channel] = high >> 4 & 1
+        self.power_down[channel] = high >> 5 & 0x03
+        value = (high & 0x0F) << 8 | low
+        if value != self.values[channel]:
+            self.previous[channel] = self.values[channel]
+            self.changed_at[channel] = time.monotonic()
+        self.values[channel] = value
+        self.updates += 1
+
+    def write(self, data):
+        if not data:
+            return
+        command = data[0]
+        if command >> 6 == 0b00:
+            # Fast write: two bytes per channel starting at channel A
+            for channel, i in enumerate(range(0, len(data) - 1, 2)):
+                self._store(channel % MAX_CHANNELS_PER_DAC, data[i], data[i + 1], flags=False)
+        elif command >> 3 == 0b01000:
+            # Multi-write: (command, high, low) triplets, one per channel
+            for i in range(0, len(data) - 2, 3):
+                self._store(data[i] >> 1 & 0x03, data[i + 1], data[i + 2])
+        elif command >> 3 in (0b01010, 0b01011):
+            # Sequential / single write (also written to EEPROM)
+            first = command >> 1 & 0x03
+            last = first if command >> 3 == 0b01011 else MAX_CHANNELS_PER_DAC - 1
+            payload = data[1:]
+            for offset, channel in enumerate(range(first, last + 1)):
+                if 2 * offset + 1 >= len(payload):
+                    break
+                self._store(channel, payload[2 * offset], payload[2 * offset + 1])
+                self.eeprom[channel] = (self.values[channel], self.vref[channel],
+                                        self.gain[channel], self.power_down[channel])
+        elif command >> 5 == 0b100:
+            self.vref = [command >> (3 - ch) & 1 for ch in range(MAX_CHANNELS_PER_DAC)]
+        elif command >> 5 == 0b110:
+            self.gain = [command >> (3 - ch) & 1 for ch in range(MAX_CHANNELS_PER_DAC)]
+        elif command >> 5 == 0b101 and len(data) >= 2:
+            word = (command & 0x0F) << 8 | data[1]
+            self.power_down = [word >> (6 - 2 * ch) & 0x03 for ch in range(MAX_CHANNELS_PER_DAC)]
+
+    def read(self, length):
+        out = bytearray()
+        for channel in range(MAX_CHANNELS_PER_DAC):
+            registers = [(self.values[channel], self.vref[channel], self.gain[channel],
+                          self.power_down[channel]), self.eeprom[channel]]
+            for eeprom, (value, vref, gain, power_down) in enumerate(registers):
+                out.append(0xC0 | channel << 4 | eeprom << 3)
+                out.append(vref << 7 | power_down << 5 | gain << 4 | value >> 8)
+                out.append(value & 0xFF)
+        return (out * (length // len(out) + 1))[:length]
+
+
+class SimTCA9548A(SimulatedDevice):
+    """Model of the TCA9548A 8-channel I2C switch.
+
+    Downstream devices are attached per channel and are only reachable while
+    their channel is enabled in the control register.
+    """
+
+    def __init__(self, address=TCA9548A_ADDRESS):
+        super().__init__(address)
+        self.control = 0
+        self.writes = 0
+        self.downstream = [dict() for _ in range(TCA9548A_CHANNELS)]
+        self.boards = []
+
+    def write(self, data):
+        if data:
+            self.control = data[-1]
+            self.writes += 1
+
+    def read(self, length):
+        return bytearray([self.control] * length)
+
+    def attach(self, channel, device):
+        """Attach a device to a downstream channel."""
+        self.downstream[channel][device.address] = device
+
+    def add_board(self, channel, offset=0, **board_kwargs):
+        """Create a simulated Octoboard behind a downstream channel."""
+        board = SimulatedBoard(offset, **board_kwargs)
+        for device in board.devices:
+            self.attach(channel, device)
+        self.boards.append(board)
+        return board
+
+    def visible_devices(self):
+        """Return the downstream devices reachable with the current selection."""
+        devices = {}
+        for channel in range(TCA9548A_CHANNELS):
+            if self.control >> channel & 1:
+                for address, device in self.downstream[channel].items():
+                    devices.setdefault(address, device)
+        return devices
+
+
+class SimulatedBoard:
+    """A simulated Octoboard: MCP23017, ADS1115 and two MCP4728 around 8 cells.
+
+    The DAC output of every channel biases its cell. The analog multiplexer,
+    addressed through the MCP23017 select pins, routes the cell voltage to
+    ADS1115 AIN0/AIN1 and the shunt voltage to AIN2/AIN3.
+
+    Args:
+        offset (int): I2C address offset of the board.
+        cells (list[DiodeCell], optional): Cell model per channel.
+        r_shunt (float): Shunt resistance in ohms.
+        dac_volts_per_code (float): Cell bias per 12-bit DAC code.
+        dac_offset (float): Cell bias at DAC code 0.
+        mux_map (list[int], optional): Logical channel per multiplexer address.
+        noise (float): RMS noise added to every ADC input in volts.
+        realtime (bool): Model ADC conversion time in wall clock time.
+        seed (int, optional): Seed of the noise generator.
+        dac_tau (float or list[float]): RC time constant of the cell bias after a DAC
+            change, per channel if a list is given (seconds, 0 = instant).
+        mux_tau (float): RC time constant of the ADC inputs after the analog mux
+            switched to another channel (seconds, 0 = instant).
+
+    The RC models run on ``time.monotonic()``, so settling takes wall clock time
+    whether or not ``realtime`` is set. A DAC channel settles from its previous
+    target, which is exact as long as it was settled before the change.
+    """
+
+    def __init__(self, offset=0, cells=None, r_shunt=CHANNEL_DEFAULT_SHUNT_RESISTANCE,
+                 dac_volts_per_code=SIM_DEFAULT_DAC_VOLTS_PER_CODE,
+                 dac_offset=SIM_DEFAULT_DAC_OFFSET, mux_map=None, noise=0.0,
+                 realtime=False, seed=None, dac_tau=0.0, mux_tau=0.0):
+        self.offset = offset
+        self.cells = cells if cells is not None else [
+            DiodeCell(photocurrent=SIM_DEFAULT_PHOTOCURRENT * (0.6 + 0.1 * ch))
+            for ch in range(CHANNELS_PER_BOARD)
+        ]
+        self.r_shunt = r_shunt
+        self.dac_volts_per_code = dac_volts_per_code
+        self.dac_offset = dac_offset
+        self.mux_map = mux_map if mux_map is not None else list(range(CHANNELS_PER_BOARD))
+        self.noise = noise
+        self._rng = random.Random(seed)
+        self.dac_tau = dac_tau
+        self.mux_tau = mux_tau
+        self._mux_channel = None
+        self._mux_from = [0.0, 0.0, 0.0, 0.0]
+        self._mux_switched_at = 0.0
+
+        self.mux = SimMCP23017(self._address(I2C_BASE_MUX))
+        self.adc = SimADS1115(self._address(I2C_BASE_ADC), self._adc_input, realtime=realtime)
+        self.dac_0 = SimMCP4728(self._address(I2C_BASE_DAC_0))
+        self.dac_1 = SimMCP4728(self._address(I2C_BASE_DAC_1))
+
+    def _address(self, base):
+        return base + self.offset * I2C_OFFSET_MULTIPLIER[base]
+
+    @property
+    def devices(self):
+        """The I2C devices of the board."""
+        return [self.mux, self.adc, self.dac_0, self.dac_1]
+
+    @property
+    def selected_channel(self):
+        """Logical channel routed to the ADC, or None if the multiplexer is disabled."""
+        if self.mux.output_level(MUX_CONTROL_PIN):
+            return None
+        address = 0
+        for bit, pin in enumerate(MUX_SELECT_PINS):
+            address |= bool(self.mux.output_level(pin)) << bit
+        return self.mux_map[address]
+
+    def bias_voltage(self, channel):
+        """Cell bias voltage applied by the DAC of a channel."""
+        dac = self.dac_0 if channel < MAX_CHANNELS_PER_DAC else self.dac_1
+        code = dac.values[channel % MAX_CHANNELS_PER_DAC]
+        return self.dac_offset + code * self.dac_volts_per_code
+
+    def settled_bias(self, channel):
+        """Cell bias voltage of a channel including the RC settling after a DAC change."""
+        target = self.bias_voltage(channel)
+        tau = self.dac_tau[channel] if isinstance(self.dac_tau, (list, tuple)) else self.dac_tau
+        if not tau:
+            return target
+        dac = self.dac_0 if channel < MAX_CHANNELS_PER_DAC else self.dac_1
+        index = channel % MAX_CHANNELS_PER_DAC
+        start = self.dac_offset + dac.previous[index] * self.dac_volts_per_code
+        elapsed = time.monotonic() - dac.changed_at[index]
+        return target + (start - target) * math.exp(-elapsed / tau)
+
+    def cell_state(self, channel):
+        """Return (voltage, current) of a cell at its present bias."""
+        voltage = self.settled_bias(channel)
+        return voltage, self.cells[channel].current(voltage)
+
+    def _channel_inputs(self, channel):
+        """Settled ADC inputs AIN0-AIN3 with a channel routed to the ADC."""
+        if channel is None:
+            return [0.0, 0.0, 0.0, 0.0]
+        voltage, current = self.cell_state(channel)
+        return [voltage, 0.0, current * self.r_shunt, 0.0]
+
+    def _adc_input(self, mux_field):
+        channel = self.selected_channel
+        ain = self._channel_inputs(channel)
+        if self.mux_tau:
+            if channel != self._mux_channel:
+                # Select and enable pins are on port A
+                self._mux_from = self._channel_inputs(self._mux_channel)
+                self._mux_switched_at = max(self.mux.changed_at[SimMCP23017.REG_OLATA],
+                                            self.mux.changed_at[SimMCP23017.REG_IODIRA])
+                self._mux_channel = channel
+            decay = math.exp(-(time.monotonic() - self._mux_switched_at) / self.mux_tau)
+            ain = [v + (v0 - v) * decay for v, v0 in zip(ain, self._mux_from)]
+        if self.noise:
+            ain = [v + self._rng.gauss(0.0, self.noise) for v in ain]
+        pairs = {0: (0, 1), 1: (0, 3), 2: (1, 3), 3: (2, 3)}
+        if mux_field in pairs:
+            positive, negative = pairs[mux_field]
+            return ain[positive] - ain[negative]
+        return ain[mux_field - 4]
+
+
+class SimulatedI2C:
+    """Virtual I2C bus standing in for :class:`ExtendedI2C`.
+
+    Implements the busio I2C interface used by the Adafruit drivers and
+    ``adafruit_bus_device``. Transactions to addresses without a device raise
+    ``OSError`` like the Linux driver.
+
+    Attributes:
+        bus_id (int): Bus number this bus stands in for.
+        frequency (int): Bus clock, used for the realtime transfer model.
+        realtime (bool): If True, transfers take wall clock time.
+        transactions (int): Number of I2C transactions performed.
+        bytes_transferred (int): Number of payload bytes moved on the bus.
+    """
+
+    def __init__(self, bus_id=1, frequency=400000, realtime=False):
+        self.bus_id = bus_id
+        self.frequency = frequency
+        self.realtime = realtime
+        self.devices = {}
+        self.boards = []
+        self.transactions = 0
+        self.bytes_transferred = 0
+        self._lock = threading.RLock()
+
+    # Topology -----------------------------------------------------------
+
+    def attach(self, device):
+        """Attach a device directly to the bus."""
+        self.devices[device.address] = device
+        return device
+
+    def add_board(self, offset=0, **board_kwargs):
+        """Create a simulated Octoboard directly on this bus."""
+        board_kwargs.setdefault("realtime", self.realtime)
+        board = SimulatedBoard(offset, **board_kwargs)
+        for device in board.devices:
+            self.attach(device)
+        self.boards.append(board)
+        return board
+
+    def add_tca9548a(self, address=TCA9548A_ADDRESS):
+        """Attach a TCA9548A switch to the bus and return it."""
+        return self.attach(SimTCA9548A(address))
+
+    def _visible_devices(self):
+        devices = {}
+        for device in self.devices.values():
+            if isinstance(device, SimTCA9548A):
+                for address, downstream in device.visible_devices().items():
+                    devices.setdefault(address, downstream)
+        devices.update(self.devices)
+        return devices
+
+    def _device(self, address):
+        device = self._visible_devices().get(address)
+        if device is None:
+            raise _nack(address)
+        return device
+
+    def _transfer(self, nbytes):
+        self.transactions += 1
+        self.bytes_transferred += nbytes
+        if self.realtime:
+            time.sleep((nbytes + 1) * I2C_BITS_PER_BYTE / self.frequency)
+
+    # busio.I2C interface ------------------------------------------------
+
+    def try_lock(self):
+        """Attempt to grab the bus lock without waiting, like :meth:`ExtendedI2C.try_lock`."""
+        return self._lock.acquire(blocking=False)
+
+    def unlock(self):
+        """Release the bus lock."""
+        self._lock.release()
+
+    def deinit(self):
+        """Release the bus (no-op for the simulator)."""
+
+    def __enter__(self):
+        self._lock.acquire()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self._lock.release()
+
+    def scan(self):
+        """Return the addresses of all reachable devices."""
+        if self.realtime:
+            # Address byte and one data byte for every address tried
+            time.sleep(len(I2C_SCAN_ADDRESSES) * 2 * I2C_BITS_PER_BYTE / self.frequency)
+        return sorted(self._visible_devices())
+
+    def readfrom_into(self, address, buffer, *, start=0, end=None):
+        """Read from a device at specified address into a buffer."""
+        end = len(buffer) if end is None else end
+        data = self._device(address).read(end - start)
+        buffer[start:end] = data
+        self._transfer(end - start)
+
+    def writeto(self, address, buffer, *, start=0, end=None):
+        """Write to a device at specified address from a buffer."""
+        end = len(buffer) if end is None else end
+        self._device(address).write(bytes(buffer[start:end]))
+        self._transfer(end - start)
+
+    def writeto_then_readfrom(self, address, buffer_out, buffer_in, *, out_start=0,
+                              out_end=None, in_start=0, in_end=None, stop=False):
+        """Write to a device then read back from it in one transaction."""
+        out_end = len(buffer_out) if out_end is None else out_end
+        in_end = len(buffer_in) if in_end is None else in_end
+        device = self._device(address)
+        device.write(bytes(buffer_out[out_start:out_end]))
+        buffer_in[in_start:in_end] = device.read(in_end - in_start)
+        self._transfer(out_end - out_start + in_end - in_start)
+
+
+class SimulatedSMBus:
+    """Minimal ``smbus2.SMBus`` stand-in on top of a :class:`SimulatedI2C`."""
+
+    def __init__(self, bus):
+        self.bus = bus
+
+    def write_byte(self, i2c_addr, value, force=None):
+        """Write a single byte to a device."""
+        self.bus.writeto(i2c_addr, bytes([value]))
+
+    def read_byte(self, i2c_addr, force=None):
+        """Read a single byte from a device."""
+        buffer = bytearray(1)
+        self.bus.readfrom_into(i2c_addr, buffer)
+        return buffer[0]
+
+    def close(self):
+        """Close the bus (no-op for the simulator)."""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+class SimulatedRig:
+    """A set of simulated I2C buses, addressable by bus number.
+
+    Call :meth:`install` to make :func:`open_bus` (and with it
+    :class:`OBoardManager` and :class:`OBoard`) use the simulated buses.
+    """
+
+    def __init__(self, realtime=False, frequency=400000):
+        self.realtime = realtime
+        self.frequency = frequency
+        self.buses = {}
+
+    def add_bus(self, bus_id):
+        """Create (or return) the simulated bus with the given number."""
+        if bus_id not in self.buses:
+            self.buses[bus_id] = SimulatedI2C(bus_id, frequency=self.frequency,
+                                              realtime=self.realtime)
+        return self.buses[bus_id]
+
+    def get_bus(self, bus_id):
+        """Return the bus with the given number, raising like ExtendedI2C if missing."""
+        if bus_id not in self.buses:
+            raise ValueError(f"No device found for /dev/i2c-{bus_id}")
+        return self.buses[bus_id]
+
+    def smbus(self, bus_id):
+        """Return an SMBus-compatible handle on the given bus."""
+        return SimulatedSMBus(self.get_bus(bus_id))
+
+    def boards(self):
+        """Return all simulated boards of the rig."""
+        boards = []
+        for bus in self.buses.values():
+            boards.extend(bus.boards)
+            for device in bus.devices.values():
+                if isinstance(device, SimTCA9548A):
+                    boards.extend(device.boards)
+        return boards
+
+    def install(self):
+        """Route :func:`open_bus` to this rig."""
+        _i2c_module.set_bus_factory(self.get_bus)
+        return self
+
+    def uninstall(self):
+        """Restore the hardware bus factory."""
+        _i2c_module.set_bus_factory(None)
+
+    def __enter__(self):
+        return self.install()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.uninstall()
+
+    @classmethod
+    def with_boards(cls, i2c_nums=(1,), offsets=range(4), realtime=False, **board_kwargs):
+        """Build a rig with boards directly on each of the given buses."""
+        rig = cls(realtime=realtime)
+        for bus_id in i2c_nums:
+            bus = rig.add_bus(bus_id)
+            for offset in offsets:
+                bus.add_board(offset, **board_kwargs)
+        return rig
+
+    @classmethod
+    def with_tca(cls, bus_id=1, tca_channels=range(TCA9548A_CHANNELS), offsets=range(4),
+                 realtime=False, **board_kwargs):
+        """Build a rig with a TCA9548A and boards on each of its channels (GUI setup)."""
+        rig = cls(realtime=realtime)
+        tca = rig.add_bus(bus_id).add_tca9548a()
+        board_kwargs.setdefault("realtime", realtime)
+        for channel in tca_channels:
+            for offset in offsets:
+                tca.add_board(channel, offset, **board_kwargs)
+        return rig
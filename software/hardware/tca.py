@@ -0,0 +1,89 @@
+import time
+from contextlib import contextmanager
+
+from .constants import (
+    TCA9548A_ADDRESS,
+    TCA9548A_CHANNELS,
+    TCA9548A_SETTLE_TIME,
+)
+from .. import metrics
+
+
+class TCA9548A:
+    """TCA9548A I2C switch that remembers its current selection.
+
+    Selecting the channel that is already enabled costs no bus transaction and
+    no settle delay. All writes hold the bus lock (``i2c._lock``) shared with
+    the Octoboard drivers on the same bus, and :meth:`channel` keeps the lock
+    for a whole block so no other thread can switch away in between.
+
+    If a write fails, the selection is marked unknown and the next
+    :meth:`select` writes the control register again.
+
+    Attributes:
+        i2c (ExtendedI2C): The bus the switch is connected to.
+        address (int): I2C address of the switch.
+        settle_time (float): Delay after switching to a different channel (seconds).
+        writes (int): Control register writes done so far.
+    """
+
+    def __init__(self, i2c, address=TCA9548A_ADDRESS, settle_time=TCA9548A_SETTLE_TIME):
+        self.i2c = i2c
+        self.address = address
+        self.settle_time = settle_time
+        self.writes = 0
+        self._control = None  # Unknown until the first write
+
+    @property
+    def selected(self):
+        """Index of the enabled channel, None if unknown or no single channel is enabled."""
+        if self._control:
+            channel = self._control.bit_length() - 1
+            if self._control == 1 << channel:
+                return channel
+        return None
+
+    @metrics.timed('tca.select')
+    def select(self, channel):
+        """Enable a single downstream channel.
+
+        Returns:
+            bool: True if the switch had to be written, False if it was already selected.
+        """
+        if not 0 <= channel < TCA9548A_CHANNELS:
+            raise ValueError(f"TCA9548A channel must be between 0 and {TCA9548A_CHANNELS - 1}")
+        return self._set_control(1 << channel)
+
+    def disable(self):
+        """Disable all downstream channels."""
+        self._set_control(0)
+
+    def invalidate(self):
+        """Forget the cached selection, e.g. after the switch was reset or written elsewhere."""
+        with self.i2c._lock:
+            self._control = None
+
+    @contextmanager
+    def channel(self, channel):
+        """Select a channel and hold the bus lock until the block ends."""
+        with self.i2c._lock:
+            self.select(channel)
+            yield self
+
+    def _set_control(self, control):
+        with self.i2c._lock:
+            if control == self._control:
+                return False
+            self._control = None
+            while not self.i2c.try_lock():
+                pass
+            try:
+                self.i2c.writeto(self.address, bytes([control]))
+            finally:
+                self.i2c.unlock()
+            self.writes += 1
+            metrics.count('tca.writes')
+            self._control = control
+            if control and self.settle_time:
+                time.sleep(self.settle_time)
+            return True
@@ -0,0 +1,109 @@
+import json
+import os
+from datetime import datetime
+
+from .constants import (
+    TOPOLOGY_FILE,
+    I2C_BASE_MUX,
+    I2C_BASE_ADDRESSES,
+    I2C_OFFSET_MULTIPLIER,
+)
+
+TOPOLOGY_VERSION = 1
+
+
+def board_addresses(offset):
+    """Return the I2C addresses of the MUX, ADC and DACs of a board with the given offset."""
+    return [base + offset * I2C_OFFSET_MULTIPLIER[base] for base in I2C_BASE_ADDRESSES]
+
+
+def topology_key(i2c_num, tca_channel=None):
+    """Key of a bus, or of a TCA9548A channel on a bus, in the topology file."""
+    if tca_channel is None:
+        return f"bus_{i2c_num}"
+    return f"bus_{i2c_num}_tca_{tca_channel}"
+
+
+def load_topology(i2c_num, tca_channel=None, file_name=TOPOLOGY_FILE):
+    """Return the cached board offsets of a bus, None if there is no usable entry.
+
+    Args:
+        i2c_num (int): Bus number.
+        tca_channel (int, optional): TCA9548A channel the boards are behind.
+        file_name (str): Topology file written by :func:`save_topology`.
+    """
+    try:
+        with open(file_name) as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if data.get('version') != TOPOLOGY_VERSION:
+        return None
+    offsets = data.get('buses', {}).get(topology_key(i2c_num, tca_channel))
+    return None if offsets is None else list(offsets)
+
+
+def save_topology(i2c_num, offsets, tca_channel=None, file_name=TOPOLOGY_FILE):
+    """Store the board offsets found on a bus.
+
+    Entries of other buses and TCA9548A channels already in the file are kept.
+
+    Args:
+        i2c_num (int): Bus number.
+        offsets (list[int]): Address offsets of the boards found.
+        tca_channel (int, optional): TCA9548A channel the boards are behind.
+        file_name (str): Topology file.
+    """
+    buses = {}
+    if os.path.exists(file_name):
+        try:
+            with open(file_name) as f:
+                data = json.load(f)
+            if data.get('version') == TOPOLOGY_VERSION:
+                buses = data.get('buses', {})
+        except (OSError, ValueError):
+            pass
+    buses[topology_key(i2c_num, tca_channel)] = sorted(offsets)
+    os.makedirs(os.path.dirname(file_name) or '.', exist_ok=True)
+    temp_name = f"{file_name}.tmp"
+    with open(temp_name, 'w') as f:
+        json.dump({'version': TOPOLOGY_VERSION,
+                   'saved_at': datetime.now().isoformat(),
+                   'buses': buses}, f, indent=2, sort_keys=True)
+    os.replace(temp_name, file_name)
+
+
+def probe(i2c, address):
+    """Return True if a device acknowledges a one byte read at the address."""
+    while not i2c.try_lock():
+        pass
+    try:
+        i2c.readfrom_into(address, bytearray(1))
+        return True
+    except OSError:
+        return False
+    finally:
+        i2c.unlock()
+
+
+def verify_topology(i2c, offsets, possible_offsets):
+    """Check cached board offsets with a few probes instead of a full bus scan.
+
+    Every device of a cached board has to answer, and for every other possible
+    offset the MUX address must not, so both missing and added boards are found.
+
+    Args:
+        i2c (ExtendedI2C): The bus, with the right TCA9548A channel selected.
+        offsets (list[int]): Cached board offsets.
+        possible_offsets (iterable[int]): Offsets a board can have.
+
+    Returns:
+        bool: True if the bus matches the cached offsets.
+    """
+    for offset in offsets:
+        if not all(probe(i2c, address) for address in board_addresses(offset)):
+            return False
+    for offset in possible_offsets:
+        if offset not in offsets and probe(i2c, I2C_BASE_MUX + offset * I2C_OFFSET_MULTIPLIER[I2C_BASE_MUX]):
+            return False
+    return True
@@ -1,34 +1,375 @@
+import atexit
 import csv
 import os
+import queue
+import threading
+import time
+
+from .hardware.constants import (
+    CHANNEL_DEFAULT_HEADER,
+    LOG_FLUSH_ROWS,
+    LOG_FLUSH_INTERVAL,
+    LOG_QUEUE_SIZE,
+    LOG_QUEUE_TIMEOUT,
+    LOG_BATCH_SIZE,
+    BINLOG_EXTENSION,
+)
+from .binlog import BinaryLogWriter
+from .metrics import timed
+
+
+class BufferedWriter:
+    """Keeps a CSV file open and buffers rows in memory.
+
+    Rows are formatted exactly like ``f'{a},{b},...'`` so the file content is
+    identical to writing each row with its own ``open(file_name, 'a')``.
+
+    Args:
+        file_name (str): Path of the CSV file.
+        header (str, optional): Header line written if the file is new or truncated.
+        mode (str): 'a' to append to an existing file, 'w' to truncate it.
+        max_rows (int): Number of buffered rows that triggers a flush.
+        max_age (float): Age in seconds of the oldest buffered row that triggers a flush.
+    """
+
+    def __init__(self, file_name, header=None, mode='a', max_rows=LOG_FLUSH_ROWS,
+                 max_age=LOG_FLUSH_INTERVAL):
+        self.file_name = file_name
+        self.max_rows = max_rows
+        self.max_age = max_age
+        self._rows = []
+        self._first_row_time = None
+        write_header = header is not None and (mode == 'w' or not os.path.exists(file_name))
+        self._file = open(file_name, mode)
+        if write_header:
+            self._file.write(f'{header}\n')
+            self._file.flush()
+
+    @property
+    def pending(self):
+        """Number of rows not yet written to disk."""
+        return len(self._rows)
+
+    @property
+    def closed(self):
+        """True once the writer has been closed."""
+        return self._file.closed
+
+    def write_row(self, fields):
+        """Buffer one row and flush if the size or age limit is reached."""
+        if not self._rows:
+            self._first_row_time = time.monotonic()
+        self._rows.append(','.join(map(format, fields)) + '\n')
+        if len(self._rows) >= self.max_rows or self.is_stale():
+            self.flush()
+
+    def is_stale(self):
+        """True if buffered rows are older than ``max_age``."""
+        return bool(self._rows) and time.monotonic() - self._first_row_time >= self.max_age
+
+    @timed('log.flush')
+    def flush(self):
+        """Write buffered rows to the file."""
+        if self._rows:
+            self._file.write(''.join(self._rows))
+            self._rows.clear()
+        self._file.flush()
+
+    def close(self):
+        """Flush and close the file."""
+        if not self._file.closed:
+            self.flush()
+            self._file.close()
+
+
+class WriterPool:
+    """Hands out one persistent :class:`BufferedWriter` per file.
+
+    Files ending in ``BINLOG_EXTENSION`` get a :class:`BinaryLogWriter` instead,
+    with ``header`` giving the record layout.
+    Writers stay open across tracking iterations until :meth:`close` is called.
+    Rows of all writers are flushed at least every ``max_age`` seconds.
+
+    Args:
+        max_rows (int): Buffered rows per file that trigger a flush.
+        max_age (float): Maximum age of buffered rows in seconds.
+    """
+
+    def __init__(self, max_rows=LOG_FLUSH_ROWS, max_age=LOG_FLUSH_INTERVAL):
+        self.max_rows = max_rows
+        self.max_age = max_age
+        self._writers = {}
+        self._lock = threading.RLock()
+        self._last_sweep = time.monotonic()
+
+    def open(self, file_name, header=None, mode='a'):
+        """Return the writer of a file, opening it if needed.
+
+        Opening with mode 'w' closes an existing writer and truncates the file.
+        """
+        with self._lock:
+            writer = self._writers.get(file_name)
+            if writer is not None and mode == 'w':
+                writer.close()
+                writer = None
+            if writer is None:
+                writer_class = (BinaryLogWriter if file_name.endswith(BINLOG_EXTENSION)
+                                else BufferedWriter)
+                writer = writer_class(file_name, header=header, mode=mode,
+                                      max_rows=self.max_rows, max_age=self.max_age)
+                self._writers[file_name] = writer
+            return writer
+
+    def write_row(self, file_name, fields, header=None):
+        """Append one row to a file, writing the header first if the file is new."""
+        with self._lock:
+            self.open(file_name, header=header).write_row(fields)
+            if time.monotonic() - self._last_sweep >= self.max_age:
+                self.flush_stale()
+
+    def flush_stale(self):
+        """Flush all writers holding rows older than ``max_age``."""
+        with self._lock:
+            self._last_sweep = time.monotonic()
+            for writer in self._writers.values():
+                if writer.is_stale():
+                    writer.flush()
+
+    def flush(self, file_name=None):
+        """Flush one file, or all files if no name is given."""
+        with self._lock:
+            names = list(self._writers) if file_name is None else [file_name]
+            for name in names:
+                writer = self._writers.get(name)
+                if writer is not None:
+                    writer.flush()
+
+    def close(self, file_name=None):
+        """Flush and close one file, or all files if no name is given."""
+        with self._lock:
+            names = list(self._writers) if file_name is None else [file_name]
+            for name in names:
+                writer = self._writers.pop(name, None)
+                if writer is not None:
+                    writer.close()
+
+
+class LogPipeline:
+    """Writes rows from a background thread so disk stalls don't block acquisition.
+
+    Has the same ``open``/``write_row``/``flush``/``close`` interface as
+    :class:`WriterPool`. Calls only queue a record; a writer thread takes
+    records from the queue in batches and hands them to the wrapped pool.
+    Records of one file are written in the order they were queued.
+
+    If the queue is full, :meth:`write_row` waits up to ``timeout`` seconds
+    for space and then drops the row. Control records (open, flush, close)
+    are never dropped.
+
+    Args:
+        writers (WriterPool): Pool the writer thread writes through.
+        maxsize (int): Maximum number of queued records.
+        timeout (float): Time a row waits for queue space before it is dropped.
+        batch_size (int): Maximum number of records handled per batch.
+
+    Attributes:
+        enqueued (int): Rows accepted into the queue.
+        written (int): Rows handed to the writer pool.
+        dropped (int): Rows discarded because the queue stayed full.
+        overflows (int): Rows that found the queue full and had to wait.
+        errors (int): Records that raised an error in the writer thread.
+        max_depth (int): Highest queue depth seen by the writer thread.
+    """
+
+    _STOP = object()
+
+    def __init__(self, writers=None, maxsize=LOG_QUEUE_SIZE, timeout=LOG_QUEUE_TIMEOUT,
+                 batch_size=LOG_BATCH_SIZE):
+        self.writers = writers if writers is not None else WriterPool()
+        self.timeout = timeout
+        self.batch_size = batch_size
+        self._queue = queue.Queue(maxsize)
+        self._thread = None
+        self._start_lock = threading.Lock()
+        self._stats_lock = threading.Lock()  # write_row runs on the threads of all buses
+        self.enqueued = 0
+        self.written = 0
+        self.dropped = 0
+        self.overflows = 0
+        self.errors = 0
+        self.max_depth = 0
+
+    @property
+    def depth(self):
+        """Number of records waiting in the queue."""
+        return self._queue.qsize()
+
+    @property
+    def running(self):
+        """True while the writer thread is alive."""
+        return self._thread is not None and self._thread.is_alive()
+
+    def stats(self):
+        """Return the pipeline counters as a dict."""
+        with self._stats_lock:
+            return {
+                'enqueued': self.enqueued,
+                'written': self.written,
+                'dropped': self.dropped,
+                'overflows': self.overflows,
+                'errors': self.errors,
+                'depth': self.depth,
+                'max_depth': self.max_depth,
+            }
+
+    def start(self):
+        """Start the writer thread if it is not running."""
+        with self._start_lock:
+            if not self.running:
+                self._thread = threading.Thread(target=self._run, name='LogPipeline',
+                                                daemon=True)
+                self._thread.start()
+
+    def open(self, file_name, header=None, mode='a'):
+        """Queue opening a file, see :meth:`WriterPool.open`."""
+        self._put(('open', file_name, header, mode))
+
+    @timed('log.write_row')
+    def write_row(self, file_name, fields, header=None):
+        """Queue one row. Returns False if the row was dropped."""
+        self.start()
+        record = ('row', file_name, tuple(fields), header)
+        try:
+            self._queue.put_nowait(record)
+        except queue.Full:
+            with self._stats_lock:
+                self.overflows += 1
+            try:
+                self._queue.put(record, timeout=self.timeout)
+            except queue.Full:
+                with self._stats_lock:
+                    self.dropped += 1
+                return False
+        with self._stats_lock:
+            self.enqueued += 1
+        return True
+
+    def flush(self, file_name=None):
+        """Wait until all rows queued so far are written to disk."""
+        self._wait(('flush', file_name))
+
+    def close(self, file_name=None):
+        """Wait until all rows queued so far are written, then close the file(s)."""
+        self._wait(('close', file_name))
+
+    def stop(self, timeout=None):
+        """Drain the queue, close all files and stop the writer thread.
+
+        Writing again afterwards restarts the thread.
+        """
+        if self.running:
+            self._queue.put((self._STOP,))
+            self._thread.join(timeout)
+        if not self.running:
+            self.writers.close()
+
+    def _put(self, record):
+        self.start()
+        self._queue.put(record)
+
+    def _wait(self, record):
+        if not self.running:
+            self._handle(record)
+            return
+        done = threading.Event()
+        self._put(record + (done,))
+        done.wait()
+
+    def _run(self):
+        while True:
+            try:
+                batch = [self._queue.get(timeout=self.writers.max_age)]
+            except queue.Empty:
+                self._handle(('flush_stale', None))
+                continue
+            depth = self._queue.qsize() + 1
+            with self._stats_lock:
+                self.max_depth = max(self.max_depth, depth)
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            stop = False
+            for record in batch:
+                if record[0] is self._STOP:
+                    stop = True
+                else:
+                    self._handle(record)
+            if stop:
+                self._handle(('close', None))
+                return
+
+    def _handle(self, record):
+        kind, file_name = record[0], record[1]
+        try:
+            if kind == 'row':
+                self.writers.write_row(file_name, record[2], header=record[3])
+                with self._stats_lock:
+                    self.written += 1
+            elif kind == 'open':
+                self.writers.open(file_name, header=record[2], mode=record[3])
+            elif kind == 'flush':
+                self.writers.flush(file_name)
+            elif kind == 'close':
+                self.writers.close(file_name)
+            elif kind == 'flush_stale':
+                self.writers.flush_stale()
+        except Exception as e:
+            with self._stats_lock:
+                self.errors += 1
+            print(f"Error writing log file {file_name}: {e}")
+        finally:
+            if kind in ('flush', 'close') and len(record) > 2:
+                record[2].set()
+
+
+# Process-wide writer pool and logging thread used by the tracking code,
+# drained and closed on interpreter exit
+default_writer_pool = WriterPool()
+default_log_pipeline = LogPipeline(default_writer_pool)
+atexit.register(default_log_pipeline.stop)
+
 
 class DataLogger:
     """Handles logging of measurement data to CSV files."""
-    
-    def __init__(self, base_path="data"):
+
+    def __init__(self, base_path="data", writers=default_log_pipeline):
         self.base_path = base_path
+        self.writers = writers
         os.makedirs(base_path, exist_ok=True)
-        
-    def log_mpp_data(self, channel_id, timestamp, measured_voltage, measured_current, 
+
+    def log_mpp_data(self, channel_id, timestamp, measured_voltage, measured_current,
                      dac_value, adc_gain_v, adc_gain_c):
         """Log MPP tracking data to CSV file."""
         file_name = os.path.join(self.base_path, f'{channel_id}_data.csv')
-        
-        # Create file with header if it doesn't exist
-        if not os.path.exists(file_name):
-            with open(file_name, 'w') as f:
-                f.write('timestamp,measured_voltage,measured_current,dac_value,adc_gain_v,adc_gain_c\n')
-        
-        # Append data
-        with open(file_name, 'a') as f:
-            f.write(f'{timestamp},{measured_voltage},{measured_current},{dac_value},{adc_gain_v},{adc_gain_c}\n')
+        self.writers.write_row(
+            file_name,
+            (timestamp, measured_voltage, measured_current, dac_value, adc_gain_v, adc_gain_c),
+            header=CHANNEL_DEFAULT_HEADER,
+        )
+
+    def flush(self):
+        """Write all buffered rows to disk."""
+        self.writers.flush()
 
     def log_iv_sweep(self, channel_id, data):
         """Log IV sweep data to CSV file."""
         file_name = os.path.join(self.base_path, 'IV', f'{channel_id}_data.csv')
         os.makedirs(os.path.dirname(file_name), exist_ok=True)
-        
+
         with open(file_name, 'w') as f:
             writer = csv.writer(f)
-            writer.writerow(['timestamp', 'measured_voltage', 'measured_current', 
+            writer.writerow(['timestamp', 'measured_voltage', 'measured_current',
                            'dac_value', 'adc_gain_v', 'adc_gain_c'])
-            writer.writerows(data)
\ No newline at end of file
+            writer.writerows(data)
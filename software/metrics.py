@@ -0,0 +1,304 @@
+"""Counters and latency histograms for the hot path.
+
+Every operation that talks to the I2C bus (mux selection, DAC writes, ADC
+reads, soft DAC gain, TCA9548A switching), the log writer, the network sync
+and the tracking loops are wrapped with :func:`timed`. While recording is
+enabled, each call adds its duration to a histogram of the same name and
+failed calls are counted as errors; while it is disabled, the wrapper costs a
+single flag check. Recording is off by default and can be switched at any time
+with :func:`enable` and :func:`disable`, or from the start by setting the
+``OCTOBOARD_METRICS`` environment variable to 1.
+
+:func:`snapshot` returns plain dicts for the GUI, the CLI or an exporter,
+:func:`describe` one line per operation and :func:`summary` a single line for
+a status bar.
+
+Example:
+    >>> from software import metrics
+    >>> metrics.enable()
+    >>> manager.cycle_all_channels()
+    >>> print(metrics.describe())
+    manager.cycle          1 calls, mean 1.93 s, p95 3 s, max 1.93 s
+    channel.read_sample   80 calls, mean 11.2 ms, p95 30 ms, max 12.5 ms
+    ...
+"""
+
+import bisect
+import functools
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+from .hardware.constants import METRICS_ENV_VAR, METRICS_LATENCY_BUCKETS
+
+
+class Counter:
+    """Thread-safe event counter.
+
+    Attributes:
+        name (str): Metric name.
+        value (int): Events counted since the last reset.
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.value = 0
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1):
+        """Add ``amount`` events."""
+        with self._lock:
+            self.value += amount
+
+    def reset(self):
+        """Zero the counter."""
+        with self._lock:
+            self.value = 0
+
+
+class Histogram:
+    """Thread-safe latency histogram with fixed bucket bounds.
+
+    Args:
+        name (str): Metric name.
+        bounds (tuple): Ascending upper bounds of the buckets (seconds), a last
+            bucket takes everything above.
+
+    Attributes:
+        count (int): Observed calls.
+        total (float): Sum of the observed durations (seconds).
+        max (float): Longest observed duration (seconds).
+        last (float): Most recent observed duration (seconds).
+        errors (int): Observed calls that raised an exception.
+        buckets (list): Calls per bucket, one more than ``bounds``.
+    """
+
+    def __init__(self, name, bounds=METRICS_LATENCY_BUCKETS):
+        self.name = name
+        self.bounds = tuple(bounds)
+        self._lock = threading.Lock()
+        self.reset()
+
+    def observe(self, duration, error=False):
+        """Record one call of ``duration`` seconds."""
+        index = bisect.bisect_left(self.bounds, duration)
+        with self._lock:
+            self.count += 1
+            self.total += duration
+            self.last = duration
+            if duration > self.max:
+                self.max = duration
+            if error:
+                self.errors += 1
+            self.buckets[index] += 1
+
+    def reset(self):
+        """Drop all observations."""
+        with self._lock:
+            self.count = 0
+            self.total = 0.0
+            self.max = 0.0
+            self.last = 0.0
+            self.errors = 0
+            self.buckets = [0] * (len(self.bounds) + 1)
+
+    def quantile(self, q):
+        """Upper bucket bound below which a fraction ``q`` of the calls fell.
+
+        Returns the largest observed duration for the last bucket and 0.0
+        without observations.
+        """
+        with self._lock:
+            buckets, count, largest = list(self.buckets), self.count, self.max
+        if not count:
+            return 0.0
+        rank = q * count
+        seen = 0
+        for bound, calls in zip(self.bounds, buckets):
+            seen += calls
+            if seen >= rank:
+                return min(bound, largest)
+        return largest
+
+    def snapshot(self):
+        """Return the histogram as a dict."""
+        with self._lock:
+            count, total = self.count, self.total
+            snapshot = {
+                'count': count,
+                'errors': self.errors,
+                'total': total,
+                'mean': total / count if count else 0.0,
+                'max': self.max,
+                'last': self.last,
+                'buckets': list(zip(self.bounds + (float('inf'),), self.buckets)),
+            }
+        snapshot['p50'] = self.quantile(0.5)
+        snapshot['p95'] = self.quantile(0.95)
+        return snapshot
+
+
+class MetricsRegistry:
+    """Named counters and histograms, recorded only while enabled.
+
+    Metrics are created on first use and kept across :meth:`reset`, so
+    wrappers can hold on to them.
+
+    Args:
+        enabled (bool): Record from the start.
+
+    Attributes:
+        enabled (bool): True while calls are recorded.
+    """
+
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self._counters = {}
+        self._histograms = {}
+        self._lock = threading.Lock()
+
+    def counter(self, name):
+        """Return the counter ``name``, creating it on first use."""
+        counter = self._counters.get(name)
+        if counter is None:
+            with self._lock:
+                counter = self._counters.setdefault(name, Counter(name))
+        return counter
+
+    def histogram(self, name):
+        """Return the latency histogram ``name``, creating it on first use."""
+        histogram = self._histograms.get(name)
+        if histogram is None:
+            with self._lock:
+                histogram = self._histograms.setdefault(name, Histogram(name))
+        return histogram
+
+    def count(self, name, amount=1):
+        """Add ``amount`` to the counter ``name`` if recording is enabled."""
+        if self.enabled:
+            self.counter(name).inc(amount)
+
+    @contextmanager
+    def timer(self, name):
+        """Record the duration of the ``with`` block in the histogram ``name``."""
+        if not self.enabled:
+            yield
+            return
+        histogram = self.histogram(name)
+        start = time.perf_counter()
+        error = False
+        try:
+            yield
+        except BaseException:
+            error = True
+            raise
+        finally:
+            histogram.observe(time.perf_counter() - start, error)
+
+    def timed(self, name):
+        """Decorator recording the duration of every call in the histogram ``name``."""
+        def decorate(func):
+            histogram = self.histogram(name)
+
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return func(*args, **kwargs)
+                start = time.perf_counter()
+                error = False
+                try:
+                    return func(*args, **kwargs)
+                except BaseException:
+                    error = True
+                    raise
+                finally:
+                    histogram.observe(time.perf_counter() - start, error)
+            return wrapper
+        return decorate
+
+    def reset(self):
+        """Zero all metrics."""
+        with self._lock:
+            metrics = list(self._counters.values()) + list(self._histograms.values())
+        for metric in metrics:
+            metric.reset()
+
+    def snapshot(self):
+        """Return all metrics as dicts.
+
+        Returns:
+            dict: ``enabled``, ``counters`` (name to value) and ``histograms``
+                (name to :meth:`Histogram.snapshot`), for metrics with at least one call.
+        """
+        with self._lock:
+            counters = list(self._counters.values())
+            histograms = list(self._histograms.values())
+        return {
+            'enabled': self.enabled,
+            'counters': {counter.name: counter.value for counter in counters if counter.value},
+            'histograms': {histogram.name: histogram.snapshot()
+                           for histogram in histograms if histogram.count},
+        }
+
+    def describe(self):
+        """One line per recorded metric, slowest total time first."""
+        snapshot = self.snapshot()
+        histograms = sorted(snapshot['histograms'].items(), key=lambda item: -item[1]['total'])
+        width = max((len(name) for name in list(snapshot['histograms']) + list(snapshot['counters'])),
+                    default=0)
+        lines = []
+        for name, stat in histograms:
+            line = (f"{name:{width}s} {stat['count']:6d} calls, mean {format_duration(stat['mean'])}, "
+                    f"p95 {format_duration(stat['p95'])}, max {format_duration(stat['max'])}")
+            if stat['errors']:
+                line += f", {stat['errors']} errors"
+            lines.append(line)
+        for name, value in sorted(snapshot['counters'].items()):
+            lines.append(f"{name:{width}s} {value:6d}")
+        return '\n'.join(lines) if lines else 'No metrics recorded'
+
+    def summary(self, names=None, limit=4):
+        """Mean durations of a few operations on one line, e.g. for a status bar.
+
+        Args:
+            names (list, optional): Histograms to show, by default the ``limit``
+                ones with the largest total time.
+            limit (int): Number of histograms shown without ``names``.
+        """
+        histograms = self.snapshot()['histograms']
+        if names is None:
+            names = sorted(histograms, key=lambda name: -histograms[name]['total'])[:limit]
+        return ' | '.join(f"{name} {format_duration(histograms[name]['mean'])}"
+                          for name in names if name in histograms)
+
+
+def format_duration(seconds):
+    """Format a duration with a unit that keeps it readable (s, ms or us)."""
+    if seconds >= 1:
+        return f"{seconds:.3g} s"
+    if seconds >= 1e-3:
+        return f"{seconds * 1e3:.3g} ms"
+    return f"{seconds * 1e6:.3g} us"
+
+
+# Process-wide registry used by the drivers, the logger and the tracking loops
+registry = MetricsRegistry(enabled=os.environ.get(METRICS_ENV_VAR, '') not in ('', '0'))
+
+timed = registry.timed
+timer = registry.timer
+count = registry.count
+snapshot = registry.snapshot
+describe = registry.describe
+summary = registry.summary
+reset = registry.reset
+
+
+def enable():
+    """Start recording metrics."""
+    registry.enabled = True
+
+
+def disable():
+    """Stop recording metrics, the recorded values are kept."""
+    registry.enabled = False
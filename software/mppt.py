@@ -0,0 +1,191 @@
+"""Vectorised perturb-and-observe MPP tracking over many channels.
+
+:class:`MPPTEngine` holds the tracker state of every channel in NumPy arrays
+and computes the next voltage set points of all channels in one step from a
+batch of measurements. It does no I/O. :class:`ArrayTracker` connects it to
+the hardware: it reads one sample per channel, logs it, runs the engine and
+hands the set points to the boards.
+
+The algorithm is the one of :meth:`Channel.mpp_track`: the step grows by
+``CHANNEL_POWER_INCREASE_FACTOR`` while the power rises and shrinks by
+``CHANNEL_POWER_DECREASE_FACTOR`` with a direction flip when it falls.
+
+Example:
+    >>> channels = [step.item for step in Schedule.from_managers(board_managers)]
+    >>> tracker = ArrayTracker(channels)
+    >>> while True:
+    ...     tracker.cycle()
+"""
+
+import os
+
+import numpy as np
+
+from .hardware.constants import (
+    CHANNEL_DATA_DIRECTORY,
+    CHANNEL_INITIAL_VOLTAGE,
+    CHANNEL_INITIAL_DIRECTION,
+    CHANNEL_INITIAL_POWER,
+    CHANNEL_INITIAL_VOLTAGE_STEP,
+    CHANNEL_MAX_VOLTAGE_STEP,
+    CHANNEL_MIN_VOLTAGE_STEP,
+    CHANNEL_POWER_INCREASE_FACTOR,
+    CHANNEL_POWER_DECREASE_FACTOR,
+)
+from .metrics import timed
+
+
+class MPPTEngine:
+    """Perturb-and-observe state of many channels as struct-of-arrays.
+
+    Args:
+        size (int): Number of channels.
+        min_step (float): Smallest voltage step (V).
+        increase (float): Step factor while the power rises.
+        decrease (float): Step factor when the power falls.
+
+    Attributes:
+        last_v (numpy.ndarray): Last voltage set point per channel (V).
+        last_dir (numpy.ndarray): Direction of the last step, +1 or -1.
+        last_p (numpy.ndarray): Last measured power (W).
+        dv (numpy.ndarray): Current voltage step (V).
+        max_dv (numpy.ndarray): Largest voltage step (V).
+    """
+
+    STATE = ('last_v', 'last_dir', 'last_p', 'dv', 'max_dv')
+
+    def __init__(self, size, min_step=CHANNEL_MIN_VOLTAGE_STEP,
+                 increase=CHANNEL_POWER_INCREASE_FACTOR, decrease=CHANNEL_POWER_DECREASE_FACTOR):
+        self.min_step = min_step
+        self.increase = increase
+        self.decrease = decrease
+        self.last_v = np.full(size, CHANNEL_INITIAL_VOLTAGE, dtype=float)
+        self.last_dir = np.full(size, CHANNEL_INITIAL_DIRECTION, dtype=float)
+        self.last_p = np.full(size, CHANNEL_INITIAL_POWER, dtype=float)
+        self.dv = np.full(size, CHANNEL_INITIAL_VOLTAGE_STEP, dtype=float)
+        self.max_dv = np.full(size, CHANNEL_MAX_VOLTAGE_STEP, dtype=float)
+
+    def __len__(self):
+        return len(self.last_v)
+
+    @classmethod
+    def from_channels(cls, channels, **kwargs):
+        """Create an engine that continues from the tracker state of some Channels."""
+        engine = cls(len(channels), **kwargs)
+        for name in cls.STATE:
+            getattr(engine, name)[:] = [getattr(channel, name) for channel in channels]
+        return engine
+
+    def store(self, channels):
+        """Copy the state back to the Channels, e.g. before going back to ``mpp_track``."""
+        for index, channel in enumerate(channels):
+            for name in self.STATE:
+                setattr(channel, name, getattr(self, name)[index].item())
+
+    def step(self, voltage, current):
+        """Compute the next set points from one measurement per channel.
+
+        Channels whose voltage or current is NaN (failed read) keep their state.
+
+        Args:
+            voltage (array_like): Measured voltage per channel (V).
+            current (array_like): Measured current per channel (A).
+
+        Returns:
+            numpy.ndarray: Next voltage set point per channel (V), the same array as ``last_v``.
+        """
+        power = np.asarray(voltage, dtype=float) * np.asarray(current, dtype=float)
+        valid = ~np.isnan(power)
+        rising = self.last_p < power
+
+        dv = np.where(rising, self.dv * self.increase, self.dv * self.decrease)
+        dv = np.maximum(np.minimum(dv, self.max_dv), self.min_step)
+        direction = np.where(rising, self.last_dir, -self.last_dir)
+
+        np.copyto(self.dv, dv, where=valid)
+        np.copyto(self.last_dir, direction, where=valid)
+        np.copyto(self.last_v, self.last_v + dv * direction, where=valid)
+        np.copyto(self.last_p, power, where=valid)
+        return self.last_v
+
+
+class ArrayTracker:
+    """Tracks the MPP of many channels with one :class:`MPPTEngine`.
+
+    Each :meth:`cycle` reads one sample per channel in the given order, logs
+    it like :meth:`Channel.mpp_track`, computes all set points at once and
+    writes them board by board.
+
+    Args:
+        channels (list[Channel]): Channels in reading order, e.g. from a Schedule.
+        engine (MPPTEngine, optional): Engine to use, by default one continuing
+            from the channels' own tracker state.
+
+    Attributes:
+        voltage (numpy.ndarray): Voltages of the last cycle, NaN for failed reads.
+        current (numpy.ndarray): Currents of the last cycle, NaN for failed reads.
+    """
+
+    def __init__(self, channels, engine=None):
+        self.channels = list(channels)
+        self.engine = engine if engine is not None else MPPTEngine.from_channels(self.channels)
+        if len(self.engine) != len(self.channels):
+            raise ValueError(f"Engine has {len(self.engine)} channels, expected {len(self.channels)}")
+        self.voltage = np.full(len(self.channels), np.nan)
+        self.current = np.full(len(self.channels), np.nan)
+        self._log_files = None
+
+        # Channels of the same board are set together
+        self._boards = {}
+        for index, channel in enumerate(self.channels):
+            self._boards.setdefault(id(channel.board), (channel.board, []))[1].append(index)
+
+    def _open_logs(self):
+        os.makedirs(CHANNEL_DATA_DIRECTORY, exist_ok=True)
+        self._log_files = []
+        for channel in self.channels:
+            file_name, header, prefix = channel.tracking_log_file()
+            channel.writers.open(file_name, header=header)
+            self._log_files.append((file_name, prefix))
+
+    @timed('array_tracker.cycle')
+    def cycle(self):
+        """Read, log and step every channel once.
+
+        Returns:
+            numpy.ndarray: The set points applied (V).
+        """
+        if self._log_files is None:
+            self._open_logs()
+        for index, channel in enumerate(self.channels):
+            try:
+                sample = channel.read_sample()
+            except Exception as e:
+                print(f"Error reading voltage or current of {channel.id}: {e}")
+                self.voltage[index] = self.current[index] = np.nan
+                continue
+            self.voltage[index] = sample.voltage
+            self.current[index] = sample.current
+            file_name, prefix = self._log_files[index]
+            channel.writers.write_row(file_name, prefix + (sample.timestamp, sample.voltage,
+                                                           sample.current, channel.dac.raw_value,
+                                                           sample.gain_v, sample.gain_c))
+
+        set_points = self.engine.step(self.voltage, self.current)
+        self.apply(set_points)
+        return set_points
+
+    def apply(self, set_points):
+        """Write the set points with one :meth:`OBoard.set_voltages` call per board.
+
+        Channels of a board that are not tracked keep their voltage.
+        """
+        for board, indices in self._boards.values():
+            voltages = [None] * len(board.channel)
+            for index in indices:
+                voltages[self.channels[index].ind] = set_points[index]
+            board.set_voltages(voltages)
+
+    def sync_channels(self):
+        """Copy the engine state to the Channels' own tracker attributes."""
+        self.engine.store(self.channels)
@@ -6,13 +6,18 @@ setup(
     packages=find_packages(),
     install_requires=[
         "numpy>=1.22",
-        "matplotlib>=3.5",
         "adafruit-blinka>=7.3.3",
         "adafruit-circuitpython-mcp4728>=1.0.8",
-        "adafruit-circuitpython-ads1x15>=2.3.9",
+        "adafruit-circuitpython-ads1x15>=3.0,<4",  # PacedADS1115 uses ADS1x15 internals of 3.x
         "adafruit-circuitpython-mcp230xx>=1.0.10",
-        "pandas>=1.4",
     ],
+    extras_require={
+        # Loading logs into DataFrames and plotting
+        "analysis": [
+            "matplotlib>=3.5",
+            "pandas>=1.4",
+        ],
+    },
     description="A Python package for Octoboard Maximum Power Point Tracker",
     author="Clemens Baretzky",
     author_email="Clemens.Baretzky@gmail.com",
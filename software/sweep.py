@@ -0,0 +1,200 @@
+"""Set point plans for JV sweeps.
+
+A plan hands out the next set voltage with :meth:`next_voltage` and takes the
+reading at that voltage with :meth:`add`, so the same plan can drive a sweep
+of one cell or, one step at a time, of all cells of a board.
+
+:class:`UniformSweep` is the fixed grid from the lower to the upper voltage
+limit and back. :class:`AdaptiveSweep` starts with a coarse step, takes finer
+steps where the current changes fast, stops going up once the current has
+crossed zero past Voc and then scans back down, adding points wherever the
+current changed a lot between two readings of the way up (the knee around
+the MPP).
+
+Both stop going up once the current exceeds ``max_current``: set points above
+the voltage where that happened are skipped.
+
+Example:
+    >>> plan = AdaptiveSweep(-0.3, 1.25, max_step=0.18, min_step=0.01)
+    >>> while (voltage := plan.next_voltage()) is not None:
+    ...     channel.set_voltage(voltage)
+    ...     sample = channel.read_sample()
+    ...     plan.add(voltage, sample.voltage, sample.current)
+    >>> print(plan.report())
+"""
+
+import time
+
+import numpy as np
+
+from .hardware.constants import ADAPTIVE_SWEEP_CURRENT_FRACTION
+
+
+class UniformSweep:
+    """Fixed-step sweep from ``start`` to ``stop`` and back down.
+
+    Args:
+        start (float): Lowest set voltage (V).
+        stop (float): Highest set voltage (V).
+        step (float): Voltage step (V).
+        max_current (float, optional): Current (A) above which no higher voltages are set.
+
+    Attributes:
+        set_voltages (list): Set voltage of each reading.
+        voltages (list): Measured voltages (V).
+        currents (list): Measured currents (A).
+    """
+
+    def __init__(self, start, stop, step, max_current=None):
+        voltages = np.arange(start, stop + step, step)
+        self._plan = list(np.concatenate([voltages, voltages[::-1]]))
+        self.max_current = max_current
+        self.threshold = np.inf
+        self.set_voltages = []
+        self.voltages = []
+        self.currents = []
+        self.started = None
+        self.finished = None
+
+    def next_voltage(self):
+        """Return the next set voltage (V), None once the sweep is done."""
+        if self.started is None:
+            self.started = time.monotonic()
+        while self._plan:
+            voltage = self._plan.pop(0)
+            if voltage <= self.threshold:
+                return voltage
+        if self.finished is None:
+            self.finished = time.monotonic()
+        return None
+
+    def add(self, set_voltage, voltage, current):
+        """Take the reading at ``set_voltage``. Pass None for both after a failed read."""
+        if voltage is None or current is None:
+            return
+        self.set_voltages.append(set_voltage)
+        self.voltages.append(voltage)
+        self.currents.append(current)
+        if self.max_current is not None and abs(current) > self.max_current:
+            self.threshold = set_voltage
+            print(f"Abbruch: {current:.3f} A > {self.max_current} A bei {set_voltage:.2f} V")
+
+    @property
+    def points(self):
+        """Number of readings taken."""
+        return len(self.set_voltages)
+
+    @property
+    def duration(self):
+        """Time from the first set point to the end of the sweep (seconds)."""
+        if self.started is None:
+            return 0.0
+        return (self.finished or time.monotonic()) - self.started
+
+    def arrays(self):
+        """Return (set voltages, measured voltages, measured currents) as arrays."""
+        return np.array(self.set_voltages), np.array(self.voltages), np.array(self.currents)
+
+    def report(self):
+        """One line summary with the point count and duration."""
+        return f"{type(self).__name__}: {self.points} points in {self.duration:.1f} s"
+
+
+class AdaptiveSweep(UniformSweep):
+    """Sweep with a step that follows the slope of the JV curve.
+
+    After each reading the next step is scaled so that the current changes by
+    about ``current_fraction`` of the largest current seen so far, limited to
+    ``min_step`` and ``max_step``, so the flat part near short circuit gets the
+    coarse step. The way up ends at ``stop``, at the first reading whose current
+    has crossed zero after a positive current (past Voc), or above
+    ``max_current``. A knee sharper than the step is only found once it has
+    been stepped over, so the way back down refines: between two readings of
+    the way up it adds as many points as the current change is multiples of the
+    aimed-for change, no closer than ``min_step``.
+
+    Args:
+        start (float): Lowest set voltage (V).
+        stop (float): Highest set voltage (V).
+        max_step (float): Coarsest voltage step (V).
+        min_step (float): Finest voltage step (V).
+        current_fraction (float): Aimed-for current change per step, relative to the
+            largest current so far.
+        reverse (bool): Scan back down after the way up, without it there is no refinement.
+        max_current (float, optional): Current (A) above which the way up ends.
+    """
+
+    def __init__(self, start, stop, max_step, min_step,
+                 current_fraction=ADAPTIVE_SWEEP_CURRENT_FRACTION, reverse=True,
+                 max_current=None):
+        super().__init__(start, stop, max_step, max_current=max_current)
+        self._plan = []
+        self.start = start
+        self.stop = stop
+        self.max_step = max_step
+        self.min_step = min_step
+        self.current_fraction = current_fraction
+        self.reverse = reverse
+        self.step = max_step
+        self._next = start
+        self._up = []
+        self._last = None
+        self._reference = 0.0
+        self._going_up = True
+
+    def next_voltage(self):
+        """Return the next set voltage (V), None once the sweep is done."""
+        if self.started is None:
+            self.started = time.monotonic()
+        if self._going_up:
+            if self._next is not None:
+                return self._next
+            self._going_up = False
+            if self.reverse:
+                self._plan = [voltage for voltage in self._refined()[::-1] if voltage <= self.threshold]
+        return super().next_voltage()
+
+    def _refined(self):
+        """Set voltages of the way up with points added where the current changed a lot."""
+        readings = dict(zip(self.set_voltages, self.currents))
+        target = self.current_fraction * self._reference
+        refined = self._up[:1]
+        for low, high in zip(self._up, self._up[1:]):
+            splits = 1
+            if target > 0 and low in readings and high in readings:
+                splits = int(np.ceil(abs(readings[high] - readings[low]) / target))
+                splits = max(1, min(splits, int((high - low) / self.min_step)))
+            refined.extend(float(low + (high - low) * step / splits) for step in range(1, splits + 1))
+        return refined
+
+    def add(self, set_voltage, voltage, current):
+        """Take the reading at ``set_voltage``. Pass None for both after a failed read."""
+        super().add(set_voltage, voltage, current)
+        if not self._going_up:
+            return
+        self._up.append(set_voltage)
+        if voltage is None or current is None:
+            self._next = self._advance(set_voltage)
+            return
+
+        past_voc = current <= 0 and self._reference > 0
+        if self.threshold < np.inf or past_voc:
+            self._next = None
+            return
+
+        if self._last is not None:
+            change = abs(current - self._last)
+            target = self.current_fraction * self._reference
+            if change > 0 and target > 0:
+                self.step = self.step * target / change
+            elif change == 0:
+                self.step = self.max_step
+            self.step = min(max(self.step, self.min_step), self.max_step)
+        self._last = current
+        self._reference = max(self._reference, abs(current))
+        self._next = self._advance(set_voltage)
+
+    def _advance(self, set_voltage):
+        if set_voltage >= self.stop:
+            return None
+        return min(set_voltage + self.step, self.stop)
@@ -0,0 +1,216 @@
+"""Incremental sync of data files to a network share.
+
+The measurement code only registers its data files. A background thread copies
+the bytes appended since the last pass to the target folder every ``period``
+seconds. The share is accessed through ordinary file I/O, so any mounted share
+works: a gvfs/CIFS mount, or a local directory when testing.
+
+If a pass fails or takes longer than ``slow_threshold``, the time to the next
+pass doubles up to ``max_backoff``. Measurement is never blocked.
+
+Example:
+    >>> sync = NetworkSync(period=10)
+    >>> sync.register("DATA/TRACKING_DATA/CELL1_data.csv", "/mnt/share/TRACKING_DATA")
+    >>> ...
+    >>> sync.stop()  # final pass, then stop the thread
+"""
+
+import os
+import threading
+import time
+
+from .hardware.constants import (
+    SYNC_PERIOD,
+    SYNC_SLOW_THRESHOLD,
+    SYNC_MAX_BACKOFF,
+    SYNC_CHUNK_SIZE,
+)
+from .metrics import timed
+
+
+class _SyncedFile:
+    """Sync state of one source file."""
+
+    def __init__(self, source, target):
+        self.source = source
+        self.target = target
+        self.offset = 0      # Bytes of the source known to be on the share
+        self.inode = None
+
+
+class NetworkSync:
+    """Copies appended bytes of registered files to a share in the background.
+
+    A file is copied in full the first time, when it shrank (truncated) or was
+    replaced, and when the target on the share is missing or shorter than
+    expected. Otherwise only the bytes behind the last synced offset are sent.
+
+    Args:
+        period (float): Time between sync passes in seconds.
+        slow_threshold (float): Pass duration in seconds above which the share counts as slow.
+        max_backoff (float): Longest time between passes when the share is slow or failing.
+        before_sync (callable, optional): Called before each pass, e.g. to flush log buffers.
+
+    Attributes:
+        passes (int): Completed sync passes.
+        bytes_synced (int): Bytes written to the share.
+        full_copies (int): Files copied from the start.
+        errors (int): Failed file syncs.
+        last_success (float): Wall-clock time of the last pass without errors, None before.
+        delay (float): Current time between passes, including backoff.
+    """
+
+    def __init__(self, period=SYNC_PERIOD, slow_threshold=SYNC_SLOW_THRESHOLD,
+                 max_backoff=SYNC_MAX_BACKOFF, before_sync=None):
+        self.period = period
+        self.slow_threshold = slow_threshold
+        self.max_backoff = max_backoff
+        self.before_sync = before_sync
+        self.delay = period
+        self.passes = 0
+        self.bytes_synced = 0
+        self.full_copies = 0
+        self.errors = 0
+        self.last_success = None
+        self._files = {}
+        self._lock = threading.Lock()
+        self._sync_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopping = False
+        self._thread = None
+
+    @property
+    def running(self):
+        """True while the sync thread is alive."""
+        return self._thread is not None and self._thread.is_alive()
+
+    def stats(self):
+        """Return the sync counters as a dict."""
+        return {
+            'files': len(self._files),
+            'passes': self.passes,
+            'bytes_synced': self.bytes_synced,
+            'full_copies': self.full_copies,
+            'errors': self.errors,
+            'last_success': self.last_success,
+            'delay': self.delay,
+        }
+
+    def register(self, source, target_folder):
+        """Sync a file to a folder on the share, starting the sync thread if needed.
+
+        Registering the same file again is cheap and does nothing.
+        """
+        target = os.path.join(target_folder, os.path.basename(source))
+        with self._lock:
+            entry = self._files.get(source)
+            if entry is None or entry.target != target:
+                self._files[source] = _SyncedFile(source, target)
+        self.start()
+
+    def unregister(self, source):
+        """Stop syncing a file."""
+        with self._lock:
+            self._files.pop(source, None)
+
+    def start(self):
+        """Start the sync thread if it is not running."""
+        with self._lock:
+            if not self.running:
+                self._stopping = False
+                self._wake.clear()
+                self.delay = self.period
+                self._thread = threading.Thread(target=self._run, name='NetworkSync',
+                                                daemon=True)
+                self._thread.start()
+
+    def stop(self, final_sync=True, timeout=None):
+        """Stop the sync thread, optionally after one last pass."""
+        self._stopping = True
+        self._wake.set()
+        if self.running:
+            self._thread.join(timeout)
+        if final_sync:
+            self.sync_once()
+
+    @timed('sync.pass')
+    def sync_once(self):
+        """Sync all registered files now.
+
+        Returns:
+            bool: True if every file was synced.
+        """
+        with self._sync_lock:
+            if self.before_sync is not None:
+                try:
+                    self.before_sync()
+                except Exception as e:
+                    print(f"Error preparing network sync: {e}")
+            with self._lock:
+                entries = list(self._files.values())
+            ok = True
+            for entry in entries:
+                try:
+                    self._sync_file(entry)
+                except OSError as e:
+                    self.errors += 1
+                    ok = False
+                    print(f"Error syncing {entry.source} to {entry.target}: {e}")
+            self.passes += 1
+            if ok:
+                self.last_success = time.time()
+            return ok
+
+    @timed('sync.file')
+    def _sync_file(self, entry):
+        try:
+            stat = os.stat(entry.source)
+        except FileNotFoundError:
+            return
+        try:
+            target_size = os.path.getsize(entry.target)
+        except FileNotFoundError:
+            target_size = None
+
+        full_copy = (target_size is None or target_size < entry.offset
+                     or stat.st_size < entry.offset or stat.st_ino != entry.inode)
+        if full_copy:
+            entry.offset = 0
+        elif stat.st_size == entry.offset:
+            return
+
+        os.makedirs(os.path.dirname(entry.target) or '.', exist_ok=True)
+        with open(entry.source, 'rb') as src, \
+                open(entry.target, 'r+b' if target_size is not None else 'wb') as dst:
+            src.seek(entry.offset)
+            dst.seek(entry.offset)
+            remaining = stat.st_size - entry.offset
+            while remaining > 0:
+                chunk = src.read(min(SYNC_CHUNK_SIZE, remaining))
+                if not chunk:
+                    break
+                dst.write(chunk)
+                remaining -= len(chunk)
+            dst.truncate()
+            end = dst.tell()
+        self.bytes_synced += end - entry.offset
+        if full_copy:
+            self.full_copies += 1
+        entry.offset = end
+        entry.inode = stat.st_ino
+
+    def _run(self):
+        while not self._stopping:
+            self._wake.wait(self.delay)
+            if self._stopping:
+                break
+            start = time.monotonic()
+            ok = self.sync_once()
+            self._update_delay(ok, time.monotonic() - start)
+
+    def _update_delay(self, ok, duration):
+        """Back off after a failed or slow pass, return to ``period`` after a good one."""
+        if ok and duration <= self.slow_threshold:
+            self.delay = self.period
+        else:
+            self.delay = min(max(self.delay, self.period) * 2, self.max_backoff)
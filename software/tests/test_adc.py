@@ -0,0 +1,59 @@
+import unittest
+from unittest import mock
+from adafruit_ads1x15.analog_in import AnalogIn
+from software.hardware.sim import SimulatedI2C, SimADS1115
+from software.hardware.adc import PacedADS1115
+
+
+class ReadyPin:
+    """ALERT/RDY input wired to a simulated ADC, low once the conversion is done."""
+
+    def __init__(self, chip):
+        self.chip = chip
+
+    @property
+    def value(self):
+        return self.chip._busy()
+
+
+class TestPacedADS1115(unittest.TestCase):
+    def setUp(self):
+        self.bus = SimulatedI2C(1)
+        self.chip = self.bus.attach(SimADS1115(0x48, lambda mux: 0.5, realtime=True))
+        self.adc = PacedADS1115(self.bus, gain=2, data_rate=860, address=0x48)
+
+    def test_read_takes_one_conversion_without_busy_polling(self):
+        transactions = self.bus.transactions
+        self.assertAlmostEqual(AnalogIn(self.adc, 0, 1).voltage, 0.5, places=3)
+        # Config write, ready check, conversion read
+        self.assertLessEqual(self.bus.transactions - transactions, 4)
+        self.assertEqual(self.adc.conversions, 1)
+        self.assertEqual(self.chip.data_rate, 860)
+
+    def test_gain_change_is_written_with_the_conversion(self):
+        transactions = self.bus.transactions
+        self.adc.gain = 16
+        self.assertEqual(self.bus.transactions, transactions)
+        AnalogIn(self.adc, 2, 3).voltage
+        self.assertEqual(self.chip.full_scale, 0.256)
+
+    def test_ready_pin_replaces_register_polling(self):
+        adc = PacedADS1115(self.bus, gain=2, data_rate=860, address=0x48,
+                           ready_pin=ReadyPin(self.chip))
+        transactions = self.bus.transactions
+        self.assertAlmostEqual(AnalogIn(adc, 0, 1).voltage, 0.5, places=3)
+        # Config write and conversion read only
+        self.assertEqual(self.bus.transactions - transactions, 2)
+        self.assertEqual(self.chip.registers[SimADS1115.REG_HI_THRESH], 0x8000)
+        self.assertEqual(self.chip.registers[SimADS1115.REG_LO_THRESH], 0x0000)
+
+    def test_stuck_conversion_times_out(self):
+        self.adc.timeout = 0.01
+        with mock.patch.object(self.chip, '_busy', return_value=True):
+            with self.assertRaises(OSError):
+                AnalogIn(self.adc, 0, 1).voltage
+        self.assertGreater(self.adc.polls, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
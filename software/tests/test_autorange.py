@@ -0,0 +1,89 @@
+import unittest
+import os
+import tempfile
+import shutil
+from software.hardware.sim import SimulatedRig, DiodeCell
+from software.hardware import OBoardManager
+from software.hardware.autorange import AutoRange
+
+
+class TestAutoRange(unittest.TestCase):
+    def test_reading_above_range_lowers_gain_at_once(self):
+        autorange = AutoRange(16)
+        self.assertTrue(autorange.update(0.24))  # > 0.9 * 0.256 V
+        self.assertEqual(autorange.gain, 8)
+
+    def test_saturated_reading_lowers_gain(self):
+        autorange = AutoRange(4)
+        self.assertTrue(autorange.update(0.5, saturated=True))
+        self.assertEqual(autorange.gain, 2)
+
+    def test_gain_rises_after_hold_readings(self):
+        autorange = AutoRange(2, hold=3)
+        # Fits within 0.8 of the 1.024 V range of gain 4
+        self.assertFalse(autorange.update(0.5))
+        self.assertFalse(autorange.update(0.5))
+        self.assertTrue(autorange.update(0.5))
+        self.assertEqual(autorange.gain, 4)
+
+    def test_hysteresis_keeps_gain_near_boundary(self):
+        autorange = AutoRange(2, hold=1)
+        # Between the thresholds of gain 2 and gain 4 nothing changes
+        for value in (0.85, 0.95, 0.85, 1.5, 0.9):
+            self.assertFalse(autorange.update(value))
+        self.assertEqual(autorange.changes, 0)
+
+    def test_reading_outside_band_resets_hold(self):
+        autorange = AutoRange(2, hold=2)
+        autorange.update(0.5)
+        autorange.update(1.0)
+        self.assertFalse(autorange.update(0.5))
+        self.assertEqual(autorange.gain, 2)
+
+    def test_limits(self):
+        self.assertFalse(AutoRange(2/3).update(7.0, saturated=True))
+        self.assertFalse(AutoRange(16, hold=1).update(0.0))
+        self.assertTrue(AutoRange.saturated(32767))
+        self.assertTrue(AutoRange.saturated(-32768))
+        self.assertFalse(AutoRange.saturated(32766))
+
+
+class TestChannelAutoRange(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.cwd = os.getcwd()
+        os.chdir(self.temp_dir)
+        # 20 mA through 20 Ohm is 0.4 V across the shunt, beyond the 0.256 V range of gain 16
+        cells = [DiodeCell(photocurrent=20e-3) for _ in range(8)]
+        self.rig = SimulatedRig.with_boards(i2c_nums=[1], offsets=[0], cells=cells).install()
+        self.channel = OBoardManager(i2c_num=1).oboards[0].channel[0]
+        self.channel.gain_c = 16
+        self.channel.set_voltage(0.1)
+
+    def test_saturated_current_is_read_again_at_lower_gain(self):
+        sample = self.channel.read_sample()
+        self.assertEqual(sample.gain_c, 8)
+        expected = self.rig.boards()[0].cells[0].current(0.1)
+        self.assertAlmostEqual(sample.current, expected, places=5)
+
+    def test_fixed_gain_saturates(self):
+        self.channel.autorange = False
+        sample = self.channel.read_sample()
+        self.assertEqual(sample.gain_c, 16)
+        self.assertAlmostEqual(sample.current, 0.256 / 20, places=4)
+
+    def test_gains_used_are_logged(self):
+        self.channel.mpp_track(iterations=2, interval=0)
+        self.channel.writers.flush()
+        with open(os.path.join('data', f'{self.channel.id}_data.csv')) as f:
+            rows = [line.strip().split(',') for line in f.readlines()[1:]]
+        self.assertEqual([row[-1] for row in rows], ['8', '8'])
+
+    def tearDown(self):
+        self.rig.uninstall()
+        os.chdir(self.cwd)
+        shutil.rmtree(self.temp_dir)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,26 @@
+import unittest
+from software.bench import compare_to_baseline
+
+
+class TestCompareToBaseline(unittest.TestCase):
+    def setUp(self):
+        self.baseline = {
+            "mpp_track.samples_per_s": {"value": 100.0, "unit": "1/s", "higher_is_better": True},
+            "cycle_all_channels.cycle_time": {"value": 2.0, "unit": "s", "higher_is_better": False},
+        }
+
+    def test_within_tolerance(self):
+        metrics = {
+            "mpp_track.samples_per_s": {"value": 85.0},
+            "cycle_all_channels.cycle_time": {"value": 2.3},
+        }
+        self.assertEqual(compare_to_baseline(metrics, self.baseline, tolerance=0.2), [])
+
+    def test_regression_detected(self):
+        metrics = {
+            "mpp_track.samples_per_s": {"value": 70.0},
+            "cycle_all_channels.cycle_time": {"value": 1.0},
+        }
+        regressions = compare_to_baseline(metrics, self.baseline, tolerance=0.2)
+        self.assertEqual(len(regressions), 1)
+        self.assertTrue(regressions[0].startswith("mpp_track.samples_per_s"))
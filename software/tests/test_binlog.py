@@ -0,0 +1,78 @@
+import unittest
+import os
+import tempfile
+import shutil
+from datetime import datetime
+import numpy as np
+import pandas as pd
+from software.binlog import (
+    BinaryLogWriter,
+    read_binary_log,
+    load_binary_log,
+    convert_binary_log,
+    timestamp_to_ns,
+    CHANNEL_RECORD,
+)
+from software.logger import WriterPool
+
+
+class TestBinaryLog(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.file_name = os.path.join(self.temp_dir, 'channel_data.obl')
+        self.rows = [
+            ("2024-01-01T00:00:00.000001", 0.612345, 0.004321, 1234, 2, 16),
+            (datetime(2024, 1, 1, 0, 0, 1), np.float64(0.5), -1e-6, 0, 2 / 3, 1),
+        ]
+
+    def test_round_trip(self):
+        writer = BinaryLogWriter(self.file_name)
+        for row in self.rows:
+            writer.write_row(row)
+        writer.close()
+        self.assertEqual(os.path.getsize(self.file_name), 16 + 2 * CHANNEL_RECORD.itemsize)
+
+        data = read_binary_log(self.file_name)
+        self.assertIsInstance(data, np.memmap)
+        self.assertEqual(data['timestamp'][0], timestamp_to_ns(self.rows[0][0]))
+        self.assertEqual(data['timestamp'][1] - data['timestamp'][0], 999999000)
+        np.testing.assert_allclose(data['measured_voltage'], [0.612345, 0.5], rtol=1e-6)
+        self.assertEqual(list(data['dac_value']), [1234, 0])
+
+        frame = load_binary_log(self.file_name)
+        self.assertEqual(frame['timestamp'][0], pd.Timestamp("2024-01-01T00:00:00.000001"))
+        self.assertEqual(list(frame['adc_gain_v']), [2, 2 / 3])
+        self.assertEqual(list(frame['adc_gain_c']), [16, 1])
+
+    def test_append_cuts_partial_record(self):
+        writer = BinaryLogWriter(self.file_name)
+        writer.write_row(self.rows[0])
+        writer.close()
+        with open(self.file_name, 'ab') as f:
+            f.write(b'\x01\x02\x03')  # Torn write
+        self.assertEqual(len(read_binary_log(self.file_name)), 1)
+
+        writer = BinaryLogWriter(self.file_name)
+        writer.write_row(self.rows[1])
+        writer.close()
+        data = read_binary_log(self.file_name)
+        self.assertEqual(list(data['dac_value']), [1234, 0])
+
+    def test_layout_mismatch_raises(self):
+        BinaryLogWriter(self.file_name, header='board').close()
+        with self.assertRaises(ValueError):
+            BinaryLogWriter(self.file_name, header='channel')
+
+    def test_pool_writes_board_layout_and_csv_export(self):
+        pool = WriterPool()
+        for channel, row in enumerate(self.rows):
+            pool.write_row(self.file_name, (channel,) + row, header='board')
+        pool.close()
+        output = os.path.join(self.temp_dir, 'export.csv')
+        convert_binary_log(self.file_name, output)
+        frame = pd.read_csv(output)
+        self.assertEqual(list(frame['channel']), [0, 1])
+        self.assertEqual(frame['timestamp'][0], "2024-01-01T00:00:00.000001")
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
@@ -0,0 +1,99 @@
+import unittest
+import math
+import os
+import json
+import tempfile
+import shutil
+from unittest import mock
+from software.hardware.sim import SimulatedRig
+from software.hardware import OBoardManager
+from software.hardware.calibration import (
+    settle_time_from_trace,
+    load_settle_calibration,
+    save_settle_calibration,
+)
+
+
+class TestSettleTimeFromTrace(unittest.TestCase):
+    def test_exponential_step(self):
+        times = [i * 0.001 for i in range(100)]
+        values = [0.5 - 0.5 * math.exp(-t / 0.005) for t in times]
+        # 0.5 V step within 2 mV after tau * ln(250) = 27.6 ms
+        self.assertAlmostEqual(settle_time_from_trace(times, values, 0.002), 0.028, places=3)
+
+    def test_flat_trace_settles_at_first_reading(self):
+        self.assertEqual(settle_time_from_trace([0.001, 0.002, 0.003, 0.004], [1.0] * 4, 0.002), 0.001)
+
+    def test_still_moving_trace_is_not_settled(self):
+        times = [i * 0.001 for i in range(20)]
+        self.assertIsNone(settle_time_from_trace(times, [t * 10 for t in times], 0.002))
+
+
+class TestChannelCalibration(unittest.TestCase):
+    DAC_TAU = [0.001, 0.005, 0, 0, 0, 0, 0, 0]
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.rig = SimulatedRig.with_boards(i2c_nums=[1], offsets=[0], dac_tau=self.DAC_TAU,
+                                            mux_tau=0.0005).install()
+        self.manager = OBoardManager(i2c_num=1)
+        self.board = self.manager.oboards[0]
+
+    def test_slow_channel_gets_longer_settle_time(self):
+        fast = self.board.channel[0].calibrate_settle_time(window=0.06)
+        slow = self.board.channel[1].calibrate_settle_time(window=0.06)
+        # 0.5 V step, 2 mV tolerance: tau * ln(250) plus one conversion
+        self.assertGreaterEqual(fast['dac'], 0.001 * math.log(250))
+        self.assertLess(fast['dac'], 0.001 * math.log(250) + 0.01)
+        self.assertGreaterEqual(slow['dac'], 0.005 * math.log(250))
+        self.assertLess(slow['dac'], 0.005 * math.log(250) + 0.01)
+        self.assertGreater(fast['mux'], 0)
+        self.assertAlmostEqual(self.board.channel[1].settle_time, slow['dac'] * 1.5)
+        self.assertAlmostEqual(self.board.channel[1].mux_settle_time, slow['mux'] * 1.5)
+
+    def test_calibration_restores_dac_values_and_data_rate(self):
+        channel = self.board.channel[2]
+        channel.set_voltage(0.3)
+        self.board.channel[3].set_voltage(0.4)
+        values = (channel.dac.raw_value, self.board.channel[3].dac.raw_value)
+        data_rate = self.board.Adc.data_rate
+        channel.calibrate_settle_time(window=0.01)
+        self.assertEqual((channel.dac.raw_value, self.board.channel[3].dac.raw_value), values)
+        self.assertEqual(self.board.Adc.data_rate, data_rate)
+
+    def test_read_sample_uses_calibrated_settle_time(self):
+        channel = self.board.channel[4]
+        channel.settle_time = 0.0123
+        sleeps = []
+        with mock.patch('time.sleep', sleeps.append):
+            channel.read_sample()
+            channel.read_sample()
+        self.assertEqual(sleeps.count(0.0123), 2)
+        self.assertEqual(channel.settle_time_per_sample, 0.0123)
+
+    def test_save_and_load_keeps_other_entries(self):
+        file_name = os.path.join(self.temp_dir, 'calibration.json')
+        with open(file_name, 'w') as f:
+            json.dump({'version': 1, 'channels': {'other': {'settle_time': 1.0}}}, f)
+
+        self.board.channel[2].calibrate_settle_time(window=0.01)
+        save_settle_calibration(self.manager.channels(), file_name)
+        with open(file_name) as f:
+            self.assertEqual(set(json.load(f)['channels']),
+                             {'other', self.board.channel[2].id})
+
+        self.board.channel[2].settle_time = 1.0
+        self.board.channel[2].mux_settle_time = 1.0
+        self.assertEqual(load_settle_calibration(self.manager.channels(), file_name), 1)
+        self.assertEqual(self.board.channel[2].settle_time,
+                         self.board.channel[2].settle_calibration['settle_time'])
+        self.assertEqual(self.board.channel[2].mux_settle_time,
+                         self.board.channel[2].settle_calibration['mux_settle_time'])
+
+    def tearDown(self):
+        self.rig.uninstall()
+        shutil.rmtree(self.temp_dir)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,74 @@
+import unittest
+from software.hardware.sim import SimulatedI2C, SimMCP4728, SimulatedRig
+from software.hardware.dac import FastMCP4728
+from software.hardware import OBoardManager
+
+
+class TestFastMCP4728(unittest.TestCase):
+    def setUp(self):
+        self.bus = SimulatedI2C(1)
+        self.chip = self.bus.attach(SimMCP4728(0x60))
+        self.dac = FastMCP4728(self.bus, address=0x60)
+        self.dac.channel_b.gain = 2
+
+    def test_fast_write_sets_all_channels_in_one_transaction(self):
+        transactions = self.bus.transactions
+        self.dac.fast_write([1, 2000, 4095, 0])
+        self.assertEqual(self.bus.transactions - transactions, 1)
+        self.assertEqual(self.chip.values, [1, 2000, 4095, 0])
+        self.assertEqual([channel.raw_value for channel in self.dac.channels], [1, 2000, 4095, 0])
+        # Gain is not part of a fast write
+        self.assertEqual(self.chip.gain[1], 1)
+
+    def test_none_keeps_value(self):
+        self.dac.channel_c.raw_value = 123
+        self.dac.fast_write([10, None, None, 20])
+        self.assertEqual(self.chip.values, [10, 0, 123, 20])
+
+    def test_invalid_value_writes_nothing(self):
+        transactions = self.bus.transactions
+        with self.assertRaises(AttributeError):
+            self.dac.fast_write([10, 5000, 0, 0])
+        self.assertEqual(self.bus.transactions, transactions)
+        self.assertEqual(self.dac.channel_a.raw_value, 0)
+
+
+class TestBoardVoltages(unittest.TestCase):
+    def setUp(self):
+        self.rig = SimulatedRig.with_boards(i2c_nums=[1], offsets=[0]).install()
+        self.manager = OBoardManager(i2c_num=1)
+        self.board = self.manager.oboards[0]
+
+    def test_set_voltages_matches_set_voltage(self):
+        voltages = [0.0, 0.1, 0.25, 0.4, 0.55, 0.7, 0.9, 5.0]
+        bus = self.rig.get_bus(1)
+        # Open the DACs first, the board creates its devices on first use
+        self.board.Dac_0, self.board.Dac_1
+        transactions = bus.transactions
+        self.board.set_voltages(voltages)
+        self.assertEqual(bus.transactions - transactions, 2)
+        codes = [channel.dac.raw_value for channel in self.board.channel]
+
+        for channel, voltage in zip(self.board.channel, voltages):
+            channel.set_voltage(0)
+            channel.set_voltage(voltage)
+        self.assertEqual([channel.dac.raw_value for channel in self.board.channel], codes)
+
+    def test_none_keeps_channel_voltage(self):
+        self.board.channel[5].set_voltage(0.6)
+        code = self.board.channel[5].dac.raw_value
+        self.board.set_voltages([0.3] * 5 + [None] + [0.3] * 2)
+        self.assertEqual(self.board.channel[5].dac.raw_value, code)
+        self.assertEqual(self.board.channel[6].dac.raw_value, self.board.channel[6].dac_code(0.3))
+
+    def test_set_all_voltages(self):
+        self.manager.set_all_voltages(0.5)
+        self.assertEqual({channel.dac.raw_value for channel in self.manager.channels()},
+                         {self.board.channel[0].dac_code(0.5)})
+
+    def tearDown(self):
+        self.rig.uninstall()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,92 @@
+import unittest
+import os
+import tempfile
+import shutil
+import urllib.request
+import urllib.error
+from unittest import mock
+from software.hardware.sim import SimulatedRig
+from software.hardware import OBoardManager
+from software.exporter import MetricsExporter, format_labels
+from software.logger import LogPipeline
+from software.metrics import MetricsRegistry
+from software.sync import NetworkSync
+
+
+def sample_lines(text, name):
+    return [line for line in text.splitlines() if line.startswith(name + '{') or line.startswith(name + ' ')]
+
+
+class TestMetricsExporter(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.cwd = os.getcwd()
+        os.chdir(self.temp_dir)
+        self.rig = SimulatedRig.with_boards(i2c_nums=[1], offsets=[0]).install()
+        self.bus = self.rig.get_bus(1)
+        self.manager = OBoardManager(i2c_num=1)
+        for channel in self.manager.channels():
+            channel.writers = LogPipeline()
+        self.registry = MetricsRegistry(enabled=True)
+        self.exporter = MetricsExporter([self.manager], pipeline=LogPipeline(),
+                                        sync=NetworkSync(), registry=self.registry)
+
+    def test_latest_readings_per_channel(self):
+        before = self.exporter.render()
+        self.assertEqual(sample_lines(before, 'octoboard_channel_voltage_volts'), [])
+        self.assertEqual(len(sample_lines(before, 'octoboard_channel_samples_total')), 8)
+
+        channel = self.manager.oboards[0].channel[3]
+        channel.set_voltage(0.5)
+        sample = channel.read_sample()
+        text = self.exporter.render()
+        labels = format_labels({'bus': 1, 'board': 0, 'channel': 3})
+        self.assertIn(f'octoboard_channel_voltage_volts{labels} {sample.voltage!r}', text)
+        self.assertIn(f'octoboard_channel_power_watts{labels} {sample.voltage * sample.current!r}', text)
+        self.assertIn(f'octoboard_channel_samples_total{labels} 1', text)
+        self.assertEqual(len(sample_lines(text, 'octoboard_channel_samples_per_second')), 8)
+        self.assertIn('octoboard_sync_lag_seconds NaN', text)
+        self.assertIn('octoboard_log_queue_depth 0', text)
+
+    def test_read_errors_per_bus(self):
+        channel = self.manager.oboards[0].channel[0]
+        with mock.patch.object(self.bus, 'writeto_then_readfrom', side_effect=OSError("NACK")), \
+                mock.patch.object(self.bus, 'readfrom_into', side_effect=OSError("NACK")):
+            with self.assertRaises(OSError):
+                channel.read_sample()
+        text = self.exporter.render()
+        self.assertIn('octoboard_bus_read_errors_total{bus="1"} 1', text)
+
+    def test_cycle_time_and_operation_histograms(self):
+        timed_cycle = self.registry.timed('manager.cycle')(lambda: None)
+        timed_cycle()
+        text = self.exporter.render()
+        self.assertEqual(len(sample_lines(text, 'octoboard_cycle_seconds')), 1)
+        self.assertIn('octoboard_operation_duration_seconds_bucket{operation="manager.cycle",le="+Inf"} 1',
+                      text)
+        self.assertIn('octoboard_operation_duration_seconds_count{operation="manager.cycle"} 1', text)
+
+    def test_scrape_does_not_touch_the_bus(self):
+        self.manager.cycle_all_channels(iterations_per_channel=1, interval=0)
+        self.exporter.serve(port=0)
+        host, port = self.exporter.address
+        self.assertEqual(host, '127.0.0.1')
+        with mock.patch.object(self.bus, 'readfrom_into', side_effect=AssertionError("bus read")), \
+                mock.patch.object(self.bus, 'writeto', side_effect=AssertionError("bus write")), \
+                mock.patch.object(self.bus, 'writeto_then_readfrom', side_effect=AssertionError("bus read")):
+            with urllib.request.urlopen(f'http://{host}:{port}/metrics') as response:
+                self.assertTrue(response.headers['Content-Type'].startswith('text/plain'))
+                text = response.read().decode()
+        self.assertEqual(len(sample_lines(text, 'octoboard_channel_voltage_volts')), 8)
+        with self.assertRaises(urllib.error.HTTPError):
+            urllib.request.urlopen(f'http://{host}:{port}/other')
+
+    def tearDown(self):
+        self.exporter.stop()
+        self.rig.uninstall()
+        os.chdir(self.cwd)
+        shutil.rmtree(self.temp_dir)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,48 @@
+import unittest
+from adafruit_mcp230xx.mcp23017 import MCP23017
+from software.hardware.sim import SimulatedI2C, SimMCP23017
+from software.hardware.gpio import CachedMCP23017
+from software.hardware.sdac import Softdac
+from software.hardware.constants import SOFTDAC_MUX_PINS, SOFTDAC_GAIN_REGISTERS
+
+
+class TestCachedMCP23017(unittest.TestCase):
+    def setUp(self):
+        self.bus = SimulatedI2C(1)
+        self.chip = self.bus.attach(SimMCP23017(0x20))
+        self.gpio = CachedMCP23017(MCP23017(self.bus, address=0x20))
+
+    def test_pattern_in_one_write_per_register(self):
+        writes = self.chip.register_writes
+        self.assertTrue(self.gpio.write_pins({4: 1, 5: 0, 6: 1}))
+        # OLATA and IODIRA, one byte each
+        self.assertEqual(self.chip.register_writes - writes, 2)
+        self.assertEqual([self.chip.output_level(pin) for pin in (4, 5, 6)], [True, False, True])
+
+    def test_unchanged_pattern_is_not_written(self):
+        self.gpio.write_pins({4: 1, 5: 0, 6: 1})
+        transactions = self.bus.transactions
+        self.assertFalse(self.gpio.write_pins({4: 1, 5: 0, 6: 1}))
+        self.assertEqual(self.bus.transactions, transactions)
+
+        # Only the output latch changes once the pins are outputs
+        self.gpio.write_pins({4: 0, 5: 1, 6: 1})
+        self.assertEqual(self.bus.transactions, transactions + 1)
+        self.assertEqual(self.chip.olat & 0x70, 0b0110 << 4)
+
+    def test_only_changed_port_is_written(self):
+        self.gpio.write_pins({8: 1, 9: 1})
+        self.assertEqual(self.chip.iodir, 0xFCFF)
+        self.assertEqual(self.chip.olat, 0x0300)
+
+    def test_refresh_reads_chip_state(self):
+        self.chip.registers[0x14] = 0x81
+        self.gpio.refresh()
+        self.assertTrue(self.gpio.output_level(7))
+        self.assertTrue(self.gpio.output_level(0))
+
+    def test_softdac_sets_gain_pins(self):
+        softdac = Softdac(self.gpio)
+        softdac.gain = 5
+        levels = [self.chip.output_level(pin) for pin in SOFTDAC_MUX_PINS]
+        self.assertEqual(levels, [bool(v) for v in SOFTDAC_GAIN_REGISTERS[5]])
@@ -0,0 +1,121 @@
+import unittest
+import threading
+from unittest import mock
+from software.hardware.sim import SimulatedRig, SimulatedI2C
+from software.hardware import OBoardManager
+from software.hardware import i2c
+from software.hardware.i2c import ExtendedI2C, open_bus, close_bus, bus_users, set_bus_factory
+
+
+class TestSharedBuses(unittest.TestCase):
+    def setUp(self):
+        self.rig = SimulatedRig.with_boards(i2c_nums=[1, 3], offsets=[0, 1]).install()
+
+    def test_one_bus_object_per_bus_number(self):
+        bus = open_bus(1)
+        self.assertIs(open_bus(1), bus)
+        self.assertIsNot(open_bus(3), bus)
+        self.assertEqual(bus_users(1), 2)
+        self.assertEqual(bus_users(3), 1)
+
+    def test_deinit_after_last_user(self):
+        deinits = []
+        buses = {}
+
+        def factory(bus_id):
+            bus = buses[bus_id] = SimulatedI2C(bus_id)
+            bus.deinit = lambda: deinits.append(bus_id)
+            return bus
+
+        set_bus_factory(factory)
+        first = open_bus(2)
+        second = open_bus(2)
+        close_bus(first)
+        self.assertEqual(deinits, [])
+        close_bus(second)
+        self.assertEqual(deinits, [2])
+        self.assertEqual(bus_users(2), 0)
+        # Opened again afterwards, a new bus object
+        self.assertIsNot(open_bus(2), first)
+
+    def test_manager_and_boards_share_the_bus(self):
+        manager = OBoardManager(i2c_num=1)
+        self.assertEqual(len(manager.oboards), 2)
+        for oboard in manager.oboards:
+            self.assertIs(oboard.i2c, manager.i2c)
+            self.assertIs(oboard.Adc.i2c_device.i2c, manager.i2c)
+        self.assertEqual(bus_users(1), 3)
+        manager.deinit()
+        self.assertEqual(bus_users(1), 0)
+
+    def tearDown(self):
+        self.rig.uninstall()
+
+
+class TestHardwareBus(unittest.TestCase):
+    def setUp(self):
+        # The hardware ExtendedI2C path, with the Linux device stubbed out
+        set_bus_factory(None)
+        patches = [
+            mock.patch.object(i2c, '_I2C'),
+            mock.patch.object(i2c.path, 'exists', return_value=True),
+        ]
+        self.device = patches[0].start()
+        patches[1].start()
+        for patch in patches:
+            self.addCleanup(patch.stop)
+
+    def test_open_and_close_extended_i2c(self):
+        result = []
+        thread = threading.Thread(target=lambda: result.append(open_bus(7)), daemon=True)
+        thread.start()
+        thread.join(5)
+        self.assertFalse(thread.is_alive(), "open_bus deadlocked")
+        bus = result[0]
+        self.assertIsInstance(bus, ExtendedI2C)
+        self.assertIs(open_bus(7), bus)
+        self.assertEqual(self.device.call_count, 1)
+        close_bus(bus)
+        self.assertEqual(bus_users(7), 1)
+        bus.deinit()
+        self.assertEqual(bus_users(7), 0)
+        self.assertFalse(hasattr(bus, '_i2c'))
+
+    def test_missing_device_raises(self):
+        with mock.patch.object(i2c.path, 'exists', return_value=False):
+            with self.assertRaises(ValueError):
+                open_bus(99)
+        self.assertEqual(bus_users(99), 0)
+
+    def tearDown(self):
+        set_bus_factory(None)
+
+
+class TestExtendedI2CLock(unittest.TestCase):
+    def setUp(self):
+        # No /dev/i2c-* here, only the lock is exercised
+        self.bus = ExtendedI2C.__new__(ExtendedI2C)
+        self.bus._lock = threading.RLock()
+
+    def test_try_lock_excludes_other_threads(self):
+        self.assertTrue(self.bus.try_lock())
+        results = []
+        thread = threading.Thread(target=lambda: results.append(self.bus.try_lock()))
+        thread.start()
+        thread.join()
+        self.assertEqual(results, [False])
+        self.bus.unlock()
+
+        thread = threading.Thread(target=lambda: results.append(self.bus.try_lock()))
+        thread.start()
+        thread.join()
+        self.assertEqual(results, [False, True])
+
+    def test_lock_holder_can_lock_for_a_transaction(self):
+        with self.bus._lock:
+            self.assertTrue(self.bus.try_lock())
+            self.bus.unlock()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,32 @@
+import unittest
+import os
+import subprocess
+import sys
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+
+
+def loaded_modules(statement):
+    """Modules loaded by a fresh interpreter after running ``statement``."""
+    code = f"import sys; {statement}; print(' '.join(sys.modules))"
+    env = dict(os.environ, PYTHONPATH=REPO_ROOT)
+    result = subprocess.run([sys.executable, '-c', code], env=env, check=True,
+                            capture_output=True, text=True)
+    return set(result.stdout.split())
+
+
+class TestLazyImports(unittest.TestCase):
+    def test_cli_does_not_load_the_drivers(self):
+        modules = loaded_modules('import software.cli')
+        for name in ('numpy', 'busio', 'software.hardware.oboard', 'software.mppt'):
+            self.assertNotIn(name, modules)
+
+    def test_drivers_are_loaded_on_first_use(self):
+        modules = loaded_modules('from software import OBoardManager')
+        self.assertIn('software.hardware.oboard', modules)
+        self.assertIn('software.hardware.manager', modules)
+        self.assertNotIn('adafruit_blinka.microcontroller.generic_linux.spi', modules)
+
+
+if __name__ == '__main__':
+    unittest.main()
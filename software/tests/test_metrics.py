@@ -0,0 +1,85 @@
+import unittest
+from software.hardware.sim import SimulatedRig
+from software.hardware import OBoardManager
+from software.metrics import MetricsRegistry, Histogram
+from software import metrics
+
+
+class TestMetricsRegistry(unittest.TestCase):
+    def setUp(self):
+        self.registry = MetricsRegistry()
+
+        @self.registry.timed('op')
+        def op(fail=False):
+            if fail:
+                raise OSError("NACK")
+            return 1
+
+        self.op = op
+
+    def test_disabled_records_nothing(self):
+        self.assertEqual(self.op(), 1)
+        self.registry.count('events')
+        with self.registry.timer('block'):
+            pass
+        snapshot = self.registry.snapshot()
+        self.assertEqual(snapshot['histograms'], {})
+        self.assertEqual(snapshot['counters'], {})
+
+    def test_calls_and_errors_are_recorded(self):
+        self.registry.enabled = True
+        self.op()
+        with self.assertRaises(OSError):
+            self.op(fail=True)
+        self.registry.count('events', 3)
+        snapshot = self.registry.snapshot()
+        self.assertEqual(snapshot['histograms']['op']['count'], 2)
+        self.assertEqual(snapshot['histograms']['op']['errors'], 1)
+        self.assertEqual(snapshot['counters'], {'events': 3})
+        self.assertIn('op', self.registry.describe())
+
+        self.registry.reset()
+        self.assertEqual(self.registry.snapshot()['histograms'], {})
+        self.op()
+        self.assertEqual(self.registry.snapshot()['histograms']['op']['count'], 1)
+
+    def test_quantiles_from_buckets(self):
+        histogram = Histogram('latency', bounds=(0.001, 0.01, 0.1))
+        for duration in [0.0005] * 90 + [0.05] * 10:
+            histogram.observe(duration)
+        self.assertEqual(histogram.quantile(0.5), 0.001)
+        self.assertEqual(histogram.quantile(0.95), 0.05)
+        histogram.observe(2.0)
+        self.assertEqual(histogram.quantile(1.0), 2.0)
+        self.assertEqual(histogram.snapshot()['buckets'][-1], (float('inf'), 1))
+
+
+class TestInstrumentedDrivers(unittest.TestCase):
+    def setUp(self):
+        self.rig = SimulatedRig.with_boards(i2c_nums=[1], offsets=[0]).install()
+        self.manager = OBoardManager(i2c_num=1)
+        metrics.reset()
+        metrics.enable()
+
+    def test_bus_operations_are_timed(self):
+        channel = self.manager.oboards[0].channel[2]
+        channel.set_voltage(0.4)
+        channel.read_voltage()
+        channel.read_current()
+        channel.read_sample()
+        histograms = metrics.snapshot()['histograms']
+        self.assertEqual(histograms['channel.set_voltage']['count'], 1)
+        self.assertEqual(histograms['channel.read_voltage']['count'], 1)
+        self.assertEqual(histograms['channel.read_current']['count'], 1)
+        self.assertEqual(histograms['mux.select']['count'], 3)
+        # Only the first selection switches the mux
+        self.assertEqual(metrics.snapshot()['counters']['mux.switches'], 1)
+
+    def tearDown(self):
+        metrics.disable()
+        metrics.reset()
+        self.rig.uninstall()
+
+
+if __name__ == '__main__':
+    unittest.main()
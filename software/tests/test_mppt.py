@@ -0,0 +1,108 @@
+import unittest
+import os
+import tempfile
+import shutil
+import numpy as np
+from software.hardware.sim import SimulatedRig
+from software.hardware import OBoardManager
+from software.hardware.constants import (
+    CHANNEL_POWER_INCREASE_FACTOR,
+    CHANNEL_POWER_DECREASE_FACTOR,
+    CHANNEL_MIN_VOLTAGE_STEP,
+)
+from software.mppt import MPPTEngine, ArrayTracker
+
+
+def scalar_step(state, voltage, current):
+    """The P&O update of Channel.mpp_track on a dict of scalars."""
+    curr_p = voltage * current
+    if state['last_p'] < curr_p:
+        state['dv'] = min(state['dv'] * CHANNEL_POWER_INCREASE_FACTOR, state['max_dv'])
+    else:
+        state['dv'] = min(state['dv'] * CHANNEL_POWER_DECREASE_FACTOR, state['max_dv'])
+        state['last_dir'] *= -1
+    state['dv'] = max(CHANNEL_MIN_VOLTAGE_STEP, state['dv'])
+    state['last_v'] += state['dv'] * state['last_dir']
+    state['last_p'] = curr_p
+
+
+class TestMPPTEngine(unittest.TestCase):
+    def test_matches_scalar_tracker(self):
+        rng = np.random.default_rng(1)
+        engine = MPPTEngine(50)
+        engine.max_dv[:] = rng.uniform(0.05, 0.3, 50)
+        states = [{name: getattr(engine, name)[i].item() for name in MPPTEngine.STATE}
+                  for i in range(50)]
+        for _ in range(30):
+            voltage = rng.uniform(0, 1, 50)
+            current = rng.uniform(0, 5e-3, 50)
+            set_points = engine.step(voltage, current)
+            for i, state in enumerate(states):
+                scalar_step(state, voltage[i], current[i])
+            np.testing.assert_allclose(set_points, [s['last_v'] for s in states])
+            np.testing.assert_allclose(engine.dv, [s['dv'] for s in states])
+            np.testing.assert_array_equal(engine.last_dir, [s['last_dir'] for s in states])
+
+    def test_failed_reads_keep_state(self):
+        engine = MPPTEngine(3)
+        engine.step([0.5, 0.5, 0.5], [1e-3, 1e-3, 1e-3])
+        before = {name: getattr(engine, name).copy() for name in MPPTEngine.STATE}
+        engine.step([0.6, np.nan, 0.4], [1e-3, 1e-3, np.nan])
+        for name in MPPTEngine.STATE:
+            self.assertEqual(getattr(engine, name)[1], before[name][1])
+            self.assertEqual(getattr(engine, name)[2], before[name][2])
+        self.assertNotEqual(engine.last_v[0], before['last_v'][0])
+
+
+class TestArrayTracker(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.cwd = os.getcwd()
+        os.chdir(self.temp_dir)
+        self.rig = SimulatedRig.with_boards(i2c_nums=[1], offsets=[0, 1]).install()
+        self.manager = OBoardManager(i2c_num=1)
+        self.channels = [step.item for step in self.manager.schedule()]
+
+    def test_state_round_trip(self):
+        self.channels[3].last_v = 0.42
+        self.channels[3].last_dir = -1
+        engine = MPPTEngine.from_channels(self.channels)
+        self.assertEqual(engine.last_v[3], 0.42)
+        engine.last_v[3] = 0.5
+        engine.store(self.channels)
+        self.assertEqual(self.channels[3].last_v, 0.5)
+        self.assertEqual(self.channels[3].last_dir, -1)
+
+    def test_cycle_logs_and_applies_set_points(self):
+        tracker = ArrayTracker(self.channels)
+        for _ in range(3):
+            set_points = tracker.cycle()
+        self.assertEqual(len(set_points), 16)
+        self.assertFalse(np.isnan(tracker.voltage).any())
+        for channel, set_point in zip(self.channels, set_points):
+            self.assertEqual(channel.dac.raw_value, int(
+                min(max(channel.Voltage_limits[0], set_point), channel.Voltage_limits[1])
+                * 2**16 / 8) >> 4)
+        self.channels[0].writers.flush()
+        with open(os.path.join('data', f'{self.channels[5].id}_data.csv')) as f:
+            self.assertEqual(len(f.readlines()), 4)
+
+    def test_tracker_and_mpp_track_agree(self):
+        channel = self.channels[2]
+        twin = self.channels[10]  # Same cell model on the other board
+        tracker = ArrayTracker([channel])
+        tracker.cycle()
+        twin.mpp_track(iterations=1, interval=0)
+        tracker.sync_channels()
+        self.assertAlmostEqual(channel.last_v, twin.last_v)
+        self.assertAlmostEqual(channel.last_p, twin.last_p)
+
+    def tearDown(self):
+        self.channels[0].writers.flush()
+        self.rig.uninstall()
+        os.chdir(self.cwd)
+        shutil.rmtree(self.temp_dir)
+
+
+if __name__ == '__main__':
+    unittest.main()
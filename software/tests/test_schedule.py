@@ -0,0 +1,114 @@
+import unittest
+import random
+from software.hardware.schedule import Schedule, ScheduleStep, DeadlineScheduler
+from software.hardware.sim import SimulatedRig
+from software.hardware import OBoardManager
+
+
+class TestSchedule(unittest.TestCase):
+    def test_groups_by_tca_then_board_then_channel(self):
+        steps = [ScheduleStep(tca, board, channel, (tca, board, channel))
+                 for tca in range(3) for board in range(2) for channel in range(8)]
+        shuffled = steps[:]
+        random.Random(1).shuffle(shuffled)
+        schedule = Schedule(shuffled)
+        self.assertEqual([step.item for step in schedule], [step.item for step in steps])
+        self.assertEqual(schedule.transitions(), (3, 48))
+
+    def test_budget(self):
+        steps = [ScheduleStep(tca, 0, channel, None) for tca in (0, 1) for channel in range(4)]
+        budget = Schedule(steps).budget(tca_settle_time=0.1, mux_settle_time=0.01,
+                                        visit_settle_time=0.5)
+        self.assertEqual(budget['tca_switches'], 2)
+        self.assertAlmostEqual(budget['tca_settle'], 0.2)
+        self.assertAlmostEqual(budget['mux_settle'], 0.08)
+        self.assertAlmostEqual(budget['visit_settle'], 4.0)
+        self.assertAlmostEqual(budget['total_settle'], 4.28)
+
+    def test_single_tca_branch_needs_no_switch_per_cycle(self):
+        steps = [ScheduleStep(5, 0, channel, None) for channel in range(8)]
+        self.assertEqual(Schedule(steps).transitions(), (0, 8))
+
+    def test_from_managers(self):
+        with SimulatedRig.with_boards(i2c_nums=[1], offsets=[0, 1]).install():
+            manager = OBoardManager(i2c_num=1, possible_offsets=[0, 1])
+            schedule = manager.schedule()
+        self.assertEqual(len(schedule), 16)
+        self.assertEqual([step.item for step in schedule][:8], manager.oboards[0].channel)
+        self.assertEqual(schedule.budget()['tca_switches'], 0)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class FakeSweep:
+    """Sweep job that takes ``steps`` steps of ``duration`` seconds each."""
+
+    def __init__(self, clock, keys, steps, duration, log):
+        self.clock, self.keys, self.left, self.duration, self.log = clock, keys, steps, duration, log
+
+    def step(self):
+        self.clock.now += self.duration
+        self.log.append(('sweep', tuple(self.keys)))
+        self.left -= 1
+        return self.left > 0
+
+
+class TestDeadlineScheduler(unittest.TestCase):
+    def make(self, keys, steps=10, track_time=1.0, step_time=2.0, **kwargs):
+        self.clock = FakeClock()
+        self.log = []
+
+        def track(key):
+            self.clock.now += track_time
+            self.log.append(('track', key))
+
+        def start_sweep(job_keys):
+            return FakeSweep(self.clock, job_keys, steps, step_time, self.log)
+
+        return DeadlineScheduler(keys, track, start_sweep, clock=self.clock, **kwargs)
+
+    def test_round_robin_without_sweeps(self):
+        scheduler = self.make('abc', interval=1e6, last_sweep={key: 999.0 for key in 'abc'})
+        for _ in range(6):
+            self.assertEqual(scheduler.run_once(), 'track')
+        self.assertEqual([key for _, key in self.log], list('abcabc'))
+
+    def test_sweep_is_interleaved_within_max_gap(self):
+        keys = 'abcd'
+        last_sweep = {key: 999.0 for key in 'bcd'}
+        scheduler = self.make(keys, steps=20, interval=1e6, max_gap=10, last_sweep=last_sweep)
+        while scheduler.job is not None or not self.log:
+            scheduler.run_once()
+        sweep_steps = [entry for entry in self.log if entry[0] == 'sweep']
+        self.assertEqual(len(sweep_steps), 20)
+        self.assertEqual(sweep_steps[0][1], ('a',))
+        # Other cells were tracked in between, and never waited longer than max_gap
+        self.assertGreater(len(self.log), 20)
+        self.assertNotIn(('track', 'a'), self.log)
+        self.assertLessEqual(scheduler.max_seen_gap, 10)
+        self.assertEqual(scheduler.run_once(), 'track')
+
+    def test_due_cells_of_a_group_are_swept_together_then_staggered(self):
+        scheduler = self.make('abcd', steps=3, interval=400, group=lambda key: 0)
+        scheduler.run_once()
+        self.assertEqual(scheduler.job_keys, list('abcd'))
+        while scheduler.job is not None:
+            scheduler.run_once()
+        dues = sorted(scheduler.due.values())
+        self.assertTrue(all(later - earlier >= 100 for earlier, later in zip(dues, dues[1:])))
+        self.assertGreaterEqual(dues[0], self.clock.now + 400 - 6)
+
+    def test_overloaded_tracking_still_ends_the_sweep(self):
+        scheduler = self.make('abcd', steps=5, interval=1e6, max_gap=2,
+                              last_sweep={key: 999.0 for key in 'bcd'})
+        for _ in range(40):
+            scheduler.run_once()
+        self.assertEqual(sum(1 for entry in self.log if entry[0] == 'sweep'), 5)
+        self.assertIsNone(scheduler.job)
+
@@ -0,0 +1,117 @@
+import unittest
+import os
+import tempfile
+import shutil
+from datetime import datetime
+from unittest import mock
+from software.hardware.sim import SimulatedRig, SimulatedI2C, DiodeCell
+from software.hardware import OBoardManager
+from software.hardware.constants import CHANNEL_ADC_SETTLE_TIME
+
+
+class TestDiodeCell(unittest.TestCase):
+    def test_short_circuit_and_open_circuit(self):
+        cell = DiodeCell(photocurrent=5e-3)
+        self.assertAlmostEqual(cell.current(0.0), 5e-3)
+        self.assertAlmostEqual(cell.current(cell.open_circuit_voltage), 0.0, delta=2e-4)
+
+
+class TestSimulatedI2C(unittest.TestCase):
+    def test_missing_device_raises_oserror(self):
+        bus = SimulatedI2C(1)
+        with self.assertRaises(OSError):
+            bus.writeto(0x20, b"\x00")
+
+    def test_tca_routes_downstream_devices(self):
+        rig = SimulatedRig.with_tca(bus_id=1, tca_channels=[2], offsets=[0])
+        bus = rig.get_bus(1)
+        self.assertEqual(bus.scan(), [0x70])
+        rig.smbus(1).write_byte(0x70, 1 << 2)
+        self.assertEqual(bus.scan(), [32, 72, 96, 97, 0x70])
+
+
+class TestSimulatedManager(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.cwd = os.getcwd()
+        os.chdir(self.temp_dir)
+        self.rig = SimulatedRig.with_boards(i2c_nums=[1], offsets=[0, 2]).install()
+
+    def test_setup_boards(self):
+        manager = OBoardManager(i2c_num=1)
+        self.assertEqual(len(manager.oboards), 2)
+
+    def test_set_voltage_and_read_back(self):
+        manager = OBoardManager(i2c_num=1)
+        channel = manager.oboards[0].channel[5]
+        channel.set_voltage(0.5)
+        sim_board = self.rig.boards()[0]
+        self.assertAlmostEqual(channel.read_voltage(), 0.5, places=2)
+        expected_current = sim_board.cells[5].current(sim_board.bias_voltage(5))
+        self.assertAlmostEqual(channel.read_current(), expected_current, places=4)
+
+    def test_read_sample_selects_and_settles_once(self):
+        manager = OBoardManager(i2c_num=1)
+        channel = manager.oboards[0].channel[3]
+        channel.set_voltage(0.4)
+        sim_board = self.rig.boards()[0]
+        sleeps = []
+        with mock.patch('time.sleep', sleeps.append):
+            writes = sim_board.mux.register_writes
+            sample = channel.read_sample()
+            self.assertEqual(sleeps.count(CHANNEL_ADC_SETTLE_TIME), 1)
+            self.assertGreater(sim_board.mux.register_writes, writes)
+
+            # Already selected: no mux write, still exactly one settle
+            writes = sim_board.mux.register_writes
+            channel.read_sample()
+            self.assertEqual(sim_board.mux.register_writes, writes)
+            self.assertEqual(sleeps.count(CHANNEL_ADC_SETTLE_TIME), 2)
+
+        self.assertAlmostEqual(sample.voltage, 0.4, places=2)
+        expected_current = sim_board.cells[3].current(sim_board.bias_voltage(3))
+        self.assertAlmostEqual(sample.current, expected_current, places=4)
+        datetime.fromisoformat(sample.timestamp)
+
+    def test_mpp_track_writes_csv(self):
+        manager = OBoardManager(i2c_num=1)
+        channel = manager.oboards[1].channel[0]
+        channel.mpp_track(iterations=3, interval=0)
+        channel.writers.flush()
+        with open(os.path.join('data', f'{channel.id}_data.csv')) as f:
+            self.assertEqual(len(f.readlines()), 4)
+
+    def test_board_iv_sweep_settles_once_per_step(self):
+        manager = OBoardManager(i2c_num=1)
+        board = manager.oboards[0]
+        board.channel[2].Voltage_limits = (0, 0.5)
+        sleeps = []
+        with mock.patch('time.sleep', sleeps.append):
+            board.perform_iv_sweep(start_value=0, end_value=2, step_size=1)
+        self.assertEqual(sleeps.count(CHANNEL_ADC_SETTLE_TIME), 3)
+        self.assertEqual({channel.dac.raw_value for channel in board.channel}, {0})
+
+        board.channel[0].writers.flush()
+        rows = {}
+        for channel in board.channel:
+            with open(os.path.join('IV', f'{channel.id}_data.csv')) as f:
+                rows[channel.ind] = [line.split(',') for line in f.readlines()[1:]]
+        self.assertEqual([len(r) for r in rows.values()], [3] * 8)
+        # Per-channel voltage limits still apply
+        self.assertAlmostEqual(float(rows[2][2][1]), 0.5, places=2)
+        self.assertAlmostEqual(float(rows[3][2][1]), 1.2, places=2)
+
+        # Same readings as the channel's own sweep
+        board.channel[3].perform_iv_sweep(start_value=0, end_value=2, step_size=1)
+        board.channel[3].writers.flush()
+        with open(os.path.join('IV', f'{board.channel[3].id}_data.csv')) as f:
+            single = [line.split(',') for line in f.readlines()[1:]]
+        for board_row, single_row in zip(rows[3], single):
+            self.assertAlmostEqual(float(board_row[1]), float(single_row[1]), places=3)
+            self.assertAlmostEqual(float(board_row[2]), float(single_row[2]), places=5)
+            self.assertEqual(board_row[3], single_row[3])
+
+    def tearDown(self):
+        self.rig.uninstall()
+        os.chdir(self.cwd)
+        shutil.rmtree(self.temp_dir)
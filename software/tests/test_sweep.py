@@ -0,0 +1,118 @@
+import unittest
+import os
+import sys
+import numpy as np
+from software.hardware.sim import DiodeCell
+from software.sweep import UniformSweep, AdaptiveSweep
+
+
+def run(plan, cell):
+    """Drive a plan with ideal readings of a cell model."""
+    while (voltage := plan.next_voltage()) is not None:
+        plan.add(voltage, voltage, cell.current(voltage))
+    return plan
+
+
+class TestUniformSweep(unittest.TestCase):
+    def test_forward_and_reverse_grid(self):
+        plan = run(UniformSweep(0, 1.0, 0.25), DiodeCell(photocurrent=5e-3))
+        np.testing.assert_allclose(plan.set_voltages, [0, 0.25, 0.5, 0.75, 1.0, 1.0, 0.75, 0.5, 0.25, 0])
+        self.assertEqual(plan.points, 10)
+
+    def test_max_current_skips_higher_voltages(self):
+        # Past Voc the diode current grows fast and negative
+        plan = run(UniformSweep(0, 1.2, 0.1, max_current=0.01), DiodeCell(photocurrent=5e-3))
+        top = max(plan.set_voltages)
+        self.assertGreater(abs(plan.currents[plan.set_voltages.index(top)]), 0.01)
+        self.assertTrue(all(abs(c) <= 0.01 for v, c in zip(plan.set_voltages, plan.currents) if v < top))
+
+
+class TestAdaptiveSweep(unittest.TestCase):
+    def setUp(self):
+        self.cell = DiodeCell(photocurrent=5e-3)
+
+    def test_stops_past_voc_and_scans_back(self):
+        plan = run(AdaptiveSweep(-0.3, 1.25, max_step=0.18, min_step=0.01), self.cell)
+        top = int(np.argmax(plan.set_voltages))
+        forward, reverse = plan.set_voltages[:top + 1], plan.set_voltages[top + 1:]
+        self.assertTrue(np.all(np.diff(forward) > 0))
+        self.assertTrue(np.all(np.diff(reverse) < 0))
+        self.assertEqual(reverse[0], forward[-1])
+        self.assertTrue(set(forward) <= set(reverse))
+        # The last forward point is the first one past Voc
+        self.assertLessEqual(plan.currents[top], 0)
+        self.assertTrue(all(c > 0 for c in plan.currents[:top]))
+        self.assertLess(forward[-1], self.cell.open_circuit_voltage + 0.18)
+
+    def test_fewer_points_and_fine_steps_at_the_knee(self):
+        uniform = run(UniformSweep(-0.3, 1.25, 0.045), self.cell)
+        adaptive = run(AdaptiveSweep(-0.3, 1.25, max_step=0.18, min_step=0.01), self.cell)
+        self.assertLess(adaptive.points, uniform.points * 0.7)
+
+        top = int(np.argmax(adaptive.set_voltages))
+        self.assertAlmostEqual(adaptive.set_voltages[1] - adaptive.set_voltages[0], 0.18)
+        reverse = np.array(adaptive.set_voltages[top:][::-1])
+        power = np.array(uniform.voltages) * uniform.currents
+        mpp = uniform.set_voltages[int(np.argmax(power))]
+        # Points at most min_step apart (plus rounding) from the MPP to Voc
+        knee = reverse[reverse >= mpp - 0.01]
+        self.assertLess(np.diff(knee).max(), 0.0125)
+
+    def test_failed_read_moves_on(self):
+        plan = AdaptiveSweep(0, 1.0, max_step=0.2, min_step=0.01)
+        self.assertEqual(plan.next_voltage(), 0)
+        plan.add(0, None, None)
+        self.assertAlmostEqual(plan.next_voltage(), 0.2)
+        self.assertEqual(plan.points, 0)
+
+    def test_max_current_ends_way_up(self):
+        plan = run(AdaptiveSweep(0, 1.2, max_step=0.2, min_step=0.01, max_current=1e-3),
+                   DiodeCell(photocurrent=5e-3))
+        self.assertEqual(plan.points, 2)
+        self.assertEqual(plan.set_voltages, [0, 0])
+
+
+class TestMppFromJVData(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        gui_folder = os.path.join(os.path.dirname(__file__), '..', '..', 'examples', 'GUI_Marburg')
+        sys.path.insert(0, os.path.abspath(gui_folder))
+        try:
+            from helpers import get_mpp_from_j_v_data
+        except ImportError as e:
+            raise unittest.SkipTest(f"GUI dependencies not installed: {e}")
+        finally:
+            sys.path.pop(0)
+        cls.get_mpp = staticmethod(get_mpp_from_j_v_data)
+
+    def setUp(self):
+        self.cell = DiodeCell(photocurrent=5e-3)
+        voltages = np.arange(0, self.cell.open_circuit_voltage, 1e-4)
+        power = voltages * np.array([self.cell.current(v) for v in voltages])
+        self.mpp_voltage = voltages[np.argmax(power)]
+
+    def test_mpp_between_points_of_a_non_uniform_grid(self):
+        plan = run(AdaptiveSweep(-0.3, 1.25, max_step=0.18, min_step=0.01), self.cell)
+        self.assertGreater(len(set(np.round(np.diff(sorted(set(plan.set_voltages))), 6))), 1)
+        v_set, voltage, current = self.get_mpp(plan.set_voltages, plan.voltages, plan.currents)
+        # Closer to the true MPP than the best measured point, 60 mV apart there
+        power = np.array(plan.voltages) * plan.currents
+        best_point = plan.voltages[int(np.argmax(power))]
+        self.assertLess(abs(voltage - self.mpp_voltage), abs(best_point - self.mpp_voltage))
+        self.assertAlmostEqual(voltage, self.mpp_voltage, delta=0.015)
+        self.assertAlmostEqual(current, self.cell.current(voltage), delta=1e-4)
+        # Set and measured voltages are the same for ideal readings
+        self.assertAlmostEqual(v_set, voltage, places=6)
+
+    def test_readings_per_set_voltage_are_averaged(self):
+        set_voltages = [0.2, 0.4, 0.5, 0.55, 0.6, 0.65]
+        currents = [self.cell.current(v) for v in set_voltages]
+        single = self.get_mpp(set_voltages, set_voltages, currents)
+        # Forward and reverse readings off by the same amount in opposite directions
+        both = self.get_mpp(set_voltages + set_voltages[::-1], set_voltages + set_voltages[::-1],
+                            [c + 1e-4 for c in currents] + [c - 1e-4 for c in currents[::-1]])
+        np.testing.assert_allclose(both, single)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,85 @@
+import unittest
+import os
+import tempfile
+import shutil
+from software.sync import NetworkSync
+
+
+class TestNetworkSync(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.source = os.path.join(self.temp_dir, 'local', 'CELL1_data.csv')
+        self.share = os.path.join(self.temp_dir, 'share', 'TRACKING_DATA')
+        self.target = os.path.join(self.share, 'CELL1_data.csv')
+        os.makedirs(os.path.dirname(self.source))
+        self.sync = NetworkSync(period=3600)
+
+    def append(self, text):
+        with open(self.source, 'a') as f:
+            f.write(text)
+
+    def assert_synced(self):
+        with open(self.source, 'rb') as a, open(self.target, 'rb') as b:
+            self.assertEqual(a.read(), b.read())
+
+    def test_only_appended_bytes_are_copied(self):
+        self.append('header\n1,2\n')
+        self.sync.register(self.source, self.share)
+        self.sync.sync_once()
+        self.assert_synced()
+        copied = self.sync.bytes_synced
+
+        self.append('3,4\n')
+        self.sync.sync_once()
+        self.assert_synced()
+        self.assertEqual(self.sync.bytes_synced - copied, len('3,4\n'))
+        self.assertEqual(self.sync.full_copies, 1)
+
+        self.sync.sync_once()  # Nothing new
+        self.assertEqual(self.sync.bytes_synced - copied, len('3,4\n'))
+
+    def test_truncated_source_is_copied_again(self):
+        self.append('header\n1,2\n3,4\n')
+        self.sync.register(self.source, self.share)
+        self.sync.sync_once()
+        with open(self.source, 'w') as f:
+            f.write('header\n5\n')
+        self.sync.sync_once()
+        self.assert_synced()
+        self.assertEqual(self.sync.full_copies, 2)
+
+    def test_missing_target_is_copied_again(self):
+        self.append('header\n1,2\n')
+        self.sync.register(self.source, self.share)
+        self.sync.sync_once()
+        os.remove(self.target)
+        self.append('3,4\n')
+        self.sync.sync_once()
+        self.assert_synced()
+
+    def test_failing_share_backs_off(self):
+        self.append('header\n')
+        with open(os.path.join(self.temp_dir, 'share'), 'w') as f:
+            f.write('not a folder')
+        sync = NetworkSync(period=10, max_backoff=35)
+        sync.register(self.source, self.share)
+        self.assertFalse(sync.sync_once())
+        self.assertEqual(sync.errors, 1)
+        sync._update_delay(False, 0)
+        sync._update_delay(False, 0)
+        self.assertEqual(sync.delay, 35)
+        sync._update_delay(True, 0)
+        self.assertEqual(sync.delay, 10)
+        sync.stop(final_sync=False)
+
+    def test_stop_runs_final_sync(self):
+        self.append('header\n')
+        self.sync.register(self.source, self.share)
+        self.assertTrue(self.sync.running)
+        self.sync.stop()
+        self.assertFalse(self.sync.running)
+        self.assert_synced()
+
+    def tearDown(self):
+        self.sync.stop(final_sync=False)
+        shutil.rmtree(self.temp_dir)
@@ -0,0 +1,60 @@
+import unittest
+import threading
+from software.hardware.sim import SimulatedI2C
+from software.hardware.tca import TCA9548A
+
+
+class TestTCA9548A(unittest.TestCase):
+    def setUp(self):
+        self.bus = SimulatedI2C(1)
+        self.sim_tca = self.bus.add_tca9548a()
+        self.tca = TCA9548A(self.bus, settle_time=0)
+
+    def test_redundant_selection_is_skipped(self):
+        self.assertTrue(self.tca.select(3))
+        self.assertFalse(self.tca.select(3))
+        self.assertEqual(self.sim_tca.control, 1 << 3)
+        self.assertEqual(self.sim_tca.writes, 1)
+        self.assertEqual(self.tca.selected, 3)
+
+        self.tca.select(5)
+        self.assertEqual(self.sim_tca.control, 1 << 5)
+        self.assertEqual(self.sim_tca.writes, 2)
+
+    def test_disable_and_invalidate(self):
+        self.tca.select(2)
+        self.tca.disable()
+        self.assertEqual(self.sim_tca.control, 0)
+        self.assertIsNone(self.tca.selected)
+        self.tca.select(2)
+        self.tca.invalidate()
+        self.assertTrue(self.tca.select(2))
+        self.assertEqual(self.sim_tca.writes, 4)
+
+    def test_invalid_channel(self):
+        with self.assertRaises(ValueError):
+            self.tca.select(8)
+
+    def test_failed_write_forgets_selection(self):
+        self.tca.select(1)
+        del self.bus.devices[self.sim_tca.address]
+        with self.assertRaises(OSError):
+            self.tca.select(4)
+        self.assertIsNone(self.tca.selected)
+        self.bus.attach(self.sim_tca)
+        self.assertTrue(self.tca.select(1))
+
+    def test_channel_block_holds_bus_lock(self):
+        seen = []
+
+        def other():
+            self.tca.select(6)
+            seen.append(self.sim_tca.control)
+
+        with self.tca.channel(0):
+            thread = threading.Thread(target=other)
+            thread.start()
+            thread.join(0.05)
+            self.assertEqual(self.sim_tca.control, 1 << 0)
+        thread.join()
+        self.assertEqual(seen, [1 << 6])
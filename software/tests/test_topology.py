@@ -0,0 +1,89 @@
+import unittest
+import os
+import tempfile
+import shutil
+from unittest import mock
+from software.hardware.sim import SimulatedRig
+from software.hardware import OBoardManager
+from software.hardware.topology import load_topology, save_topology, board_addresses
+
+
+class TestTopologyFile(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.file_name = os.path.join(self.temp_dir, 'topology.json')
+
+    def test_entries_of_other_buses_are_kept(self):
+        save_topology(1, [2, 0], file_name=self.file_name)
+        save_topology(1, [1], tca_channel=3, file_name=self.file_name)
+        self.assertEqual(load_topology(1, file_name=self.file_name), [0, 2])
+        self.assertEqual(load_topology(1, 3, file_name=self.file_name), [1])
+        self.assertIsNone(load_topology(2, file_name=self.file_name))
+
+    def test_unusable_file_is_ignored(self):
+        self.assertIsNone(load_topology(1, file_name=self.file_name))
+        with open(self.file_name, 'w') as f:
+            f.write('{not json')
+        self.assertIsNone(load_topology(1, file_name=self.file_name))
+        save_topology(1, [0], file_name=self.file_name)
+        self.assertEqual(load_topology(1, file_name=self.file_name), [0])
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+
+class TestCachedStartup(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.file_name = os.path.join(self.temp_dir, 'topology.json')
+        self.rig = SimulatedRig.with_boards(i2c_nums=[1], offsets=[0, 2]).install()
+        self.bus = self.rig.get_bus(1)
+
+    def start(self):
+        with mock.patch.object(self.bus, 'scan', wraps=self.bus.scan) as scan, \
+                mock.patch.object(self.bus, 'readfrom_into', wraps=self.bus.readfrom_into) as read, \
+                mock.patch.object(self.bus, 'writeto', wraps=self.bus.writeto) as write:
+            manager = OBoardManager(i2c_num=1, topology_file=self.file_name)
+            return manager, scan.call_count, read.call_count + write.call_count
+
+    def test_scan_once_then_probe(self):
+        manager, scans, _ = self.start()
+        self.assertEqual(scans, 1)
+        self.assertEqual(load_topology(1, file_name=self.file_name), [0, 2])
+
+        manager, scans, accesses = self.start()
+        self.assertEqual(scans, 0)
+        self.assertEqual([oboard.i2c_address_offset for oboard in manager.oboards], [0, 2])
+        # Four devices per known board, the MUX address of the two other offsets
+        self.assertEqual(accesses, 2 * 4 + 2)
+
+    def test_devices_are_created_on_first_use(self):
+        self.start()
+        manager, _, _ = self.start()
+        channel = manager.oboards[1].channel[5]
+        self.assertNotIn('Adc', vars(manager.oboards[1]))
+        channel.set_voltage(0.5)
+        self.assertAlmostEqual(channel.read_voltage(), 0.5, places=2)
+        self.assertIs(channel.dac, manager.oboards[1].Dac_1.channel_b)
+
+    def test_changed_boards_are_rescanned(self):
+        self.start()
+        self.bus.add_board(offset=1)
+        manager, scans, _ = self.start()
+        self.assertEqual(scans, 1)
+        self.assertEqual(len(manager.oboards), 3)
+        self.assertEqual(load_topology(1, file_name=self.file_name), [0, 1, 2])
+
+        # A board that no longer answers
+        del self.bus.devices[board_addresses(2)[1]]
+        manager, scans, _ = self.start()
+        self.assertEqual(scans, 1)
+        self.assertEqual(load_topology(1, file_name=self.file_name), [0, 1])
+
+    def tearDown(self):
+        self.rig.uninstall()
+        shutil.rmtree(self.temp_dir)
+
+
+if __name__ == '__main__':
+    unittest.main()
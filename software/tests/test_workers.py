@@ -0,0 +1,83 @@
+import unittest
+import os
+import tempfile
+import shutil
+from unittest import mock
+from software.hardware.sim import SimulatedRig
+from software.hardware import OBoardManager
+from software.logger import LogPipeline
+from software.workers import Coordinator
+
+
+class TestCoordinator(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.cwd = os.getcwd()
+        os.chdir(self.temp_dir)
+        self.rig = None
+
+    def managers(self, i2c_nums, realtime=False):
+        self.rig = SimulatedRig.with_boards(i2c_nums=i2c_nums, offsets=[0], realtime=realtime).install()
+        return [OBoardManager(i2c_num=i2c_num) for i2c_num in i2c_nums]
+
+    def test_workers_track_all_buses(self):
+        managers = self.managers([1, 3])
+        coordinator = Coordinator(managers, status_interval=None, writers=LogPipeline(),
+                                  iterations=2, iv_sweep=False)
+        coordinator.run(duration=0.5)
+
+        self.assertFalse(coordinator.running)
+        for bus, stat in coordinator.stats().items():
+            self.assertEqual(stat['state'], 'stopped')
+            self.assertGreater(stat['cycles'], 0)
+            self.assertEqual(stat['samples'], stat['cycles'] * 2 * 8)
+            self.assertEqual(stat['errors'], 0)
+        for manager in managers:
+            for channel in manager.channels():
+                self.assertTrue(os.path.exists(os.path.join('data', f'{channel.id}_data.csv')))
+                self.assertEqual(channel.dac.raw_value, 0)
+
+    def test_failed_readings_are_not_counted(self):
+        managers = self.managers([1])
+        coordinator = Coordinator(managers, status_interval=None, writers=LogPipeline(),
+                                  iterations=2, iv_sweep=False)
+        channel = managers[0].oboards[0].channel[5]
+        with mock.patch.object(channel, 'read_selected_sample', side_effect=OSError("NACK")), \
+                mock.patch('builtins.print'):
+            coordinator.run(duration=0.3)
+        stat = coordinator.stats()[1]
+        self.assertGreater(stat['cycles'], 0)
+        self.assertEqual(stat['samples'], stat['cycles'] * 2 * 7)
+
+    def test_failing_bus_does_not_stop_the_others(self):
+        managers = self.managers([1, 3])
+        coordinator = Coordinator(managers, status_interval=None, writers=LogPipeline(),
+                                  iv_sweep=False, array_tracker=True)
+        with mock.patch.object(managers[0], 'schedule', side_effect=OSError("bus gone")):
+            coordinator.run(duration=0.3)
+        stats = coordinator.stats()
+        self.assertEqual(stats[1]['state'], 'failed')
+        self.assertEqual(stats[1]['last_error'], 'bus gone')
+        self.assertEqual(stats[3]['state'], 'stopped')
+        self.assertEqual(stats[3]['samples'], stats[3]['cycles'] * 8)
+
+    def test_per_bus_throughput_is_kept(self):
+        # With realtime transfers and conversions, a second bus must not slow down the first
+        rates = {}
+        for i2c_nums in ([1], [1, 3]):
+            coordinator = Coordinator(self.managers(i2c_nums, realtime=True), status_interval=None,
+                                      writers=LogPipeline(), iv_sweep=False, array_tracker=True)
+            coordinator.run(duration=1.0)
+            rates[len(i2c_nums)] = [stat['samples_per_s'] for stat in coordinator.stats().values()]
+            self.rig.uninstall()
+        self.assertGreater(min(rates[2]), 0.7 * rates[1][0])
+
+    def tearDown(self):
+        if self.rig is not None:
+            self.rig.uninstall()
+        os.chdir(self.cwd)
+        shutil.rmtree(self.temp_dir)
+
+
+if __name__ == '__main__':
+    unittest.main()
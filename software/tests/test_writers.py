@@ -0,0 +1,151 @@
+import unittest
+import os
+import tempfile
+import shutil
+import threading
+import numpy as np
+from software.logger import BufferedWriter, LogPipeline, WriterPool
+
+HEADER = 'timestamp,measured_voltage,measured_current,dac_value,adc_gain_v,adc_gain_c'
+
+
+class TestBufferedWriter(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.file_name = os.path.join(self.temp_dir, 'channel_data.csv')
+
+    def test_output_matches_per_row_append(self):
+        rows = [
+            ("2024-01-01T00:00:00", 0.1 + 0.2, np.float64(0.004321), 1234, 2, 16),
+            ("2024-01-01T00:00:01", -0.0, 1e-07, 0, 2 / 3, 16),
+        ]
+        reference = os.path.join(self.temp_dir, 'reference.csv')
+        with open(reference, 'a') as f:
+            f.write(f'{HEADER}\n')
+        for t, v, c, d, gv, gc in rows:
+            with open(reference, 'a') as f:
+                f.write(f'{t},{v},{c},{d},{gv},{gc}\n')
+
+        writer = BufferedWriter(self.file_name, header=HEADER)
+        for row in rows:
+            writer.write_row(row)
+        writer.close()
+        with open(reference) as a, open(self.file_name) as b:
+            self.assertEqual(a.read(), b.read())
+
+    def test_rows_buffered_until_limit(self):
+        writer = BufferedWriter(self.file_name, header=HEADER, max_rows=3, max_age=3600)
+        writer.write_row((1, 2))
+        writer.write_row((3, 4))
+        self.assertEqual(writer.pending, 2)
+        writer.write_row((5, 6))
+        self.assertEqual(writer.pending, 0)
+        writer.close()
+
+    def test_pool_keeps_header_on_reopen(self):
+        pool = WriterPool()
+        pool.write_row(self.file_name, (1, 2), header=HEADER)
+        pool.close()
+        pool.write_row(self.file_name, (3, 4), header=HEADER)
+        pool.close()
+        with open(self.file_name) as f:
+            self.assertEqual(f.read(), f'{HEADER}\n1,2\n3,4\n')
+
+    def test_pool_truncates_in_write_mode(self):
+        pool = WriterPool()
+        pool.write_row(self.file_name, (1, 2), header=HEADER)
+        pool.open(self.file_name, header=HEADER, mode='w')
+        pool.write_row(self.file_name, (3, 4))
+        pool.close()
+        with open(self.file_name) as f:
+            self.assertEqual(f.read(), f'{HEADER}\n3,4\n')
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+
+class BlockingPool(WriterPool):
+    """Writer pool whose writes wait until released, like a stalled SD card."""
+
+    def __init__(self):
+        super().__init__()
+        self.release = threading.Event()
+
+    def write_row(self, file_name, fields, header=None):
+        self.release.wait()
+        super().write_row(file_name, fields, header=header)
+
+
+class TestLogPipeline(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.file_name = os.path.join(self.temp_dir, 'channel_data.csv')
+
+    def test_output_matches_writer_pool(self):
+        reference = os.path.join(self.temp_dir, 'reference.csv')
+        pool = WriterPool()
+        pipeline = LogPipeline(WriterPool())
+        for i in range(1000):
+            row = (f"2024-01-01T00:00:{i}", i * 0.001, np.float64(i * 1e-6), i, 2, 16)
+            pool.write_row(reference, row, header=HEADER)
+            pipeline.write_row(self.file_name, row, header=HEADER)
+        pool.close()
+        pipeline.stop()
+        self.assertFalse(pipeline.running)
+        self.assertEqual(pipeline.written, 1000)
+        with open(reference) as a, open(self.file_name) as b:
+            self.assertEqual(a.read(), b.read())
+
+    def test_flush_waits_for_queued_rows(self):
+        pipeline = LogPipeline(WriterPool())
+        pipeline.open(self.file_name, header=HEADER, mode='w')
+        pipeline.write_row(self.file_name, (1, 2))
+        pipeline.flush()
+        with open(self.file_name) as f:
+            self.assertEqual(f.read(), f'{HEADER}\n1,2\n')
+        pipeline.stop()
+
+    def test_full_queue_drops_rows(self):
+        pool = BlockingPool()
+        pipeline = LogPipeline(pool, maxsize=2, timeout=0.01, batch_size=1)
+        results = [pipeline.write_row(self.file_name, (i,)) for i in range(10)]
+        self.assertIn(False, results)
+        self.assertEqual(pipeline.dropped, results.count(False))
+        self.assertGreaterEqual(pipeline.overflows, pipeline.dropped)
+        pool.release.set()
+        pipeline.stop()
+        self.assertEqual(pipeline.written, pipeline.enqueued)
+        with open(self.file_name) as f:
+            self.assertEqual(len(f.readlines()), pipeline.written)
+
+    def test_counters_with_concurrent_writers(self):
+        # One writing thread per bus, with a queue small enough to overflow
+        pipeline = LogPipeline(WriterPool(), maxsize=16, timeout=0.001)
+
+        def write(bus):
+            file_name = os.path.join(self.temp_dir, f'bus_{bus}.csv')
+            for i in range(2000):
+                pipeline.write_row(file_name, (bus, i))
+
+        threads = [threading.Thread(target=write, args=(bus,)) for bus in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        pipeline.stop()
+        stats = pipeline.stats()
+        self.assertEqual(stats['enqueued'] + stats['dropped'], 8 * 2000)
+        self.assertEqual(stats['written'], stats['enqueued'])
+        self.assertGreaterEqual(stats['overflows'], stats['dropped'])
+
+    def test_write_after_stop_restarts(self):
+        pipeline = LogPipeline(WriterPool())
+        pipeline.write_row(self.file_name, (1,))
+        pipeline.stop()
+        pipeline.write_row(self.file_name, (2,))
+        pipeline.stop()
+        with open(self.file_name) as f:
+            self.assertEqual(f.read(), '1\n2\n')
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
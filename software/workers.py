@@ -0,0 +1,258 @@
+"""Parallel acquisition with one worker thread per I2C bus.
+
+Buses are independent: a settle sleep or ADC conversion on one bus does not
+need to hold up the boards on another. :class:`BusWorker` runs the start-up IV
+sweep and the tracking loop of one :class:`OBoardManager` in its own thread,
+and :class:`Coordinator` starts the workers, collects their reports and prints
+the status of all buses. The workers only talk to their own bus; their rows go
+through the coordinator's log pipeline, so one writer thread does all file I/O.
+
+Threads are enough here, the acquisition loop spends its time in sleeps and
+I2C transfers, which both release the GIL. The simulated rig works the same
+way, so a multi-bus run can be tested without hardware.
+
+Example:
+    >>> managers = [OBoardManager(i2c_num=n) for n in (1, 3)]
+    >>> coordinator = Coordinator(managers)
+    >>> coordinator.run(duration=60)
+    >>> coordinator.stats()
+"""
+
+import queue
+import threading
+import time
+from typing import NamedTuple
+
+import numpy as np
+
+from . import metrics
+from .logger import default_log_pipeline
+from .mppt import ArrayTracker
+from .hardware.i2c import open_bus, close_bus
+from .hardware.constants import (
+    WORKER_ITERATIONS,
+    WORKER_INTERVAL,
+    WORKER_STATUS_INTERVAL,
+    WORKER_REPORT_TIMEOUT,
+)
+
+
+class BusReport(NamedTuple):
+    """Message from a bus worker to the coordinator.
+
+    Attributes:
+        bus (int): I2C bus number of the worker.
+        kind (str): 'sweep' after the IV sweep, 'cycle' after a tracking cycle,
+            'error' for a failed channel visit, 'failed' if the worker stopped on
+            an error and 'stopped' when it is done.
+        samples (int): Samples taken since the last report.
+        elapsed (float): Duration of the reported work (seconds).
+        message (str): Error message, empty otherwise.
+    """
+    bus: int
+    kind: str
+    samples: int = 0
+    elapsed: float = 0.0
+    message: str = ''
+
+
+class BusWorker(threading.Thread):
+    """Runs the acquisition of one I2C bus in its own thread.
+
+    Args:
+        manager (OBoardManager): Boards of the bus.
+        reports (queue.Queue): Queue the :class:`BusReport` messages are put on.
+        stop_event (threading.Event): Set to stop the worker after its current cycle.
+        iterations (int): Tracking iterations per channel visit.
+        interval (float): Time between tracking iterations (seconds).
+        array_tracker (bool): Step all channels of the bus once per cycle with
+            :class:`ArrayTracker` instead of visiting them one by one.
+        iv_sweep (bool): Run the board-wide IV sweep of every board before tracking.
+    """
+
+    def __init__(self, manager, reports, stop_event, iterations=WORKER_ITERATIONS,
+                 interval=WORKER_INTERVAL, array_tracker=False, iv_sweep=True):
+        super().__init__(name=f'BusWorker-{manager.i2c_num}', daemon=True)
+        self.manager = manager
+        self.reports = reports
+        self.stop_event = stop_event
+        self.iterations = iterations
+        self.interval = interval
+        self.array_tracker = array_tracker
+        self.iv_sweep = iv_sweep
+
+    def _report(self, kind, samples=0, elapsed=0.0, message=''):
+        self.reports.put(BusReport(self.manager.i2c_num, kind, samples, elapsed, message))
+
+    def run(self):
+        # Hold the shared bus while the worker runs
+        bus = open_bus(self.manager.i2c_num)
+        try:
+            if self.iv_sweep:
+                start = time.perf_counter()
+                for oboard in self.manager.oboards:
+                    oboard.perform_iv_sweep(stop_event=self.stop_event)
+                self._report('sweep', elapsed=time.perf_counter() - start)
+
+            schedule = self.manager.schedule()
+            if self.array_tracker:
+                tracker = ArrayTracker([step.item for step in schedule])
+                cycle = lambda: self._array_cycle(tracker)
+            else:
+                cycle = lambda: self._schedule_cycle(schedule)
+            while not self.stop_event.is_set():
+                start = time.perf_counter()
+                samples = cycle()
+                self._report('cycle', samples, time.perf_counter() - start)
+        except Exception as e:
+            self._report('failed', message=str(e))
+        finally:
+            # Leave the cells of this bus at 0 V, also when the worker failed
+            try:
+                self.manager.set_all_voltages(0)
+            except Exception as e:
+                self._report('error', message=f"Could not set the channels to 0 V: {e}")
+            close_bus(bus)
+            self._report('stopped')
+
+    def _schedule_cycle(self, schedule):
+        samples = 0
+        for step in schedule:
+            # mpp_track skips iterations whose reading failed, count the readings actually taken
+            before = step.item.samples
+            try:
+                step.item.mpp_track(iterations=self.iterations, interval=self.interval)
+            except Exception as e:
+                self._report('error', message=f"Error during MPP tracking on channel {step.item.ind} "
+                                              f"of board {step.item.board.ID}: {e}")
+            samples += step.item.samples - before
+        return samples
+
+    def _array_cycle(self, tracker):
+        tracker.cycle()
+        return int(np.count_nonzero(~np.isnan(tracker.voltage)))
+
+
+class Coordinator:
+    """Starts one :class:`BusWorker` per bus and collects their reports.
+
+    All channels of the managers log through ``writers``, and the coordinator
+    flushes it when the workers are stopped.
+
+    Args:
+        managers (list[OBoardManager]): One manager per I2C bus.
+        status_interval (float): Time between status lines (seconds), None for no status output.
+        writers (LogPipeline): Log pipeline of all channels.
+        **worker_kwargs: Passed to :class:`BusWorker`.
+
+    Attributes:
+        workers (list[BusWorker]): The bus workers, in the order of ``managers``.
+        status (dict): Per bus number: cycles, samples, errors, tracking time and state.
+    """
+
+    def __init__(self, managers, status_interval=WORKER_STATUS_INTERVAL,
+                 writers=default_log_pipeline, **worker_kwargs):
+        self.status_interval = status_interval
+        self.writers = writers
+        self.reports = queue.Queue()
+        self.stop_event = threading.Event()
+        self.workers = []
+        self.status = {}
+        for manager in managers:
+            for channel in manager.channels():
+                channel.writers = writers
+            self.workers.append(BusWorker(manager, self.reports, self.stop_event, **worker_kwargs))
+            self.status[manager.i2c_num] = {
+                'state': 'idle', 'cycles': 0, 'samples': 0, 'errors': 0,
+                'sweep_time': 0.0, 'tracking_time': 0.0, 'last_error': '',
+            }
+        self._last_status = None
+
+    @property
+    def running(self):
+        """True while any worker is alive."""
+        return any(worker.is_alive() for worker in self.workers)
+
+    def start(self):
+        """Start all workers."""
+        self.stop_event.clear()
+        self._last_status = time.monotonic()
+        for worker, status in zip(self.workers, self.status.values()):
+            status['state'] = 'running'
+            worker.start()
+
+    def run(self, duration=None):
+        """Start the workers and handle their reports until ``duration`` has passed.
+
+        Without a duration it runs until all workers stopped or it is interrupted.
+        The workers are stopped on return.
+
+        Args:
+            duration (float, optional): Run time (seconds).
+        """
+        end = None if duration is None else time.monotonic() + duration
+        self.start()
+        try:
+            while self.running and (end is None or time.monotonic() < end):
+                self.poll(WORKER_REPORT_TIMEOUT)
+        finally:
+            self.stop()
+
+    def poll(self, timeout=0):
+        """Handle all waiting reports, waiting up to ``timeout`` for the first one."""
+        try:
+            self.handle(self.reports.get(timeout=timeout) if timeout else self.reports.get_nowait())
+            while True:
+                self.handle(self.reports.get_nowait())
+        except queue.Empty:
+            pass
+        if (self.status_interval is not None and self._last_status is not None
+                and time.monotonic() - self._last_status >= self.status_interval):
+            self._last_status = time.monotonic()
+            print(self.describe())
+            if metrics.registry.enabled:
+                print(metrics.describe())
+
+    def handle(self, report):
+        """Update the status of a bus from one of its reports."""
+        status = self.status[report.bus]
+        if report.kind == 'sweep':
+            status['sweep_time'] += report.elapsed
+            print(f"IV sweep on I2C bus {report.bus} took {report.elapsed:.1f} s")
+        elif report.kind == 'cycle':
+            status['cycles'] += 1
+            status['samples'] += report.samples
+            status['tracking_time'] += report.elapsed
+        elif report.kind in ('error', 'failed'):
+            status['errors'] += 1
+            status['last_error'] = report.message
+            print(f"I2C bus {report.bus}: {report.message}")
+            if report.kind == 'failed':
+                status['state'] = 'failed'
+        elif report.kind == 'stopped' and status['state'] != 'failed':
+            status['state'] = 'stopped'
+
+    def stop(self, timeout=None):
+        """Stop the workers after their current cycle and write out the logged rows."""
+        self.stop_event.set()
+        for worker in self.workers:
+            if worker.is_alive():
+                worker.join(timeout)
+        self.poll()
+        self.writers.flush()
+
+    def stats(self):
+        """Return the status per bus number, with the tracking samples per second."""
+        stats = {}
+        for bus, status in self.status.items():
+            rate = status['samples'] / status['tracking_time'] if status['tracking_time'] else 0.0
+            stats[bus] = dict(status, samples_per_s=rate)
+        return stats
+
+    def describe(self):
+        """One status line per bus."""
+        return '\n'.join(
+            f"I2C bus {bus}: {stat['state']}, {stat['cycles']} cycles, {stat['samples']} samples, "
+            f"{stat['samples_per_s']:.1f} samples/s, {stat['errors']} errors"
+            for bus, stat in self.stats().items()
+        )